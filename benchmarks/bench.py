@@ -0,0 +1,251 @@
+"""
+Benchmark suite, no hardware needed
+
+Measures the frame codec, the overhead of a transaction, the polling throughput
+of one gauge and of a bus of gauges, and the memory cost of a stored sample.
+Transactions run against a capture replayed at full speed (``vsr53replay://``)
+or the in-process simulator without timing (``vsr53sim://?timing=0``), so the
+numbers are the cost of the library itself.
+
+Usage::
+
+    python benchmarks/bench.py                       # compare with baseline.json
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --save                # update baseline.json
+
+Results are JSON: for every benchmark a value, its unit and whether higher is
+better. Timings depend on the machine, so baseline.json holds one baseline per
+host (node name, Python and architecture) and a run is only compared with the
+baseline of its own host; without one, it is reported and nothing fails. With
+a baseline, benchmarks worse than ``--tolerance`` (relative) are reported as
+regressions and the exit status is 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from vsr53 import VSR53DL
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.bus import Reading, VSR53Bus
+from vsr53.capture import capture
+from vsr53.codec import FrameParser, encode_frame, read_request
+from vsr53.Commands import Commands as CMD
+from vsr53.parsers import decode_answer
+from vsr53.recorder import RECORD
+from vsr53.simulator import VSR53Simulator
+from vsr53.stream import RingBuffer
+from vsr53.ThyrCommPackage import ThyrCommPackage
+
+BASELINE = Path(__file__).with_name("baseline.json")
+BUS_GAUGES = 8
+
+
+def rate(function, count: int, repeat: int = 5) -> float:
+    """
+    :return: best rate of ``count`` calls of ``function`` over ``repeat`` runs, in calls/s
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(count):
+            function()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def result(value: float, unit: str, higher_is_better: bool = True) -> dict:
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def bench_codec(scale: float) -> dict:
+    count = int(100000 * scale)
+    frame = encode_frame(1, AC.RD_RX, CMD.Measurement_Value, b"2.50e-04")
+
+    pack = ThyrCommPackage(1)
+    pack.cmd = CMD.Display_Unit
+    pack.access_code = AC.WR_TX
+    pack.data = "mbar"
+
+    def parse_package():
+        ThyrCommPackage(1).parse_answer(frame)
+
+    def parse_stream():
+        parser = FrameParser(1)
+        parser.feed(frame)
+        return decode_answer(parser.next_frame()).value
+
+    return {
+        "package_encode": result(rate(pack.get_bytes, count), "frames/s"),
+        "package_decode": result(rate(parse_package, count), "frames/s"),
+        "frame_encode": result(
+            rate(lambda: encode_frame(1, AC.WR_TX, CMD.Display_Unit, b"mbar"), count),
+            "frames/s",
+        ),
+        "answer_decode": result(
+            rate(lambda: decode_answer(frame).value, count), "frames/s"
+        ),
+        "stream_parse": result(rate(parse_stream, count), "frames/s"),
+    }
+
+
+def bench_transactions(scale: float, directory: Path) -> dict:
+    count = int(5000 * scale)
+    path = directory / "measurement.cap"
+    with VSR53DL("vsr53sim://?timing=0") as gauge, capture(gauge, path):
+        gauge.get_measurement_value()
+    request = read_request(1, CMD.Measurement_Value)
+
+    with VSR53DL(f"vsr53replay://{path}?loop=1") as gauge:
+        overhead = rate(lambda: gauge._instruction_exchange(request), count)
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        one = rate(gauge.get_measurement_value, count)
+
+    simulator = VSR53Simulator(list(range(1, BUS_GAUGES + 1)), timing=False)
+    with VSR53Bus(simulator.url) as bus:
+        for address in range(1, BUS_GAUGES + 1):
+            bus.gauge(address)
+        # one poll of count readings, round robin over the gauges
+        polls = rate(lambda: sum(1 for _ in bus.poll(cycles=count)), 1)
+    return {
+        "transaction": result(overhead, "transactions/s"),
+        "poll_one_gauge": result(one, "readings/s"),
+        "poll_bus": result(polls * count, "readings/s"),
+    }
+
+
+def allocated(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def bench_memory(scale: float) -> dict:
+    count = int(100000 * scale)
+
+    def readings():
+        return [Reading(1, "MV", 1e-3 * i, 1e9 + i) for i in range(count)]
+
+    return {
+        "ring_buffer_sample": result(
+            allocated(lambda: RingBuffer(count)) / count, "bytes", False
+        ),
+        "recorder_sample": result(RECORD.size, "bytes", False),
+        "reading_object": result(allocated(readings) / count, "bytes", False),
+    }
+
+
+def run(scale: float = 1.0) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            **bench_codec(scale),
+            **bench_transactions(scale, Path(directory)),
+            **bench_memory(scale),
+        }
+    return {
+        "node": platform.node(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def host(run: dict) -> str:
+    """
+    :return: key of the baseline of the host that produced ``run``
+    """
+    return f"{run['node']} {run['implementation']} {run['python']} {run['machine']}"
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """
+    :return: (name, current value, baseline value, relative change) of every regression
+    """
+    regressions = []
+    for name, entry in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None or not reference["value"]:
+            continue
+        change = entry["value"] / reference["value"] - 1
+        worse = -change if entry["higher_is_better"] else change
+        if worse > tolerance:
+            regressions.append((name, entry["value"], reference["value"], change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--baseline", default=str(BASELINE), help="baseline (default %(default)s)"
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.3,
+        help="relative degradation reported as a regression (default %(default)s)",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier of the iteration counts"
+    )
+    args = parser.parse_args(argv)
+
+    current = run(args.scale)
+    key = host(current)
+    baseline_path = Path(args.baseline)
+    baselines = {}
+    if baseline_path.exists():
+        baselines = json.loads(baseline_path.read_text())["hosts"]
+    baseline = None if args.save else baselines.get(key)
+
+    for name, entry in current["results"].items():
+        line = f"{name:20} {entry['value']:14.1f} {entry['unit']}"
+        reference = baseline["results"].get(name) if baseline else None
+        if reference:
+            line += f"  ({entry['value'] / reference['value'] - 1:+.0%} vs baseline)"
+        print(line)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + "\n")
+    if args.save:
+        baselines[key] = current
+        baseline_path.write_text(json.dumps({"hosts": baselines}, indent=2) + "\n")
+        print(f"Baseline of {key} saved to {baseline_path}")
+        return 0
+    if baseline is None:
+        # timings of other hosts say nothing about this one
+        print(
+            f"No baseline of {key} in {baseline_path}, --save creates one",
+            file=sys.stderr,
+        )
+        return 0
+    regressions = compare(current, baseline, args.tolerance)
+    for name, value, reference, change in regressions:
+        print(
+            f"REGRESSION {name}: {value:.1f} vs {reference:.1f} ({change:+.0%})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""
+Time-compressed soak test, no hardware needed
+
+Drives a VSR53DL at maximum rate against the in-process simulator (without
+timing, link at 115200 baud so that timeouts stay short) with configurable
+fault rates, and watches what months of acquisition would reveal:
+
+* transaction latency (p50, p99, p99.9) per time window, and its drift from
+  the first third of the run after warm-up to the last third
+* Python heap (tracemalloc) and RSS growth per transaction
+* retries, timeouts and failed transactions per window
+* stuck transactions: no transaction completed for ``--stuck-after`` seconds
+
+Usage::
+
+    python benchmarks/soak.py --duration 600 --drop 0.001 --garbage 0.01
+
+The report is printed, and written as JSON with ``--output``. The exit status
+is 1 when a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from vsr53 import VSR53DL
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+from vsr53.simulator import Faults, VSR53Simulator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BAUDRATE = 115200
+RESPONSE_DELAY = 100  # μs
+
+# Latency histogram of a window, merged over thirds of the run: 20 bins per
+# decade from 1 μs to 10 s
+BINS_PER_DECADE = 20
+LOWEST_LATENCY = 1e-6
+BINS = 7 * BINS_PER_DECADE + 1
+
+
+def percentile(ordered: list, fraction: float) -> float:
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def histogram(latencies: list) -> list:
+    """
+    :return: count of the latencies per bin
+    """
+    counts = [0] * BINS
+    for latency in latencies:
+        index = 0
+        if latency > LOWEST_LATENCY:
+            index = int(math.log10(latency / LOWEST_LATENCY) * BINS_PER_DECADE) + 1
+        counts[min(index, BINS - 1)] += 1
+    return counts
+
+
+def histogram_percentile(counts: list, fraction: float) -> float:
+    """
+    :return: upper bound of the bin holding the percentile
+    """
+    rank = fraction * sum(counts)
+    cumulative = 0
+    for index, count in enumerate(counts):
+        cumulative += count
+        if cumulative > rank:
+            return LOWEST_LATENCY * 10 ** (index / BINS_PER_DECADE)
+    return float("nan")
+
+
+def rss() -> int | None:
+    """
+    :return: resident set size in bytes, None where it cannot be read
+    """
+    try:
+        pages = Path("/proc/self/statm").read_text().split()[1]
+        return int(pages) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return None
+    # peak, not current, on systems without /proc
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class Watchdog:
+    """
+    Reports the stalls of the transaction loop longer than ``stuck_after`` seconds
+    """
+
+    def __init__(self, stuck_after: float):
+        self.stuck_after = stuck_after
+        self.stalls = []  # (seconds since start, duration)
+        self._progress = time.monotonic()
+        self._started = self._progress
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def progress(self):
+        self._progress = time.monotonic()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _watch(self):
+        stalled_since = None
+        while not self._stop.wait(self.stuck_after / 4):
+            now = time.monotonic()
+            progress = self._progress
+            if now - progress > self.stuck_after:
+                if stalled_since != progress:
+                    stalled_since = progress
+                    self.stalls.append((progress - self._started, None))
+                    log.critical("No transaction completed for %.1fs", now - progress)
+            elif stalled_since is not None and self.stalls[-1][1] is None:
+                self.stalls[-1] = (self.stalls[-1][0], progress - stalled_since)
+
+
+def soak(
+    duration: float,
+    *,
+    windows: int = 10,
+    faults: Faults | None = None,
+    stuck_after: float = 2.0,
+    seed: int = 0,
+) -> dict:
+    """
+    :return: report with one entry per window
+    """
+    simulator = VSR53Simulator(faults=faults, seed=seed, timing=False)
+    device = simulator[1]
+    device.registers[CMD.Baud_Rate] = str(BAUDRATE)
+    device.registers[CMD.Response_Delay] = str(RESPONSE_DELAY)
+    window_length = duration / windows
+    report = []
+    watchdog = Watchdog(stuck_after)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        with VSR53DL(
+            simulator.url, baudrate=BAUDRATE, response_delay=RESPONSE_DELAY
+        ) as gauge:
+            metrics = gauge.enable_metrics().get(1, CMD.Measurement_Value)
+            watchdog.start()
+            for _ in range(windows):
+                report.append(_window(gauge, metrics, window_length, watchdog))
+            watchdog.stop()
+    finally:
+        tracemalloc.stop()
+    return {
+        "duration": duration,
+        "faults": vars(simulator.faults),
+        "windows": report,
+        "stalls": watchdog.stalls,
+    }
+
+
+def _window(gauge, metrics, length, watchdog) -> dict:
+    latencies = []
+    failures = 0
+    retries, timeouts = metrics.retries, metrics.timeouts
+    perf_counter = time.perf_counter
+    end = time.monotonic() + length
+    while time.monotonic() < end:
+        started = perf_counter()
+        try:
+            gauge.get_measurement_value()
+        except (VSR53Error, ValueError):
+            # retries exhausted, or an error answer
+            failures += 1
+        latencies.append(perf_counter() - started)
+        watchdog.progress()
+    latencies.sort()
+    window = {
+        "transactions": len(latencies),
+        "failures": failures,
+        "retries": metrics.retries - retries,
+        "timeouts": metrics.timeouts - timeouts,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "p999": percentile(latencies, 0.999),
+        "histogram": histogram(latencies),
+    }
+    # the heap of the library only, without the latencies and the report
+    del latencies
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, __file__)]
+    )
+    window["heap"] = sum(trace.size for trace in snapshot.traces)
+    window["rss"] = rss()
+    return window
+
+
+def thirds(windows: list) -> tuple:
+    """
+    :return: latency histograms of the first third of the windows after warm-up (the
+        first window) and of the last third
+    """
+    third = max(1, (len(windows) - 1) // 3)
+
+    def merged(part):
+        return [
+            sum(counts) for counts in zip(*(window["histogram"] for window in part))
+        ]
+
+    return merged(windows[1 : 1 + third]), merged(windows[-third:])
+
+
+def evaluate(
+    report: dict,
+    *,
+    max_p50_drift: float = 1.5,
+    max_p99_drift: float = 2.0,
+    max_heap_growth: float = 1.0,
+    max_rss_growth: float = 64.0,
+    min_samples: int = 10000,
+) -> list:
+    """
+    Compares the end of the run with its start after warm-up (the first window)
+
+    The latencies of the first and the last third of the windows are merged, a
+    single window holds too few samples for a stable p99. They are only compared
+    when both thirds hold ``min_samples`` transactions.
+    :param max_p50_drift: largest ratio of the p50 latencies
+    :param max_p99_drift: largest ratio of the p99 latencies
+    :param max_heap_growth: largest heap growth in bytes per transaction
+    :param max_rss_growth: largest RSS growth in bytes per transaction
+    :param min_samples: fewest transactions per third to compare the latencies
+    :return: descriptions of the failed checks
+    """
+    failed = []
+    windows = report["windows"]
+    if len(windows) < 3:
+        return ["at least 3 windows are needed"]
+    reference, last = windows[1], windows[-1]
+    transactions = sum(window["transactions"] for window in windows[2:])
+    start, end = thirds(windows)
+    if min(sum(start), sum(end)) >= min_samples:
+        for key, fraction, limit in (
+            ("p50", 0.5, max_p50_drift),
+            ("p99", 0.99, max_p99_drift),
+        ):
+            drift = histogram_percentile(end, fraction) / histogram_percentile(
+                start, fraction
+            )
+            if drift > limit:
+                failed.append(f"{key} latency drifted x{drift:.2f} (limit x{limit})")
+    checks = [("heap", max_heap_growth)]
+    if reference["rss"] is not None and last["rss"] is not None:
+        checks.append(("rss", max_rss_growth))
+    for key, limit in checks:
+        growth = (last[key] - reference[key]) / max(1, transactions)
+        if growth > limit:
+            failed.append(
+                f"{key} grew by {growth:.2f} bytes per transaction (limit {limit})"
+            )
+    if report["stalls"]:
+        failed.append(f"{len(report['stalls'])} stuck transaction(s)")
+    return failed
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds")
+    parser.add_argument("--windows", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stuck-after", type=float, default=2.0, help="seconds")
+    for fault in ("garbage", "checksum", "error", "drop"):
+        parser.add_argument(
+            f"--{fault}", type=float, default=0.0, help=f"{fault} fault rate"
+        )
+    parser.add_argument("--max-p50-drift", type=float, default=1.5)
+    parser.add_argument("--max-p99-drift", type=float, default=2.0)
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=10000,
+        help="fewest transactions per third of the run to compare the latencies",
+    )
+    parser.add_argument(
+        "--max-heap-growth", type=float, default=1.0, help="bytes per transaction"
+    )
+    parser.add_argument(
+        "--max-rss-growth", type=float, default=64.0, help="bytes per transaction"
+    )
+    parser.add_argument("--output", help="write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    # error answers are injected on purpose, keep them off the console
+    log.setLevel(logging.CRITICAL)
+    faults = Faults(
+        garbage=args.garbage, checksum=args.checksum, error=args.error, drop=args.drop
+    )
+    report = soak(
+        args.duration,
+        windows=args.windows,
+        faults=faults,
+        stuck_after=args.stuck_after,
+        seed=args.seed,
+    )
+    failed = evaluate(
+        report,
+        max_p50_drift=args.max_p50_drift,
+        max_p99_drift=args.max_p99_drift,
+        max_heap_growth=args.max_heap_growth,
+        max_rss_growth=args.max_rss_growth,
+        min_samples=args.min_samples,
+    )
+    report["failed"] = failed
+
+    print(
+        f"{'window':>6} {'transactions':>12} {'failures':>8} {'retries':>7} "
+        f"{'p50 μs':>8} {'p99 μs':>8} {'p99.9 μs':>9} {'heap kB':>8}"
+    )
+    for index, window in enumerate(report["windows"]):
+        print(
+            f"{index:6} {window['transactions']:12} {window['failures']:8} "
+            f"{window['retries']:7} {window['p50'] * 1e6:8.0f} "
+            f"{window['p99'] * 1e6:8.0f} {window['p999'] * 1e6:9.0f} "
+            f"{window['heap'] / 1000:8.1f}"
+        )
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    if len(report["windows"]) >= 3 and min(map(sum, thirds(report["windows"]))) < (
+        args.min_samples
+    ):
+        print(
+            f"Latency drift not checked: fewer than {args.min_samples} transactions "
+            "per third of the run",
+            file=sys.stderr,
+        )
+    for failure in failed:
+        print(f"FAIL {failure}", file=sys.stderr)
+    print("FAIL" if failed else "PASS")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
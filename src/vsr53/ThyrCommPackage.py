@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+import logging
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import checksum as frame_checksum
+from vsr53.codec import encode_data, encode_frame
 from vsr53.logger import log as log
 
 
@@ -95,6 +100,15 @@ class ThyrCommPackage:
         comm_package_string = "".join(self.get_package())
         return comm_package_string
 
+    def get_bytes(self):
+        """
+        Returns the package encoded as bytes, ready to be written to the serial port
+        :return: frame
+        """
+        return encode_frame(
+            self.address, self.access_code, self.cmd, encode_data(self.data or None)
+        )
+
     def get_package_ascii_list(self):
         """
         Returns a list with the ASCII table values of the characters that compose the package string
@@ -104,30 +118,35 @@ class ThyrCommPackage:
         return package_ascii_list
 
     def parse_answer(self, answer):
-        answer = answer.decode("utf-8")
+        frame = answer
+        answer = answer.decode("latin-1")
 
-        log.debug(answer)
         self.address = int(answer[0:3])
         self.access_code = int(answer[3])
         self.cmd = answer[4:6]
         self.data_length = int(answer[6:8])
         if self.data_length:
             self.data = answer[8 : 8 + self.data_length]
+            if self.access_code == AC.BIN_RX:
+                # binary data is kept as bytes
+                self.data = frame[8 : 8 + self.data_length]
         else:
             self.data = 0
-        checksum = answer[8 + self.data_length]
-
-        log.debug(answer)
-        log.debug(f"Device Address: {self.address}")
-        log.debug(f"Access Code: {self.access_code}")
-        log.debug(f"CMD: {self.cmd}")
-        log.debug(f"Data Length: {self.data_length}")
-        log.debug(f"Data: {self.data}")
-        log.debug(f"Checksum: {self.get_checksum()}")
-        if checksum == self.get_checksum():
-            log.debug("Checksum matches!")
-        else:
-            log.debug("Checksum mismatch!")
+
+        if log.isEnabledFor(logging.DEBUG):
+            checksum = answer[8 + self.data_length]
+            expected_checksum = chr(frame_checksum(frame[: 8 + self.data_length]))
+            log.debug(answer)
+            log.debug("Device Address: %s", self.address)
+            log.debug("Access Code: %s", self.access_code)
+            log.debug("CMD: %s", self.cmd)
+            log.debug("Data Length: %s", self.data_length)
+            log.debug("Data: %s", self.data)
+            log.debug("Checksum: %s", expected_checksum)
+            if checksum == expected_checksum:
+                log.debug("Checksum matches!")
+            else:
+                log.debug("Checksum mismatch!")
         return answer
 
     @staticmethod
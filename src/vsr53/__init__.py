@@ -1,6 +1,37 @@
+"""
+Thyracont VSR53 gauges
+
+The gauge classes are loaded on first access, so the protocol modules
+(:mod:`vsr53.codec`, :mod:`vsr53.ThyrCommPackage`, :mod:`vsr53.Commands`,
+:mod:`vsr53.AccessCodes`, :mod:`vsr53.ErrorMessages`, :mod:`vsr53.parsers`,
+:mod:`vsr53.decoder`) can be imported without pyserial.
+"""
+
 from __future__ import annotations
 
+from typing import TYPE_CHECKING
+
 from vsr53._version import __version__, __version_tuple__
-from vsr53.vsr53 import VSR53DL, VSR53USB
+
+if TYPE_CHECKING:
+    from vsr53.vsr53 import VSR53DL, VSR53USB
 
 __all__ = ["VSR53DL", "VSR53USB", "__version__", "__version_tuple__"]
+
+_LAZY = {"VSR53DL": "vsr53.vsr53", "VSR53USB": "vsr53.vsr53"}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    import importlib
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,141 @@
+"""
+Command line tools, ``vsr53 <command> --help`` for the details of each command
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+
+
+def _export(args):
+    from vsr53.recorder import export_csv
+
+    count = export_csv(args.recording, args.csv)
+    print(f"Exported {count} records to {args.csv}")  # noqa: T201
+
+
+def _gauge_spec(text):
+    from vsr53.manager import GaugeSpec
+
+    port, *fields = text.split(",")
+    try:
+        return GaugeSpec(
+            port,
+            *(
+                convert(field)
+                for convert, field in zip((int, str, float), fields)
+                if field
+            ),
+        )
+    except ValueError as e:
+        msg = f"invalid gauge {text!r}: {e}"
+        raise argparse.ArgumentTypeError(msg) from e
+
+
+def _serve(args):
+    from vsr53.manager import AcquisitionManager
+    from vsr53.server import GaugeServer, default_socket_path, parse_listen_address
+
+    manager = AcquisitionManager(args.gauge, cache=True)
+    server = GaugeServer(
+        manager, parse_listen_address(args.listen or default_socket_path())
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def _exporter(args):
+    from vsr53.exporter import Exporter
+    from vsr53.manager import AcquisitionManager
+    from vsr53.server import parse_listen_address
+
+    address = parse_listen_address(args.listen)
+    if not isinstance(address, tuple):
+        msg = f"expected HOST:PORT, got {args.listen!r}"
+        raise SystemExit(msg)
+    exporter = Exporter(
+        AcquisitionManager(args.gauge, metrics=True),
+        address,
+        refresh=args.refresh,
+        info_interval=args.info_interval,
+    )
+    try:
+        exporter.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        exporter.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vsr53", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="convert a recording to CSV")
+    export.add_argument("recording", help="recording written by vsr53.recorder")
+    export.add_argument("csv", help="CSV file to write")
+    export.set_defaults(handler=_export)
+
+    serve = commands.add_parser(
+        "serve", help="own serial ports and share their gauges over a socket"
+    )
+    serve.add_argument(
+        "--gauge",
+        action="append",
+        required=True,
+        type=_gauge_spec,
+        metavar="PORT[,ADDRESS[,MODEL[,RATE]]]",
+        help="gauge to serve, e.g. /dev/ttyUSB0,1,VSR53DL,10 (repeatable)",
+    )
+    serve.add_argument(
+        "--listen",
+        help="Unix domain socket path or HOST:PORT for TCP (default vsr53.sock in "
+        "$XDG_RUNTIME_DIR, or vsr53-UID.sock in the temporary directory)",
+    )
+    serve.set_defaults(handler=_serve)
+
+    exporter = commands.add_parser(
+        "exporter", help="poll gauges and serve their metrics to Prometheus"
+    )
+    exporter.add_argument(
+        "--gauge",
+        action="append",
+        required=True,
+        type=_gauge_spec,
+        metavar="PORT[,ADDRESS[,MODEL[,RATE]]]",
+        help="gauge to poll, e.g. /dev/ttyUSB0,1,VSR53DL,10 (repeatable)",
+    )
+    exporter.add_argument(
+        "--listen",
+        default="localhost:9853",
+        help="HOST:PORT of the HTTP endpoint (default %(default)s)",
+    )
+    exporter.add_argument(
+        "--refresh",
+        type=float,
+        default=1.0,
+        help="seconds between two renderings of the metrics (default %(default)s)",
+    )
+    exporter.add_argument(
+        "--info-interval",
+        type=float,
+        default=60.0,
+        help="seconds between two reads of operating hours and relays "
+        "(default %(default)s)",
+    )
+    exporter.set_defaults(handler=_exporter)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    args.handler(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Adaptive polling driven by the pressure dynamics
+
+The poll period of every gauge follows the rate of change of the logarithm of
+its pressure: a gauge whose pressure moves by decades per second (pump-down,
+venting) is polled every ``min_period``, a gauge sitting at base pressure backs
+off towards ``max_period``. Polls are scheduled earliest due first, so on a
+shared bus the bandwidth goes to the gauges that are changing.
+
+Readings are only reported when they pass a :class:`Deadband`: a relative or
+absolute change since the last reported value, a change of the error state, or
+a heartbeat after ``max_interval`` seconds without report.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import time
+
+from vsr53.bus import Reading, read_reading
+from vsr53.Commands import Commands as CMD
+
+
+class AdaptiveRate:
+    """
+    Poll period as a function of the log-pressure derivative
+    """
+
+    def __init__(
+        self,
+        min_period: float = 0.05,
+        max_period: float = 5.0,
+        *,
+        target_change: float = 0.01,
+        backoff: float = 1.5,
+    ):
+        """
+        :param min_period: shortest period in seconds, used while the pressure moves fast
+        :param max_period: longest period in seconds, reached while the pressure is stable
+        :param target_change: change of log10(pressure) aimed between two polls, 0.01 is 2.3 %
+        :param backoff: largest growth factor of the period from one poll to the next, the
+            period shrinks without limit as soon as the pressure moves
+        """
+        if not 0 < min_period <= max_period:
+            msg = (
+                f"expected 0 < min_period <= max_period, got {min_period}, {max_period}"
+            )
+            raise ValueError(msg)
+        self.min_period = min_period
+        self.max_period = max_period
+        self.target_change = target_change
+        self.backoff = backoff
+
+    def next_period(self, period: float, derivative: float | None) -> float:
+        """
+        :param period: current period in seconds
+        :param derivative: |d log10(pressure) / dt| in decades per second, None if unknown
+        :return: period until the next poll
+        """
+        if derivative is None:
+            return self.min_period
+        wanted = self.target_change / derivative if derivative > 0 else math.inf
+        wanted = min(wanted, period * self.backoff)
+        return min(max(wanted, self.min_period), self.max_period)
+
+
+class Deadband:
+    """
+    Filter of the readings worth reporting
+    """
+
+    def __init__(
+        self,
+        relative: float = 0.01,
+        absolute: float = 0.0,
+        max_interval: float | None = 60.0,
+    ):
+        """
+        :param relative: change relative to the last reported value that is reported
+        :param absolute: change in pressure units that is reported, whichever of the two
+            is larger applies; with both 0 every reading is reported
+        :param max_interval: report at least once per this many seconds, None never forces it
+        """
+        self.relative = relative
+        self.absolute = absolute
+        self.max_interval = max_interval
+
+    def passes(self, reading: Reading, last: Reading | None) -> bool:
+        """
+        :param reading: new reading
+        :param last: last reported reading of the same gauge, None if there is none
+        """
+        if last is None or (reading.error is None) != (last.error is None):
+            return True
+        if not self.relative and not self.absolute:
+            return True
+        if (
+            self.max_interval is not None
+            and reading.timestamp - last.timestamp >= self.max_interval
+        ):
+            return True
+        if reading.error is not None:
+            return reading.error != last.error
+        band = max(self.absolute, self.relative * abs(last.value))
+        return abs(reading.value - last.value) > band
+
+
+class _GaugeState:
+    __slots__ = ("gauge", "last_log", "last_time", "period", "reported")
+
+    def __init__(self, gauge, period):
+        self.gauge = gauge
+        self.period = period
+        self.last_log = None
+        self.last_time = None
+        self.reported = None
+
+
+class AdaptivePoller:
+    """
+    Polls one or many gauges (e.g. the BusGauges of a VSR53Bus) at adaptive rates
+
+    Usage::
+
+        with VSR53Bus("/dev/ttyUSB0") as bus:
+            poller = AdaptivePoller([bus.gauge(1), bus.gauge(2)])
+            for reading in poller.updates():
+                print(reading.address, reading.value)
+    """
+
+    def __init__(
+        self,
+        gauges,
+        *,
+        cmd: str = CMD.Measurement_Value,
+        rate: AdaptiveRate | None = None,
+        deadband: Deadband | None = None,
+    ):
+        """
+        :param gauges: gauges to poll, they must not be used from other threads meanwhile
+        :param cmd: measurement command to read
+        :param rate: poll period policy, AdaptiveRate() by default
+        :param deadband: reporting filter, Deadband() by default; Deadband(0) reports every
+            reading
+        """
+        self.cmd = cmd
+        self.rate = rate or AdaptiveRate()
+        self.deadband = deadband or Deadband()
+        self._states = [_GaugeState(gauge, self.rate.min_period) for gauge in gauges]
+        self.polls = 0
+
+    def periods(self) -> dict:
+        """
+        :return: {address: current poll period in seconds}
+        """
+        return {state.gauge._address: state.period for state in self._states}
+
+    def updates(self, *, duration: float | None = None, stop=None):
+        """
+        Generator of the readings that pass the deadband
+        :param duration: stop after this many seconds, None polls forever
+        :param stop: threading.Event that stops the polling when set
+        """
+        now = time.monotonic()
+        end = None if duration is None else now + duration
+        schedule = [(now, index) for index in range(len(self._states))]
+        while schedule:
+            due, index = schedule[0]
+            if end is not None and due >= end:
+                return
+            delay = due - time.monotonic()
+            if stop is not None:
+                if stop.wait(max(0.0, delay)):
+                    return
+            elif delay > 0:
+                time.sleep(delay)
+            state = self._states[index]
+            reading = read_reading(state.gauge, self.cmd)
+            self.polls += 1
+            now = time.monotonic()
+            self._update_period(state, reading, now)
+            heapq.heapreplace(schedule, (now + state.period, index))
+            if self.deadband.passes(reading, state.reported):
+                state.reported = reading
+                yield reading
+
+    def _update_period(self, state, reading, now):
+        if reading.error is not None:
+            # keep the current period until the gauge answers again
+            return
+        if reading.value <= 0:
+            state.last_log = None
+            state.period = self.rate.next_period(state.period, None)
+            return
+        log_value = math.log10(reading.value)
+        derivative = None
+        if state.last_log is not None and now > state.last_time:
+            derivative = abs(log_value - state.last_log) / (now - state.last_time)
+        state.last_log = log_value
+        state.last_time = now
+        state.period = self.rate.next_period(state.period, derivative)
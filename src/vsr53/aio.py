@@ -0,0 +1,331 @@
+"""
+asyncio client for the VSR53 gauges
+
+The serial port is configured by pyserial but read without blocking through
+the event loop: on POSIX ports the file descriptor is watched with
+``loop.add_reader``, ports without a file descriptor (e.g. ``vsr53sim://``)
+are polled. Many gauges can then be driven by a single event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+
+import serial
+
+from vsr53 import ErrorMessages
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import FrameParser, answer_timeout, read_request, write_request
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import (
+    VSR53ChecksumError,
+    VSR53FramingError,
+    VSR53TimeoutError,
+)
+from vsr53.logger import log
+from vsr53.parsers import DATA_PARSERS, decode_answer
+from vsr53.vsr53 import READ_METHODS, VSR53, WRITE_METHODS, rs485_serial
+
+# Polling period for ports without a file descriptor
+_POLL_INTERVAL = 0.001
+
+
+class AsyncVSR53:
+    """
+    Base class of the asyncio clients, getters and setters mirror vsr53.VSR53 as coroutines
+
+    Every transaction is bounded by ``timeout`` (per attempt) and ``retries``. Cancelling a
+    call, e.g. with asyncio.wait_for, is safe: the input is flushed and late answers to the
+    cancelled request are discarded.
+    """
+
+    def __init__(
+        self,
+        serial_port,
+        *,
+        address: int = 1,
+        response_delay: int = 5500,
+        timeout: float | None = None,
+        retries: int = 2,
+    ):
+        """
+        :param serial_port: configured but not opened pyserial port
+        :param address: Defined by the address switch mounted in the device from 1 to 16
+        :param response_delay: response delay configured in the device in μs
+        :param timeout: deadline of each attempt in seconds, by default derived from the
+            baud rate and the response delay like the port timeout of vsr53.VSR53
+        :param retries: attempts after the first one before the last error is raised
+        """
+        self._serial = serial_port
+        self._address = address
+        self._response_delay = response_delay
+        self._timeout = timeout
+        self.retries = retries
+        self._fd = None
+        self._parser = FrameParser(address)
+        self._data_ready = None
+        self._lock = None
+        self._dirty = False
+
+    @property
+    def timeout(self) -> float:
+        """
+        Deadline of each attempt in seconds
+        """
+        if self._timeout is not None:
+            return self._timeout
+        # the whole answer, as the two reads of vsr53.VSR53._receive_message
+        return 2 * answer_timeout(self._serial.baudrate, self._response_delay)
+
+    @timeout.setter
+    def timeout(self, timeout: float | None):
+        self._timeout = timeout
+
+    async def open_communication(self):
+        # created here so they belong to the running loop
+        self._data_ready = asyncio.Event()
+        self._lock = asyncio.Lock()
+        if not self._serial.is_open:
+            log.info("Port closed, trying to open...")
+            self._serial.open()
+        try:
+            self._fd = self._serial.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            self._fd = None
+        if self._fd is not None:
+            os.set_blocking(self._fd, False)
+            asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+        self._serial.reset_input_buffer()
+        log.info("Port is Open!")
+
+    async def close_communication(self):
+        """
+        Closes communication with serial device
+        :return: None
+        """
+        if self._fd is not None:
+            asyncio.get_running_loop().remove_reader(self._fd)
+            self._fd = None
+        self._serial.close()
+        log.info("Closing communication with device")
+
+    async def __aenter__(self):
+        await self.open_communication()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_communication()
+
+    def _on_readable(self):
+        try:
+            data = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            log.error("Error reading from serial port: %s", e)
+            asyncio.get_running_loop().remove_reader(self._fd)
+            return
+        if data:
+            self._parser.feed(data)
+            self._data_ready.set()
+
+    async def _wait_for_data(self):
+        if self._fd is not None:
+            self._data_ready.clear()
+            await self._data_ready.wait()
+            return
+        await asyncio.sleep(_POLL_INTERVAL)
+        waiting = self._serial.in_waiting
+        if waiting:
+            self._parser.feed(self._serial.read(waiting))
+
+    def _discard_input(self):
+        self._parser.clear()
+        if self._serial.is_open:
+            self._serial.reset_input_buffer()
+
+    async def _receive_message(self, request):
+        """
+        Waits for the answer to ``request``. Noise is skipped, frames of other devices or
+        answering something else (late answers of cancelled requests) are dropped and a
+        frame failing its checksum raises VSR53ChecksumError.
+        """
+        parser = self._parser
+        while True:
+            try:
+                message = parser.next_frame()
+            except VSR53ChecksumError:
+                raise
+            except VSR53FramingError as e:
+                log.warning("%s", e)
+                continue
+            if message is None:
+                await self._wait_for_data()
+                continue
+            log.debug("RXin' this: %r", message)
+            if message[4:6] == request[4:6]:
+                return message
+            log.debug("Dropping unexpected frame %r", message)
+
+    async def _instruction_exchange(self, request):
+        async with self._lock:
+            if self._dirty:
+                self._discard_input()
+                self._dirty = False
+            try:
+                for attempt in range(1, self.retries + 2):
+                    log.debug("TXin' this: %r", request)
+                    self._serial.write(request)
+                    try:
+                        message = await asyncio.wait_for(
+                            self._receive_message(request), self.timeout
+                        )
+                        break
+                    except asyncio.TimeoutError:
+                        error = VSR53TimeoutError(
+                            f"Timeout waiting for a valid answer of device {self._address}"
+                        )
+                    except VSR53ChecksumError as e:
+                        error = e
+                    if attempt > self.retries:
+                        raise error
+                    log.warning("BAD TRANSACTION (attempt %d): %s", attempt, error)
+                    self._discard_input()
+            except BaseException:
+                # cancelled or failed half way, whatever arrives later is stale
+                self._dirty = True
+                self._discard_input()
+                raise
+        pack = decode_answer(message)
+        if pack.access_code == AC.ERR_RX:
+            log.error("%s", ErrorMessages.MSG.get(pack.data, pack.data))
+        return pack
+
+    async def _read_value(self, cmd):
+        """
+        Reads ``cmd`` and converts its data with the parser of the command, the data of
+        commands without parser is returned as str
+        :raises ValueError: the device answered an error
+        """
+        pack = await self._instruction_exchange(read_request(self._address, cmd))
+        parser = DATA_PARSERS.get(cmd)
+        return pack.data if parser is None else parser(pack.raw)
+
+    async def _write_data_transaction(self, cmd, data=None):
+        return await self._instruction_exchange(write_request(self._address, cmd, data))
+
+    async def set_baud_rate(self, baud_rate):
+        """
+        Set the baud rate for data transmission, the host port follows once the device accepts it
+        :param baud_rate: Value possibilities: 9600, 14400, 19200, 28800, 38400, 57600, 115200 Bd
+        :return:None
+        """
+        log.info("Setting baud rate to %s", baud_rate)
+        pack = await self._write_data_transaction(CMD.Baud_Rate, baud_rate)
+        if pack.access_code == AC.WR_RX:
+            # the device answers at the old rate and switches afterwards
+            self._serial.baudrate = int(baud_rate)
+
+    async def set_response_delay(self, response_delay):
+        """
+        Set the time delay between receiving a telegram and sending the answer.
+        :param response_delay: Value range: 1 ... 99999 μs (default 5500 μs)
+        :return:
+        """
+        log.info("Setting response delay to: %s", response_delay)
+        pack = await self._write_data_transaction(CMD.Response_Delay, response_delay)
+        if pack.access_code == AC.WR_RX:
+            self._response_delay = float(response_delay)
+
+    async def restart_device(self):
+        """
+        Makes device restart
+        :return: None
+        """
+        log.info("Restarting device")
+        await self._write_data_transaction(CMD.Device_Restart)
+
+
+def _getter(name, cmd):
+    async def getter(self):
+        value = await self._read_value(cmd)
+        log.info("%s: %s", name[4:].replace("_", " ").capitalize(), value)
+        return value
+
+    return _async_method(name, getter)
+
+
+def _setter(name, cmd):
+    async def setter(self, data):
+        log.info("Setting %s to %s", name[4:].replace("_", " "), data)
+        await self._write_data_transaction(cmd, data)
+
+    return _async_method(name, setter)
+
+
+def _async_method(name, method):
+    method.__name__ = name
+    method.__qualname__ = f"AsyncVSR53.{name}"
+    method.__doc__ = getattr(VSR53, name).__doc__
+    return method
+
+
+for _name, _cmd in READ_METHODS.items():
+    setattr(AsyncVSR53, _name, _getter(_name, _cmd))
+for _name, _cmd in WRITE_METHODS.items():
+    setattr(AsyncVSR53, _name, _setter(_name, _cmd))
+
+
+class AsyncVSR53DL(AsyncVSR53):
+    """
+    asyncio counterpart of vsr53.VSR53DL
+    """
+
+    def __init__(
+        self,
+        port: str,
+        *,
+        address: int = 1,
+        baudrate: int = 9600,
+        response_delay: int = 5500,
+        timeout: float | None = None,
+        retries: int = 2,
+    ):
+        super().__init__(
+            rs485_serial(port, baudrate),
+            address=address,
+            response_delay=response_delay,
+            timeout=timeout,
+            retries=retries,
+        )
+
+
+class AsyncVSR53USB(AsyncVSR53):
+    """
+    asyncio counterpart of vsr53.VSR53USB
+    """
+
+    def __init__(
+        self,
+        port: str,
+        *,
+        address: int = 1,
+        baudrate: int = 9600,
+        response_delay: int = 5500,
+        timeout: float | None = None,
+        retries: int = 2,
+    ):
+        serial_port = serial.serial_for_url(port, do_not_open=True)
+        serial_port.baudrate = baudrate
+        serial_port.parity = serial.PARITY_NONE
+        serial_port.stopbits = serial.STOPBITS_ONE
+        serial_port.bytesize = serial.EIGHTBITS
+        super().__init__(
+            serial_port,
+            address=address,
+            response_delay=response_delay,
+            timeout=timeout,
+            retries=retries,
+        )
@@ -0,0 +1,292 @@
+"""
+Multi-drop RS485 bus shared by several addressed VSR53DL gauges
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import NamedTuple
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import answer_timeout
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+from vsr53.parsers import MEASUREMENT_COMMANDS
+from vsr53.vsr53 import VSR53, rs485_serial
+
+
+class Reading(NamedTuple):
+    address: int
+    command: str
+    value: object
+    timestamp: float
+    error: str | None = None
+
+
+class AddressStatistics:
+    """
+    Transaction counters of a single address on the bus
+    """
+
+    def __init__(self):
+        self.transactions = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.first = None
+        self.last = None
+
+    @property
+    def throughput(self) -> float:
+        """
+        Successful transactions per second since the first one
+        """
+        if self.first is None or self.last is None or self.last <= self.first:
+            return 0.0
+        return (self.transactions - self.errors) / (self.last - self.first)
+
+    def __repr__(self):
+        return (
+            f"AddressStatistics(transactions={self.transactions}, errors={self.errors}, "
+            f"throughput={self.throughput:.1f}/s)"
+        )
+
+
+class BusGauge(VSR53):
+    """
+    Handle of a gauge on a VSR53Bus, it shares the bus serial port and never opens or closes it
+    """
+
+    def __init__(self, bus: VSR53Bus, address: int, *, priority: int = 1):
+        self._bus = bus
+        self._serial = bus._serial
+        self._address = address
+        self._max_retries = bus.retries
+        self._response_delay = bus.response_delay
+        self.priority = priority
+        self.statistics = AddressStatistics()
+
+    @property
+    def address(self) -> int:
+        return self._address
+
+    def open_communication(self):
+        self._bus.open()
+
+    def _update_timeout(self):
+        # the bus timeout must cover the slowest gauge
+        self._bus.response_delay = max(
+            gauge._response_delay for gauge in self._bus.gauges.values()
+        )
+
+    def _set_host_baudrate(self, baudrate):
+        # the other gauges on the bus have to be switched to the same rate
+        self._bus.baudrate = baudrate
+
+    def close_communication(self):
+        pass
+
+    def _instruction_exchange(self, request):
+        statistics = self.statistics
+        with self._bus._lock:
+            start = time.monotonic()
+            if statistics.first is None:
+                statistics.first = start
+            statistics.transactions += 1
+            try:
+                pack = super()._instruction_exchange(request)
+            except Exception:
+                statistics.errors += 1
+                raise
+            finally:
+                statistics.last = time.monotonic()
+                statistics.busy_time += statistics.last - start
+        if pack.access_code == AC.ERR_RX:
+            statistics.errors += 1
+        return pack
+
+
+class VSR53Bus:
+    """
+    Owner of an RS485 port with several VSR53DL gauges, each one with its own address
+
+    Usage::
+
+        with VSR53Bus("/dev/ttyUSB0") as bus:
+            chamber = bus.gauge(1)
+            pump = bus.gauge(2, priority=3)
+            for reading in bus.poll(cycles=100):
+                print(reading.address, reading.value)
+    """
+
+    def __init__(
+        self,
+        port: str,
+        *,
+        baudrate: int = 9600,
+        response_delay: int = 5500,
+        retries: int = 2,
+    ):
+        """
+        :param port: device label assigned by the operating system, or a pyserial URL
+        :param baudrate: Baud rate for data transmission, the same for all gauges
+        :param response_delay: largest response delay configured in the gauges, in μs
+        :param retries: attempts per transaction after the first one, so a silent gauge
+            cannot stall the bus
+        """
+        self._serial = rs485_serial(port, baudrate)
+        self._lock = threading.RLock()
+        self._gauges = {}
+        self.retries = retries
+        self._response_delay = response_delay
+        self._update_timeout()
+
+    def _update_timeout(self):
+        self._serial.timeout = answer_timeout(
+            self._serial.baudrate, self._response_delay
+        )
+
+    @property
+    def response_delay(self) -> float:
+        return self._response_delay
+
+    @response_delay.setter
+    def response_delay(self, response_delay: float):
+        with self._lock:
+            self._response_delay = response_delay
+            self._update_timeout()
+
+    @property
+    def baudrate(self) -> int:
+        return self._serial.baudrate
+
+    @baudrate.setter
+    def baudrate(self, baudrate: int):
+        with self._lock:
+            self._serial.baudrate = baudrate
+            self._update_timeout()
+
+    def gauge(self, address: int, *, priority: int = 1) -> BusGauge:
+        """
+        Adds a gauge to the bus, or returns the existing handle for that address
+        :param address: Defined by the address switch mounted in the device from 1 to 16
+        :param priority: relative polling weight used by the "priority" schedule
+        :return: gauge
+        """
+        if not 1 <= address <= 16:
+            msg = f"address must be between 1 and 16, got {address}"
+            raise ValueError(msg)
+        if priority < 1:
+            msg = f"priority must be a positive integer, got {priority}"
+            raise ValueError(msg)
+        if address not in self._gauges:
+            self._gauges[address] = BusGauge(self, address, priority=priority)
+        return self._gauges[address]
+
+    @property
+    def gauges(self) -> dict:
+        return dict(self._gauges)
+
+    def remove(self, address: int):
+        self._gauges.pop(address)
+
+    def statistics(self) -> dict:
+        """
+        :return: AddressStatistics per address
+        """
+        return {address: gauge.statistics for address, gauge in self._gauges.items()}
+
+    def open(self):
+        with self._lock:
+            if not self._serial.is_open:
+                log.info("Opening RS485 bus")
+                self._serial.open()
+
+    def close(self):
+        with self._lock:
+            if self._serial.is_open:
+                self._serial.flush()
+                self._serial.close()
+                log.info("Closing RS485 bus")
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def schedule(self, schedule: str = "round_robin"):
+        """
+        Endless sequence of addresses to poll
+        :param schedule: "round_robin" polls every gauge in turn, "priority" polls each gauge
+            proportionally to its priority, spreading the polls evenly over time
+        """
+        if schedule not in ("round_robin", "priority"):
+            msg = f"unknown schedule {schedule!r}"
+            raise ValueError(msg)
+        current = {}
+        while self._gauges:
+            gauges = list(self._gauges.values())
+            if schedule == "round_robin":
+                yield from (gauge.address for gauge in gauges)
+                continue
+            # smooth weighted round-robin
+            total = 0
+            for gauge in gauges:
+                current[gauge.address] = current.get(gauge.address, 0) + gauge.priority
+                total += gauge.priority
+            selected = max(gauges, key=lambda gauge: current[gauge.address])
+            current[selected.address] -= total
+            yield selected.address
+
+    def poll(
+        self,
+        cmd: str = CMD.Measurement_Value,
+        *,
+        schedule: str = "round_robin",
+        cycles: int | None = None,
+    ):
+        """
+        Polls the gauges back to back, as fast as their answers arrive
+        :param cmd: command to read, measurement values are converted to float
+        :param schedule: see VSR53Bus.schedule
+        :param cycles: number of readings to produce, None polls forever
+        :return: generator of Reading
+        """
+        count = 0
+        for address in self.schedule(schedule):
+            if cycles is not None and count >= cycles:
+                return
+            count += 1
+            gauge = self._gauges.get(address)
+            if gauge is None:
+                continue
+            yield self._read(gauge, cmd)
+
+    def _read(self, gauge: BusGauge, cmd: str) -> Reading:
+        return read_reading(gauge, cmd)
+
+
+def read_reading(gauge: VSR53, cmd: str) -> Reading:
+    """
+    Reads one command, failures are reported in the reading instead of raised
+    :param cmd: command to read, measurement values are converted to float
+    :return: reading
+    """
+    address = gauge._address
+    try:
+        pack = gauge._instruction_exchange(gauge._read_request(cmd))
+    except VSR53Error as e:
+        return Reading(address, cmd, None, time.time(), str(e))
+    timestamp = time.time()
+    if pack.access_code == AC.ERR_RX:
+        return Reading(address, cmd, None, timestamp, pack.data)
+    value = pack.data
+    if cmd in MEASUREMENT_COMMANDS:
+        try:
+            value = gauge._measurement_value(pack)
+        except (ValueError, VSR53Error):
+            return Reading(address, cmd, None, timestamp, repr(value))
+    return Reading(address, cmd, value, timestamp)
@@ -0,0 +1,116 @@
+"""
+Session cache of read answers
+
+Identification and configuration reads return the same answer until the gauge
+is written to or restarted. A :class:`ResponseCache` attached to a gauge
+(``gauge.enable_cache()``) answers them locally for their time to live; every
+write invalidates the written command and a restart clears the cache. Only
+the commands listed in the TTL table are cached, measurements never are.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from vsr53.Commands import Commands as CMD
+
+# Identification strings, fixed in the device: cached for the whole session
+STATIC_COMMANDS = (
+    CMD.Type_Device,
+    CMD.Product_Name,
+    CMD.Serial_Number_Device,
+    CMD.Serial_Number_Head,
+    CMD.Version_Device,
+    CMD.Version_Firmware,
+    CMD.Version_Bootloader,
+    CMD.Measurement_Range,
+)
+
+# Settings that can also be changed from the device keypad or by another host
+CONFIG_COMMANDS = (
+    CMD.Response_Delay,
+    CMD.Display_Unit,
+    CMD.Display_Orientation,
+    CMD.Display_Data_Source,
+    CMD.Relay_1,
+    CMD.Relay_2,
+    CMD.Relay_3,
+    CMD.Relay_4,
+    CMD.Sensor_Transition,
+    CMD.Gas_Correction_Factor_1,
+    CMD.Gas_Correction_Factor_3,
+    CMD.Gas_Correction_Factor_4,
+    CMD.Analog_Output_Characteristic,
+)
+
+CONFIG_TTL = 60.0  # seconds
+
+
+def default_ttls(config_ttl: float | None = CONFIG_TTL) -> dict:
+    """
+    :param config_ttl: time to live of configuration reads in seconds, None for the session
+    :return: {command: ttl in seconds or None for the whole session}
+    """
+    ttls = dict.fromkeys(STATIC_COMMANDS)
+    ttls.update(dict.fromkeys(CONFIG_COMMANDS, config_ttl))
+    return ttls
+
+
+class ResponseCache:
+    """
+    Data of the last answer per command, with an expiry time
+    """
+
+    def __init__(self, ttls: dict | None = None):
+        """
+        :param ttls: {command: ttl in seconds or None}, commands missing are never cached;
+            default_ttls() by default
+        """
+        self.ttls = default_ttls() if ttls is None else dict(ttls)
+        self._entries = {}  # command -> (data, expiry or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cmd: str):
+        """
+        :return: cached data, None when missing or expired
+        """
+        entry = self._entries.get(cmd)
+        if entry is not None:
+            data, expiry = entry
+            if expiry is None or time.monotonic() < expiry:
+                self.hits += 1
+                return data
+            with self._lock:
+                self._entries.pop(cmd, None)
+        if cmd in self.ttls:
+            self.misses += 1
+        return None
+
+    def put(self, cmd: str, data):
+        if cmd not in self.ttls:
+            return
+        ttl = self.ttls[cmd]
+        expiry = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[cmd] = (data, expiry)
+
+    def invalidate(self, *commands: str):
+        """
+        Forgets the given commands, or everything without arguments, the next reads go
+        to the device
+        """
+        with self._lock:
+            if not commands:
+                self._entries.clear()
+            for cmd in commands:
+                self._entries.pop(cmd, None)
+
+    def __contains__(self, cmd: str) -> bool:
+        entry = self._entries.get(cmd)
+        return entry is not None and (entry[1] is None or time.monotonic() < entry[1])
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,222 @@
+"""
+Traffic capture and replay
+
+:class:`CaptureSerial` wraps the serial port of a gauge and logs every chunk
+written (TX) and read (RX), with its time, to a compact capture file. The
+``vsr53replay://`` URL serves a capture back to an unmodified gauge: every
+request is matched against the next recorded TX and answered with the RX bytes
+recorded after it, either at once or with the recorded delays::
+
+    with VSR53DL("/dev/ttyUSB0") as gauge, capture(gauge, "incident.cap"):
+        ...
+
+    with VSR53DL("vsr53replay://incident.cap?timing=1") as gauge:
+        ...  # same calls, same answers
+
+URL options: ``timing`` (0/1, replay the recorded delays, default 0) and
+``loop`` (0/1, start over at the end of the capture, default 0).
+
+File format: ``VSR53CAP``, format version (uint16), wall clock time of the
+start (float64), then records of seconds since the start (float64), direction
+(uint8, 0 for TX and 1 for RX), length (uint32) and the bytes, little endian.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+import urllib.parse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple
+
+from serial.serialutil import PortNotOpenError, SerialException, to_bytes
+
+from vsr53.logger import log
+from vsr53.simulator import SimulatedSerial
+
+MAGIC = b"VSR53CAP"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sHd")
+RECORD_HEADER = struct.Struct("<dBI")
+TX = 0
+RX = 1
+
+
+class CaptureRecord(NamedTuple):
+    timestamp: float  # seconds since the start of the capture
+    direction: int  # TX or RX
+    data: bytes
+
+
+def read_capture(path: str | os.PathLike):
+    """
+    :return: wall clock time of the start, list of CaptureRecord
+    """
+    content = Path(path).read_bytes()
+    if len(content) < PREAMBLE.size:
+        msg = f"{path} is not a capture file"
+        raise ValueError(msg)
+    magic, version, started = PREAMBLE.unpack_from(content)
+    if magic != MAGIC:
+        msg = f"{path} is not a capture file (magic {magic!r})"
+        raise ValueError(msg)
+    if version != VERSION:
+        msg = f"Unsupported capture version {version}"
+        raise ValueError(msg)
+    records = []
+    offset = PREAMBLE.size
+    while offset + RECORD_HEADER.size <= len(content):
+        timestamp, direction, length = RECORD_HEADER.unpack_from(content, offset)
+        offset += RECORD_HEADER.size
+        data = content[offset : offset + length]
+        if len(data) < length:
+            # the capture was interrupted in the middle of a record
+            break
+        records.append(CaptureRecord(timestamp, direction, data))
+        offset += length
+    return started, records
+
+
+def rx_bytes(path: str | os.PathLike) -> bytes:
+    """
+    Concatenation of the received bytes, e.g. for vsr53.decoder.decode
+    """
+    return b"".join(
+        record.data for record in read_capture(path)[1] if record.direction == RX
+    )
+
+
+class CaptureSerial:
+    """
+    Serial port wrapper that logs the traffic, everything else is forwarded to the port
+    """
+
+    _own = frozenset(("_port", "_file", "_started"))
+
+    def __init__(self, serial_port, path: str | os.PathLike):
+        object.__setattr__(self, "_port", serial_port)
+        # stays open for the life of the wrapper, closed by close_capture()
+        object.__setattr__(self, "_file", Path(path).open("wb"))  # noqa: SIM115
+        object.__setattr__(self, "_started", time.monotonic())
+        self._file.write(PREAMBLE.pack(MAGIC, VERSION, time.time()))
+
+    def __getattr__(self, name):
+        return getattr(self._port, name)
+
+    def __setattr__(self, name, value):
+        if name in self._own:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._port, name, value)
+
+    def _record(self, direction, data):
+        if data and not self._file.closed:
+            self._file.write(
+                RECORD_HEADER.pack(
+                    time.monotonic() - self._started, direction, len(data)
+                )
+            )
+            self._file.write(data)
+
+    def write(self, data):
+        data = to_bytes(data)
+        self._record(TX, data)
+        return self._port.write(data)
+
+    def read(self, size=1):
+        data = self._port.read(size)
+        self._record(RX, data)
+        return data
+
+    def close_capture(self):
+        self._file.close()
+
+
+@contextmanager
+def capture(gauge, path: str | os.PathLike):
+    """
+    Captures the traffic of a gauge to ``path`` within the block
+    :return: the CaptureSerial in use
+    """
+    port = gauge._serial
+    wrapper = CaptureSerial(port, path)
+    gauge._serial = wrapper
+    try:
+        yield wrapper
+    finally:
+        gauge._serial = port
+        wrapper.close_capture()
+
+
+class ReplaySerial(SimulatedSerial):
+    """
+    pyserial port answering requests with the RX bytes of a capture
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.records = None
+        self.timing = False
+        self.loop = False
+        self._cursor = 0
+        self._written = b""
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            msg = "Port is already open."
+            raise SerialException(msg)
+        if self._port is None:
+            msg = "Port must be configured before it can be used."
+            raise SerialException(msg)
+        parts = urllib.parse.urlsplit(self._port)
+        if parts.scheme != "vsr53replay":
+            msg = f"expected a vsr53replay:// URL, got {self._port!r}"
+            raise SerialException(msg)
+        options = urllib.parse.parse_qs(parts.query)
+        self.timing = options.get("timing", ["0"])[0] not in ("0", "false")
+        self.loop = options.get("loop", ["0"])[0] not in ("0", "false")
+        try:
+            _, self.records = read_capture(parts.netloc + parts.path)
+        except (OSError, ValueError) as e:
+            msg = f"could not open capture {self._port!r}: {e}"
+            raise SerialException(msg) from e
+        self._cursor = 0
+        self._written = b""
+        self.is_open = True
+        self.reset_input_buffer()
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = to_bytes(data)
+        now = time.monotonic()
+        self._written += data
+        while b"\r" in self._written:
+            request, self._written = self._written.split(b"\r", 1)
+            self._answer(request + b"\r", now)
+        return len(data)
+
+    def _find(self, request, start, stop):
+        for index in range(start, stop):
+            record = self.records[index]
+            if record.direction == TX and record.data == request:
+                return index
+        return None
+
+    def _answer(self, request, now):
+        index = self._find(request, self._cursor, len(self.records))
+        if index is None and self.loop:
+            index = self._find(request, 0, self._cursor)
+        if index is None:
+            log.warning("Request %r is not in the capture, no answer", request)
+            return
+        sent = self.records[index].timestamp
+        index += 1
+        while index < len(self.records) and self.records[index].direction == RX:
+            record = self.records[index]
+            start = now + (record.timestamp - sent) if self.timing else now
+            self._pending.append([record.data, start, 0.0])
+            index += 1
+        self._cursor = index
@@ -0,0 +1,246 @@
+"""
+Thyracont Communication Protocol frame encoding
+
+A frame is composed of the address (3 bytes), the access code (1 byte), the
+command (2 bytes), the data length (2 bytes), the data (N bytes), the checksum
+(1 byte) and a carriage return.
+"""
+
+from __future__ import annotations
+
+import struct
+from functools import lru_cache
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.exceptions import (
+    VSR53AddressError,
+    VSR53ChecksumError,
+    VSR53FramingError,
+    VSR53ProtocolError,
+)
+
+CR = 13
+HEADER_LENGTH = 8  # address, access code, command and data length
+MAX_FRAME_LENGTH = HEADER_LENGTH + 99 + 2
+# Slack on top of the physical minimum, covers OS scheduling and USB-serial latency
+TIMEOUT_MARGIN = 0.02
+_DIGITS = frozenset(b"0123456789")
+_LETTERS = frozenset(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+# Baud rates supported by the gauges, ascending
+BAUD_RATES = (9600, 14400, 19200, 28800, 38400, 57600, 115200)
+# Data of binary (BIN_RX) measurement answers: IEEE 754 single precision, big endian
+BINARY_VALUE = struct.Struct(">f")
+
+
+def checksum(body: bytes) -> int:
+    """
+    Checksum of a frame body: the sum of its bytes modulo 64, plus 64
+    """
+    return sum(body) % 64 + 64
+
+
+def transmission_time(n_bytes: int, baudrate: int) -> float:
+    """
+    Time on the wire for ``n_bytes`` with 8N1 framing (10 bits per byte)
+    """
+    return 10.0 * n_bytes / baudrate
+
+
+def answer_timeout(baudrate: int, response_delay: float) -> float:
+    """
+    Bound of the time to receive either part of an answer (header, then data, checksum
+    and carriage return) after the request is written
+    :param baudrate: Baud rate for data transmission
+    :param response_delay: response delay configured in the device, in μs
+    :return: timeout in seconds
+    """
+    return (
+        transmission_time(MAX_FRAME_LENGTH + HEADER_LENGTH, baudrate)
+        + response_delay * 1e-6
+        + TIMEOUT_MARGIN
+    )
+
+
+def parse_header(header: bytes):
+    """
+    :param header: first HEADER_LENGTH bytes of a frame
+    :return: address, access_code, cmd, data_length
+    """
+    if not (header[:4].isdigit() and header[6:8].isdigit()):
+        msg = f"Malformed frame header {header!r}"
+        raise VSR53ProtocolError(msg)
+    return (
+        int(header[:3]),
+        header[3] - 48,
+        header[4:6].decode("latin-1"),
+        int(header[6:8]),
+    )
+
+
+def encode_frame(address: int, access_code: int, cmd: str, data: bytes = b"") -> bytes:
+    """
+    Encodes a complete frame, checksum and carriage return included
+    :return: frame
+    """
+    if len(data) > 99:
+        msg = f"data is too long for a single frame ({len(data)} > 99 bytes)"
+        raise ValueError(msg)
+    body = b"%03d%d%s%02d%s" % (
+        address,
+        access_code,
+        cmd.encode("ascii"),
+        len(data),
+        data,
+    )
+    return body + bytes((checksum(body), CR))
+
+
+def encode_data(data) -> bytes:
+    """
+    Encodes a data value as sent on the wire, None means no data
+    """
+    if data is None:
+        return b""
+    if isinstance(data, bytes):
+        return data
+    return str(data).encode("ascii")
+
+
+def encode_binary_value(value: float) -> bytes:
+    return BINARY_VALUE.pack(value)
+
+
+def decode_binary_value(data: bytes) -> float:
+    """
+    :param data: data field of a BIN_RX answer
+    :return: value
+    """
+    if len(data) != BINARY_VALUE.size:
+        msg = f"Binary value must be {BINARY_VALUE.size} bytes, got {data!r}"
+        raise VSR53ProtocolError(msg)
+    return BINARY_VALUE.unpack(data)[0]
+
+
+@lru_cache(maxsize=None)
+def read_request(address: int, cmd: str, access_code: int = AC.RD_TX) -> bytes:
+    """
+    Read requests only depend on address and command, so their frames are built once
+    :return: frame
+    """
+    return encode_frame(address, access_code, cmd)
+
+
+def write_request(address: int, cmd: str, data=None) -> bytes:
+    """
+    :param data: value to write, converted with str() unless it already is bytes
+    :return: frame
+    """
+    return encode_frame(address, AC.WR_TX, cmd, encode_data(data))
+
+
+def _is_header(buffer, start: int) -> bool:
+    # digits for the address, access code and length, then a command such as MV or M1
+    return (
+        buffer[start] in _DIGITS
+        and buffer[start + 1] in _DIGITS
+        and buffer[start + 2] in _DIGITS
+        and buffer[start + 3] in _DIGITS
+        and buffer[start + 4] in _LETTERS
+        and (buffer[start + 5] in _LETTERS or buffer[start + 5] in _DIGITS)
+        and buffer[start + 6] in _DIGITS
+        and buffer[start + 7] in _DIGITS
+    )
+
+
+class FrameParser:
+    """
+    Incremental frame parser for a byte stream received in arbitrary chunks
+
+    Frames are delimited by their header and declared length, so binary data may
+    hold carriage returns. Bytes that cannot start a frame are skipped one at a
+    time until a plausible header is found, which resynchronizes on the next
+    frame without losing it.
+
+    Usage::
+
+        parser = FrameParser(address=1)
+        parser.feed(chunk)
+        frame = parser.next_frame()  # None until a complete frame is buffered
+    """
+
+    def __init__(self, address: int | None = None):
+        """
+        :param address: only frames of this device are returned, any device if None
+        """
+        self.address = address
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes):
+        self._buffer += data
+
+    def clear(self):
+        self._buffer.clear()
+
+    def __len__(self):
+        """
+        Number of bytes buffered and not parsed yet
+        """
+        return len(self._buffer)
+
+    @property
+    def needed(self) -> int:
+        """
+        Number of bytes missing to complete the frame being received, at least 1
+        """
+        buffer = self._buffer
+        if len(buffer) < HEADER_LENGTH:
+            return HEADER_LENGTH - len(buffer)
+        if not _is_header(buffer, 0):
+            return 1
+        return max(1, HEADER_LENGTH + int(buffer[6:8]) + 2 - len(buffer))
+
+    def next_frame(self) -> bytes | None:
+        """
+        Every error consumes the offending bytes, the parsing goes on with the next call
+        :return: the next valid frame, carriage return included, or None if more bytes
+            are needed
+        :raises VSR53FramingError: bytes were skipped to resynchronize
+        :raises VSR53ChecksumError: a frame with a wrong checksum was dropped
+        :raises VSR53AddressError: a frame of another device was dropped
+        """
+        buffer = self._buffer
+        size = len(buffer)
+        start = 0
+        while True:
+            if size - start < HEADER_LENGTH:
+                if start:
+                    # what is left may still be the beginning of a header
+                    self._skip(start)
+                return None
+            if not _is_header(buffer, start):
+                start += 1
+                continue
+            if start:
+                self._skip(start)
+            end = HEADER_LENGTH + int(buffer[6:8]) + 2
+            if size < end:
+                return None
+            if buffer[end - 1] != CR:
+                # not a frame, the header was made of data or noise
+                start = 1
+                continue
+            frame = bytes(buffer[:end])
+            del buffer[:end]
+            if frame[-2] != checksum(frame[:-2]):
+                msg = f"Checksum mismatch in {frame!r}"
+                raise VSR53ChecksumError(msg, frame)
+            if self.address is not None and int(frame[:3]) != self.address:
+                msg = f"Frame of device {int(frame[:3])} while expecting device {self.address}: {frame!r}"
+                raise VSR53AddressError(msg, frame)
+            return frame
+
+    def _skip(self, count: int):
+        skipped = bytes(self._buffer[:count])
+        del self._buffer[:count]
+        msg = f"Skipped {count} bytes not starting a frame: {skipped!r}"
+        raise VSR53FramingError(msg, skipped)
@@ -0,0 +1,259 @@
+"""
+Bulk decoding of captured traffic
+
+:func:`decode` splits a buffer of concatenated frames on carriage returns and
+decodes all of them at once into columns (one entry per frame): offset in the
+buffer, address, access code, command, declared data length, value, checksum
+and validity flags. With NumPy installed the columns are NumPy arrays computed
+without a Python loop over the frames; without it they are ``array.array``
+columns (and a list of commands) built by a tight loop.
+
+Frames are split on CR, so a binary (BIN_RX) answer whose data holds a CR is
+split too and reported invalid. A trailing partial frame is ignored.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import math
+import mmap
+import os
+from array import array
+from pathlib import Path
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import BINARY_VALUE, CR, HEADER_LENGTH
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+_NUMBER_CHARACTERS = frozenset(b"0123456789.+-Ee ")
+
+
+class FrameColumns:
+    """
+    Decoded frames, one entry per frame in each column
+
+    :ivar offset: position of the first byte of the frame in the buffer
+    :ivar address: device address, -1 when the header is malformed
+    :ivar access_code: access code, -1 when the header is malformed
+    :ivar command: two-letter command (str, or bytes in a NumPy "S2" array)
+    :ivar length: declared data length, -1 when the header is malformed
+    :ivar value: data converted to float (binary data decoded), NaN if not a number
+    :ivar checksum_ok: the checksum matches
+    :ivar valid: well-formed header, data length as declared and checksum ok
+    """
+
+    __slots__ = (
+        "access_code",
+        "address",
+        "buffer",
+        "checksum_ok",
+        "command",
+        "length",
+        "offset",
+        "valid",
+        "value",
+    )
+
+    def __len__(self):
+        return len(self.offset)
+
+    def frame(self, index: int) -> bytes:
+        """
+        :return: raw bytes of a frame, carriage return excluded
+        """
+        if index < 0:
+            index += len(self)
+        start = int(self.offset[index])
+        if index + 1 < len(self):
+            # frames are contiguous, the next one starts after this one's CR
+            return bytes(
+                memoryview(self.buffer)[start : int(self.offset[index + 1]) - 1]
+            )
+        rest = bytes(memoryview(self.buffer)[start:])
+        return rest[: rest.index(b"\r")]
+
+    def data(self, index: int) -> bytes:
+        """
+        :return: data field of a frame
+        """
+        return self.frame(index)[HEADER_LENGTH:-1]
+
+
+def decode(buffer, *, use_numpy: bool | None = None) -> FrameColumns:
+    """
+    :param buffer: bytes-like object (bytes, bytearray, memoryview, mmap) of concatenated frames
+    :param use_numpy: force (True) or avoid (False) NumPy, by default used when installed
+    :return: columns
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is None:
+        msg = "NumPy is not installed"
+        raise ImportError(msg)
+    columns = _decode_numpy(buffer) if use_numpy else _decode_python(buffer)
+    columns.buffer = buffer
+    return columns
+
+
+def decode_file(path: str | os.PathLike, *, use_numpy: bool | None = None):
+    """
+    Decodes a capture file through a read-only memory map
+    :return: columns, their ``buffer`` keeps the file mapped
+    """
+    with Path(path).open("rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return decode(b"", use_numpy=use_numpy)
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode(mapped, use_numpy=use_numpy)
+
+
+def _decode_python(buffer) -> FrameColumns:
+    data = bytes(buffer)
+    offsets = array("q")
+    addresses = array("h")
+    access_codes = array("b")
+    commands = []
+    lengths = array("h")
+    values = array("d")
+    checksums = array("b")
+    valids = array("b")
+    nan = math.nan
+    start = 0
+    end = data.find(b"\r")
+    while end >= 0:
+        frame = data[start:end]
+        offsets.append(start)
+        size = len(frame)
+        checksum_ok = size > HEADER_LENGTH and frame[-1] == sum(frame[:-1]) % 64 + 64
+        if size > HEADER_LENGTH and frame[:4].isdigit() and frame[6:8].isdigit():
+            access_code = frame[3] - 48
+            length = int(frame[6:8])
+            value = nan
+            if length == size - HEADER_LENGTH - 1:
+                field = frame[HEADER_LENGTH:-1]
+                if access_code == AC.BIN_RX and length == BINARY_VALUE.size:
+                    value = BINARY_VALUE.unpack(field)[0]
+                elif field and _NUMBER_CHARACTERS.issuperset(field):
+                    with contextlib.suppress(ValueError):
+                        value = float(field)
+                valid = checksum_ok
+            else:
+                valid = False
+            addresses.append(int(frame[:3]))
+            access_codes.append(access_code)
+            commands.append(frame[4:6].decode("latin-1"))
+            lengths.append(length)
+            values.append(value)
+        else:
+            valid = False
+            addresses.append(-1)
+            access_codes.append(-1)
+            commands.append("")
+            lengths.append(-1)
+            values.append(nan)
+        checksums.append(checksum_ok)
+        valids.append(valid)
+        start = end + 1
+        end = data.find(b"\r", start)
+
+    columns = FrameColumns()
+    columns.offset = offsets
+    columns.address = addresses
+    columns.access_code = access_codes
+    columns.command = commands
+    columns.length = lengths
+    columns.value = values
+    columns.checksum_ok = checksums
+    columns.valid = valids
+    return columns
+
+
+def _gather(data, starts, width, lengths=None, fill=0):
+    # (len(starts), width) matrix of the bytes following each start
+    index = starts[:, None] + np.arange(width)
+    matrix = data[np.minimum(index, len(data) - 1)]
+    if lengths is not None:
+        matrix[np.arange(width) >= lengths[:, None]] = fill
+    return matrix
+
+
+def _decode_numpy(buffer) -> FrameColumns:
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    ends = np.flatnonzero(data == CR)
+    count = len(ends)
+    starts = np.empty(count, dtype=np.int64)
+    if count:
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+    sizes = ends - starts  # carriage return excluded
+
+    # sum of the bytes before the checksum, from a cumulative sum of the buffer
+    cumulative = np.zeros(len(data) + 1, dtype=np.uint64)
+    np.cumsum(data, dtype=np.uint64, out=cumulative[1:])
+    long_enough = sizes > HEADER_LENGTH
+    body_end = np.maximum(ends - 1, starts)
+    body_sum = cumulative[body_end] - cumulative[starts]
+    checksum = data[np.maximum(ends - 1, 0)] if count else np.zeros(0, np.uint8)
+    checksum_ok = long_enough & (checksum == body_sum % 64 + 64)
+
+    header = _gather(data, starts, HEADER_LENGTH).astype(np.int16) - 48
+    digits = (header >= 0) & (header <= 9)
+    header_ok = long_enough & digits[:, :4].all(axis=1) & digits[:, 6:8].all(axis=1)
+    address = np.where(
+        header_ok, header[:, 0] * 100 + header[:, 1] * 10 + header[:, 2], -1
+    ).astype(np.int16)
+    access_code = np.where(header_ok, header[:, 3], -1).astype(np.int8)
+    length = np.where(header_ok, header[:, 6] * 10 + header[:, 7], -1).astype(np.int16)
+    command = (
+        np.where(header_ok[:, None], header[:, 4:6] + 48, 0)
+        .astype(np.uint8)
+        .copy()
+        .view("S2")
+        .ravel()
+    )
+    length_ok = header_ok & (length == sizes - HEADER_LENGTH - 1)
+    valid = length_ok & checksum_ok
+
+    value = np.full(count, np.nan)
+    data_starts = starts + HEADER_LENGTH
+    binary = length_ok & (access_code == AC.BIN_RX) & (length == BINARY_VALUE.size)
+    if binary.any():
+        raw = _gather(data, data_starts[binary], BINARY_VALUE.size)
+        value[binary] = raw.copy().view(">f4").ravel()
+    text = length_ok & ~binary & (length > 0)
+    if text.any():
+        width = int(length[text].max())
+        raw = _gather(data, data_starts[text], width, length[text], fill=ord(" "))
+        allowed = np.zeros(256, dtype=bool)
+        allowed[list(_NUMBER_CHARACTERS)] = True
+        numeric = allowed[raw].all(axis=1) & ((raw >= 48) & (raw <= 57)).any(axis=1)
+        strings = raw[numeric].copy().view(f"S{width}").ravel()
+        try:
+            parsed = strings.astype(np.float64)
+        except ValueError:
+            # e.g. "1-2", only made of number characters
+            parsed = np.array([_to_float(string) for string in strings])
+        indices = np.flatnonzero(text)[numeric]
+        value[indices] = parsed
+
+    columns = FrameColumns()
+    columns.offset = starts
+    columns.address = address
+    columns.access_code = access_code
+    columns.command = command
+    columns.length = length
+    columns.value = value
+    columns.checksum_ok = checksum_ok
+    columns.valid = valid
+    return columns
+
+
+def _to_float(string: bytes) -> float:
+    try:
+        return float(string)
+    except ValueError:
+        return math.nan
@@ -0,0 +1,45 @@
+"""
+Exceptions raised while communicating with the gauges
+"""
+
+from __future__ import annotations
+
+
+class VSR53Error(Exception):
+    """
+    Base class of the errors raised by this package
+    """
+
+
+class VSR53TimeoutError(VSR53Error, TimeoutError):
+    """
+    The device did not answer with a complete frame in time
+    """
+
+
+class VSR53ProtocolError(VSR53Error):
+    """
+    The bytes received do not form a valid frame
+    """
+
+
+class VSR53FramingError(VSR53ProtocolError):
+    """
+    Bytes that do not start a frame were discarded, ``data`` holds them
+    """
+
+    def __init__(self, message: str, data: bytes = b""):
+        super().__init__(message)
+        self.data = data
+
+
+class VSR53ChecksumError(VSR53FramingError):
+    """
+    A complete frame failed its checksum, ``data`` holds the frame
+    """
+
+
+class VSR53AddressError(VSR53FramingError):
+    """
+    A valid frame came from another device than the expected one, ``data`` holds the frame
+    """
@@ -0,0 +1,412 @@
+"""
+Prometheus / OpenMetrics exporter
+
+:class:`Exporter` polls the gauges of an
+:class:`~vsr53.manager.AcquisitionManager` at their own rates, reads the slow
+changing values (operating hours, relay thresholds) every ``info_interval``
+seconds and renders the metrics every ``refresh`` seconds in a background
+thread. A scrape returns the last rendered text: it never waits for the bus,
+and the bus traffic does not depend on how often, or by how many, the
+endpoint is scraped::
+
+    vsr53 exporter --gauge /dev/ttyUSB0,1,VSR53DL,10 --listen 0.0.0.0:9853
+
+The text is served at ``/metrics`` in the OpenMetrics format when the scraper
+accepts it, in the Prometheus text format otherwise. Exported metrics, all
+labelled with ``port`` and ``address``:
+
+* ``vsr53_up``, ``vsr53_pressure``, ``vsr53_reading_timestamp_seconds``:
+  latest reading (the pressure is in the display unit of the gauge)
+* ``vsr53_operating_hours``, ``vsr53_relay_threshold``
+* ``vsr53_transactions_total``, ``vsr53_retries_total``,
+  ``vsr53_timeouts_total``, ``vsr53_protocol_errors_total``,
+  ``vsr53_checksum_failures_total``, ``vsr53_device_errors_total`` and the
+  ``vsr53_transaction_seconds`` histogram per command, see :mod:`vsr53.metrics`
+* ``vsr53_port_errors_total`` (``port`` only)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import urllib.parse
+from concurrent.futures import TimeoutError as CallTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import serial
+
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+from vsr53.manager import AcquisitionManager
+from vsr53.metrics import BUCKETS
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Getters read every info_interval, between the polls
+INFO_METHODS = ("get_operating_hours", "get_relay_1_status", "get_relay_2_status")
+
+# Failures of an info read, counted in vsr53_info_errors_total
+_INFO_ERRORS = (
+    VSR53Error,
+    serial.SerialException,
+    OSError,
+    CallTimeoutError,
+    RuntimeError,
+    ValueError,
+)
+
+_COUNTERS = (
+    ("transactions", "Transactions with an answer"),
+    ("retries", "Requests sent again after a failed attempt"),
+    ("timeouts", "Attempts without an answer in time"),
+    ("protocol_errors", "Attempts with a malformed answer"),
+    ("checksum_failures", "Answers with a wrong checksum"),
+)
+
+_PHASES = ("write_time", "turnaround", "read_time")
+
+
+def _format_value(value) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Family:
+    """
+    Samples of one metric, rendered in both formats
+    """
+
+    __slots__ = ("help", "kind", "name", "samples")
+
+    def __init__(self, name: str, kind: str, help: str):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples = []  # (suffix, labels, value)
+
+    def add(self, labels: dict, value, suffix: str = ""):
+        self.samples.append((suffix, labels, value))
+
+    def render(self, lines: list, openmetrics: bool):
+        if not self.samples:
+            return
+        # Prometheus names a counter after its samples, OpenMetrics without _total
+        name = self.name
+        if self.kind == "counter" and not openmetrics:
+            name += "_total"
+        lines.append(f"# HELP {name} {self.help}")
+        lines.append(f"# TYPE {name} {self.kind}")
+        for suffix, labels, value in self.samples:
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(labels)} {_format_value(value)}"
+            )
+
+
+def render(families, *, openmetrics: bool = False) -> bytes:
+    """
+    :param families: metric families to render
+    :param openmetrics: OpenMetrics format, Prometheus text format otherwise
+    :return: exposition text
+    """
+    lines = []
+    for family in families:
+        family.render(lines, openmetrics)
+    if openmetrics:
+        lines.append("# EOF")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urllib.parse.urlsplit(self.path).path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = self.server.exporter.body(openmetrics=openmetrics)
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        log.debug("Scrape from %s: %s", self.client_address[0], format % args)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Exporter:
+    """
+    Serves the metrics of the gauges of an AcquisitionManager over HTTP
+
+    Usage::
+
+        manager = AcquisitionManager(
+            [GaugeSpec("/dev/ttyUSB0", 1, "VSR53DL", rate=10)], metrics=True
+        )
+        exporter = Exporter(manager, ("0.0.0.0", 9853))
+        try:
+            exporter.serve_forever()
+        finally:
+            exporter.close()
+
+    or ``with Exporter(...) as exporter:`` to serve from a background thread.
+    """
+
+    def __init__(
+        self,
+        manager: AcquisitionManager,
+        address=("localhost", 9853),
+        *,
+        refresh: float = 1.0,
+        info_interval: float = 60.0,
+        call_timeout: float = 10.0,
+    ):
+        """
+        :param manager: acquisition of the exported gauges, created with ``metrics=True``
+            and started with the exporter
+        :param address: (host, port) to listen on, port 0 picks a free one
+        :param refresh: seconds between two renderings of the metrics
+        :param info_interval: seconds between two reads of the operating hours and relay
+            thresholds
+        :param call_timeout: seconds to wait for one of these reads
+        """
+        if not manager.metrics:
+            msg = "the manager must record the metrics of its gauges (metrics=True)"
+            raise ValueError(msg)
+        self.manager = manager
+        self.refresh = refresh
+        self.info_interval = info_interval
+        self.call_timeout = call_timeout
+        self._info = {}  # (port, address, method) -> value
+        self._info_errors = {}  # (port, address) -> count
+        self._server = _HTTPServer(address, _Handler, bind_and_activate=False)
+        self._server.exporter = self
+        self._bodies = (b"", b"")
+        self._stop = threading.Event()
+        self._threads = []
+        self._bound = False
+        self.update()
+
+    @property
+    def address(self):
+        """
+        Address the exporter listens on, with the actual port
+        """
+        return self._server.server_address
+
+    def body(self, *, openmetrics: bool = False) -> bytes:
+        """
+        :return: last rendered exposition text
+        """
+        return self._bodies[openmetrics]
+
+    def start(self):
+        """
+        Starts the acquisition and serves scrapes in a background thread
+        """
+        self._bind()
+        thread = threading.Thread(
+            target=self._server.serve_forever, name="vsr53-exporter", daemon=True
+        )
+        thread.start()
+        self._threads.append(thread)
+
+    def serve_forever(self):
+        self._bind()
+        self._server.serve_forever()
+
+    def _bind(self):
+        if self._bound:
+            return
+        self._server.server_bind()
+        self._server.server_activate()
+        self._bound = True
+        if not self.manager.running:
+            self.manager.start()
+        self._stop.clear()
+        # info reads wait for the bus, they must not hold back the rendering
+        for target, name in (
+            (self._update_loop, "vsr53-exporter-update"),
+            (self._info_loop, "vsr53-exporter-info"),
+        ):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        log.info("Exporting metrics on %s", self.address)
+
+    def close(self):
+        self._stop.set()
+        if self._bound:
+            self._server.shutdown()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._server.server_close()
+        self._bound = False
+        self.manager.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _update_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.update()
+            except Exception:
+                # keep serving the last rendering, the next one may succeed
+                log.exception("Rendering the metrics failed")
+            self._stop.wait(self.refresh)
+
+    def _info_loop(self):
+        while not self._stop.is_set():
+            self.read_info()
+            self._stop.wait(self.info_interval)
+
+    def read_info(self):
+        """
+        Reads the operating hours and relay thresholds of every gauge, between the polls
+        """
+        for port, specs in self.manager.ports.items():
+            for spec in specs:
+                for method in INFO_METHODS:
+                    if self._stop.is_set():
+                        return
+                    key = (port, spec.address, method)
+                    try:
+                        self._info[key] = self.manager.call(
+                            port, spec.address, method, timeout=self.call_timeout
+                        )
+                    except _INFO_ERRORS as e:
+                        log.warning("%s of %s:%s failed: %s", method, *key[:2], e)
+                        self._info.pop(key, None)
+                        errors = self._info_errors
+                        errors[key[:2]] = errors.get(key[:2], 0) + 1
+
+    def update(self):
+        """
+        Renders the metrics served to the following scrapes
+        """
+        families = self.families()
+        self._bodies = (
+            render(families, openmetrics=False),
+            render(families, openmetrics=True),
+        )
+
+    def families(self) -> list:
+        """
+        :return: metric families of the current state
+        """
+        up = _Family("vsr53_up", "gauge", "Last reading of the gauge succeeded")
+        pressure = _Family(
+            "vsr53_pressure", "gauge", "Last pressure read, in the display unit"
+        )
+        timestamp = _Family(
+            "vsr53_reading_timestamp_seconds", "gauge", "Time of the last reading"
+        )
+        for (port, address), reading in sorted(self.manager.latest().items()):
+            labels = {"port": port, "address": address}
+            up.add(labels, int(reading.error is None))
+            timestamp.add(labels, reading.timestamp)
+            if reading.error is None:
+                pressure.add(labels, reading.value)
+
+        hours = _Family("vsr53_operating_hours", "gauge", "Operating hours")
+        relay = _Family(
+            "vsr53_relay_threshold", "gauge", "Switching threshold of a relay"
+        )
+        info_errors = _Family(
+            "vsr53_info_errors", "counter", "Failed reads of operating hours or relays"
+        )
+        # copies, the info thread updates them meanwhile
+        for (port, address, method), value in sorted(dict(self._info).items()):
+            labels = {"port": port, "address": address}
+            if method == "get_operating_hours":
+                hours.add(labels, value)
+            else:
+                number = method.split("_")[2]
+                for threshold, level in zip(("on", "off"), value):
+                    relay.add(
+                        {**labels, "relay": number, "threshold": threshold}, level
+                    )
+        for (port, address), count in sorted(dict(self._info_errors).items()):
+            info_errors.add({"port": port, "address": address}, count, "_total")
+
+        port_errors = _Family(
+            "vsr53_port_errors", "counter", "Failures to open a port or port drops"
+        )
+        for port, count in sorted(self.manager.port_errors().items()):
+            port_errors.add({"port": port}, count, "_total")
+
+        counters = {
+            name: _Family(f"vsr53_{name}", "counter", help) for name, help in _COUNTERS
+        }
+        device_errors = _Family(
+            "vsr53_device_errors", "counter", "Error answers of the device, by code"
+        )
+        latency = _Family(
+            "vsr53_transaction_seconds",
+            "histogram",
+            "Transaction latency by phase: write, turnaround and read of the answer",
+        )
+        bounds = [_format_value(bound) for bound in BUCKETS] + ["+Inf"]
+        for port, metrics in sorted(self.manager.port_metrics().items()):
+            for (address, command), values in sorted(metrics.snapshot().items()):
+                labels = {"port": port, "address": address, "command": command}
+                for name, family in counters.items():
+                    family.add(labels, values[name], "_total")
+                for code, count in sorted(values["device_errors"].items()):
+                    device_errors.add({**labels, "code": code}, count, "_total")
+                for phase in _PHASES:
+                    histogram = values[phase]
+                    phase_labels = {**labels, "phase": phase.replace("_time", "")}
+                    cumulative = 0
+                    for bound, count in zip(bounds, histogram["buckets"]):
+                        cumulative += count
+                        latency.add(
+                            {**phase_labels, "le": bound}, cumulative, "_bucket"
+                        )
+                    latency.add(phase_labels, histogram["count"], "_count")
+                    latency.add(phase_labels, histogram["sum"], "_sum")
+
+        return [
+            up,
+            pressure,
+            timestamp,
+            hours,
+            relay,
+            info_errors,
+            port_errors,
+            *counters.values(),
+            device_errors,
+            latency,
+        ]
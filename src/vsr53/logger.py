@@ -6,15 +6,5 @@ import logging
 log = logging.getLogger("PYVSR53DL")
 log.setLevel(logging.ERROR)
 
-# create console handler and set level to debug
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
-
-# create formatter
-formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-# formatter = logging.Formatter('%(levelname)s - %(message)s')
-# add formatter to ch
-ch.setFormatter(formatter)
-
-# add ch to logger
-log.addHandler(ch)
+# Handlers are left to the application (see vsr53.__main__). Without any, errors
+# still reach stderr through the last resort handler of the logging module.
@@ -0,0 +1,393 @@
+"""
+Concurrent acquisition from gauges on many serial ports
+
+:class:`AcquisitionManager` runs one worker thread per physical port, so the
+blocking transactions of one port never delay another and the total throughput
+grows with the number of ports. Every gauge is polled at its own rate; the
+readings of all ports are merged into a single time-ordered stream
+(:meth:`AcquisitionManager.readings`) and into a table of the latest reading
+per gauge (:meth:`AcquisitionManager.latest`, :meth:`AcquisitionManager.rows`).
+
+A port that cannot be opened or fails while polling produces error readings
+for its gauges and is reopened after ``reconnect_delay``.
+
+Other transactions (configuration, identification...) can be run between the
+polls with :meth:`AcquisitionManager.call`, by the worker owning the port.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import heapq
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import NamedTuple
+
+import serial
+
+from vsr53.bus import Reading, VSR53Bus, read_reading
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+from vsr53.metrics import Metrics
+from vsr53.vsr53 import VSR53USB
+
+MODELS = ("VSR53DL", "VSR53USB")
+
+# Wakes up a port worker waiting for its next poll
+_WAKE = object()
+
+
+class GaugeSpec(NamedTuple):
+    port: str
+    address: int = 1
+    model: str = "VSR53USB"
+    rate: float = 1.0  # readings per second
+
+
+class PortReading(NamedTuple):
+    port: str
+    reading: Reading
+
+
+class AcquisitionManager:
+    """
+    Polls gauges on several ports concurrently
+
+    Usage::
+
+        gauges = [GaugeSpec("/dev/ttyACM0", rate=10), GaugeSpec("/dev/ttyUSB0", 2, "VSR53DL")]
+        with AcquisitionManager(gauges) as manager:
+            for port, reading in manager.readings():
+                print(port, reading.address, reading.value)
+    """
+
+    def __init__(
+        self,
+        gauges,
+        *,
+        cmd: str = CMD.Measurement_Value,
+        reconnect_delay: float = 1.0,
+        reorder_window: float = 0.05,
+        max_pending: int = 100000,
+        cache: bool = False,
+        metrics: bool = False,
+    ):
+        """
+        :param gauges: GaugeSpec (or (port, address, model, rate) tuples) of every gauge,
+            gauges on the same port must be of the same model and VSR53USB ports hold one
+        :param cmd: command read from every gauge
+        :param reconnect_delay: wait in seconds before reopening a failed port
+        :param reorder_window: readings() holds readings back this long, in seconds, to
+            yield them in timestamp order although the ports complete them out of order
+        :param max_pending: readings kept for readings(), the oldest are dropped beyond it
+        :param cache: enable the read cache of the gauges (see VSR53.enable_cache) for the
+            transactions run with call()
+        :param metrics: record the transaction counters and latencies of the gauges, see
+            port_metrics()
+        """
+        self._ports = {}
+        for fields in gauges:
+            spec = GaugeSpec(*fields)
+            if spec.model not in MODELS:
+                msg = f"unknown model {spec.model!r}, expected one of {MODELS}"
+                raise ValueError(msg)
+            if spec.rate <= 0:
+                msg = f"rate must be positive, got {spec.rate}"
+                raise ValueError(msg)
+            specs = self._ports.setdefault(spec.port, [])
+            if specs and specs[0].model != spec.model:
+                msg = f"port {spec.port} mixes {specs[0].model} and {spec.model}"
+                raise ValueError(msg)
+            if spec.model == "VSR53USB" and specs:
+                msg = f"port {spec.port} can only hold one VSR53USB"
+                raise ValueError(msg)
+            if any(other.address == spec.address for other in specs):
+                msg = f"address {spec.address} is used twice on port {spec.port}"
+                raise ValueError(msg)
+            specs.append(spec)
+        self.cmd = cmd
+        self.reconnect_delay = reconnect_delay
+        self.reorder_window = reorder_window
+        self.cache = cache
+        self.metrics = metrics
+        self._metrics = {port: Metrics() for port in self._ports}
+        self._queue = queue.Queue(max_pending)
+        self._latest = {}
+        self._errors = dict.fromkeys(self._ports, 0)
+        self._commands = {port: queue.Queue() for port in self._ports}
+        self._stop = threading.Event()
+        self._executor = None
+        self._futures = []
+
+    @property
+    def ports(self) -> dict:
+        """
+        :return: {port: [GaugeSpec]}
+        """
+        return {port: list(specs) for port, specs in self._ports.items()}
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def start(self):
+        if self._executor is not None:
+            msg = "Acquisition is already running"
+            raise RuntimeError(msg)
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(self._ports), thread_name_prefix="vsr53-port"
+        )
+        self._futures = [
+            self._executor.submit(self._port_loop, port, specs)
+            for port, specs in self._ports.items()
+        ]
+        log.info("Acquisition started on %s ports", len(self._ports))
+
+    def stop(self):
+        if self._executor is None:
+            return
+        self._stop.set()
+        for commands in self._commands.values():
+            commands.put(_WAKE)
+        self._executor.shutdown(wait=True)
+        for future in self._futures:
+            # a worker only ends with an exception on a bug, do not hide it
+            future.result()
+        self._executor = None
+        self._futures = []
+        # calls queued while the workers stopped would wait forever
+        error = RuntimeError("Acquisition stopped")
+        for commands in self._commands.values():
+            while not commands.empty():
+                command = commands.get_nowait()
+                if command is not _WAKE and command[3].set_running_or_notify_cancel():
+                    command[3].set_exception(error)
+        log.info("Acquisition stopped")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def call(
+        self, port: str, address: int, method: str, *args, timeout: float | None = None
+    ):
+        """
+        Runs ``gauge.method(*args)`` in the worker of the port, between two polls
+        :param timeout: seconds to wait for the result
+        :return: result of the method
+        """
+        if self._executor is None:
+            msg = "Acquisition is not running"
+            raise RuntimeError(msg)
+        if port not in self._commands:
+            msg = f"unknown port {port!r}"
+            raise ValueError(msg)
+        future = Future()
+        self._commands[port].put((address, method, args, future))
+        return future.result(timeout)
+
+    def latest(self) -> dict:
+        """
+        :return: {(port, address): latest Reading}
+        """
+        return dict(self._latest)
+
+    def port_errors(self) -> dict:
+        """
+        :return: {port: number of times it failed to open or dropped}
+        """
+        return dict(self._errors)
+
+    def port_metrics(self) -> dict:
+        """
+        :return: {port: Metrics of its gauges}, they stay empty unless ``metrics`` is set
+        """
+        return dict(self._metrics)
+
+    def rows(
+        self,
+        period: float,
+        *,
+        max_age: float | None = None,
+        cycles: int | None = None,
+    ):
+        """
+        Time-aligned table: every ``period`` seconds a row with the latest value of every gauge
+        :param max_age: values older than this many seconds are reported as None
+        :param cycles: number of rows, None runs until the acquisition stops
+        :return: generator of (timestamp, {(port, address): value})
+        """
+        keys = [
+            (port, spec.address)
+            for port, specs in self._ports.items()
+            for spec in specs
+        ]
+        next_time = time.monotonic()
+        count = 0
+        while self.running and (cycles is None or count < cycles):
+            next_time += period
+            if self._stop.wait(max(0.0, next_time - time.monotonic())):
+                return
+            now = time.time()
+            row = {}
+            for key in keys:
+                reading = self._latest.get(key)
+                if reading is None or (
+                    max_age is not None and now - reading.timestamp > max_age
+                ):
+                    row[key] = None
+                else:
+                    row[key] = reading.value
+            count += 1
+            yield now, row
+
+    def readings(self, *, timeout: float | None = None):
+        """
+        Merged stream of the readings of all ports in timestamp order
+        :param timeout: stop when no reading arrives within ``timeout`` seconds
+        :return: generator of PortReading
+        """
+        pending = []  # heap of (timestamp, sequence, PortReading)
+        sequence = 0
+        last = time.monotonic()
+        while self.running or not self._queue.empty() or pending:
+            try:
+                item = self._queue.get(timeout=self.reorder_window)
+            except queue.Empty:
+                item = None
+            now = time.monotonic()
+            if item is not None:
+                heapq.heappush(pending, (item.reading.timestamp, sequence, item))
+                sequence += 1
+                last = now
+            elif timeout is not None and now - last > timeout and not pending:
+                return
+            # readings complete within the window, older ones can no longer be overtaken
+            horizon = time.time() - self.reorder_window
+            flush = not self.running
+            while pending and (flush or pending[0][0] <= horizon):
+                yield heapq.heappop(pending)[2]
+
+    def _publish(self, port, reading):
+        self._latest[port, reading.address] = reading
+        item = PortReading(port, reading)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # nobody consumes readings(), keep the most recent ones
+            with contextlib.suppress(queue.Empty):
+                self._queue.get_nowait()
+            self._queue.put_nowait(item)
+
+    def _open(self, port, specs):
+        """
+        :return: {address: gauge}, closer
+        """
+        if specs[0].model == "VSR53DL":
+            bus = VSR53Bus(port)
+            gauges = {spec.address: bus.gauge(spec.address) for spec in specs}
+            bus.open()
+            close = bus.close
+        else:
+            gauge = VSR53USB(port, address=specs[0].address)
+            gauge.open_communication()
+            gauges = {specs[0].address: gauge}
+            close = gauge.close_communication
+        if self.cache:
+            for gauge in gauges.values():
+                gauge.enable_cache()
+        if self.metrics:
+            for gauge in gauges.values():
+                gauge.enable_metrics(self._metrics[port])
+        return gauges, close
+
+    def _port_loop(self, port, specs):
+        stop = self._stop
+        while not stop.is_set():
+            try:
+                gauges, close = self._open(port, specs)
+            except (serial.SerialException, OSError) as e:
+                self._port_failed(port, specs, e)
+                continue
+            try:
+                self._poll_port(port, specs, gauges)
+            except (serial.SerialException, OSError) as e:
+                self._port_failed(port, specs, e)
+            finally:
+                with contextlib.suppress(serial.SerialException, OSError):
+                    close()
+
+    def _poll_port(self, port, specs, gauges):
+        stop = self._stop
+        commands = self._commands[port]
+        cmd = self.cmd
+        now = time.monotonic()
+        # (due time, address, period), the gauge due first is polled next
+        schedule = [(now, spec.address, 1.0 / spec.rate) for spec in specs]
+        heapq.heapify(schedule)
+        while not stop.is_set():
+            due, address, period = schedule[0]
+            delay = due - time.monotonic()
+            try:
+                command = commands.get(timeout=delay) if delay > 0 else None
+            except queue.Empty:
+                command = None
+            if command is None and not commands.empty():
+                command = commands.get_nowait()
+            if command is _WAKE:
+                continue
+            if command is not None:
+                self._execute(gauges, command)
+                continue
+            self._publish(port, read_reading(gauges[address], cmd))
+            due += period
+            # late, restart the schedule instead of bursting to catch up
+            due = max(due, time.monotonic())
+            heapq.heapreplace(schedule, (due, address, period))
+
+    @staticmethod
+    def _execute(gauges, command):
+        address, method, args, future = command
+        if not future.set_running_or_notify_cancel():
+            return
+        gauge = gauges.get(address)
+        if gauge is None:
+            future.set_exception(ValueError(f"no gauge with address {address}"))
+            return
+        try:
+            result = getattr(gauge, method)(*args)
+        except (VSR53Error, ValueError, TypeError, AttributeError) as e:
+            # errors of the request, the port keeps polling
+            future.set_exception(e)
+        except BaseException as e:
+            # port errors end the poll, anything else is a bug
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+
+    def _port_failed(self, port, specs, error):
+        log.error("Port %s failed: %s", port, error)
+        self._errors[port] += 1
+        timestamp = time.time()
+        for spec in specs:
+            self._publish(
+                port, Reading(spec.address, self.cmd, None, timestamp, str(error))
+            )
+        # commands cannot run until the port is back
+        commands = self._commands[port]
+        deadline = time.monotonic() + self.reconnect_delay
+        while not self._stop.is_set():
+            try:
+                command = commands.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return
+            if command is not _WAKE and command[3].set_running_or_notify_cancel():
+                command[3].set_exception(error)
@@ -0,0 +1,173 @@
+"""
+Per-transaction instrumentation
+
+Metrics are disabled unless a :class:`Metrics` registry is attached to a gauge
+(``gauge.enable_metrics()``); a disabled gauge pays a single ``is None`` check
+per transaction. Counters and latency histograms are kept per (address,
+command) and hooks registered with :meth:`Metrics.add_hook` are called after
+every transaction, e.g. to export them.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+from vsr53.exceptions import VSR53ChecksumError, VSR53TimeoutError
+
+# Upper bounds of the latency buckets in seconds: 4 per decade from 10 μs to 10 s
+BUCKETS = tuple(10 ** (exponent / 4) for exponent in range(-20, 5))
+
+
+class Histogram:
+    """
+    Latency histogram with fixed logarithmic buckets
+    """
+
+    __slots__ = ("count", "counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the ``q`` quantile, 0 when empty
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "buckets": list(self.counts)}
+
+
+class CommandMetrics:
+    """
+    Counters and latencies of the transactions of one command with one gauge
+    """
+
+    __slots__ = (
+        "checksum_failures",
+        "device_errors",
+        "protocol_errors",
+        "read_time",
+        "retries",
+        "timeouts",
+        "transactions",
+        "turnaround",
+        "write_time",
+    )
+
+    def __init__(self):
+        self.transactions = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.protocol_errors = 0
+        self.checksum_failures = 0
+        self.device_errors = {}  # ERR_RX code -> count
+        self.write_time = Histogram()  # writing the request to the port
+        self.turnaround = Histogram()  # end of the write to the answer header
+        self.read_time = Histogram()  # rest of the answer after the header
+
+    def as_dict(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "protocol_errors": self.protocol_errors,
+            "checksum_failures": self.checksum_failures,
+            "device_errors": dict(self.device_errors),
+            "write_time": self.write_time.as_dict(),
+            "turnaround": self.turnaround.as_dict(),
+            "read_time": self.read_time.as_dict(),
+        }
+
+
+class Metrics:
+    """
+    Registry of CommandMetrics keyed by (address, command), it can be shared by many gauges
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._hooks = []
+        self._lock = threading.Lock()
+
+    def get(self, address: int, command) -> CommandMetrics:
+        """
+        :param command: command as str (e.g. "MV") or as the bytes found in the frame
+        """
+        if isinstance(command, str):
+            command = command.encode("ascii")
+        key = (address, command)
+        metrics = self._commands.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self._commands.setdefault(key, CommandMetrics())
+        return metrics
+
+    def add_hook(self, hook):
+        """
+        :param hook: callable(address, command, command_metrics) called after every transaction
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self._hooks.remove(hook)
+
+    def snapshot(self) -> dict:
+        """
+        :return: {(address, command): counters and histograms as plain dicts}
+        """
+        with self._lock:
+            items = list(self._commands.items())
+        return {
+            (address, command.decode("ascii")): metrics.as_dict()
+            for (address, command), metrics in items
+        }
+
+    def record_failure(self, address: int, command: bytes, error: Exception):
+        metrics = self.get(address, command)
+        if isinstance(error, VSR53TimeoutError):
+            metrics.timeouts += 1
+        elif isinstance(error, VSR53ChecksumError):
+            metrics.checksum_failures += 1
+        else:
+            metrics.protocol_errors += 1
+
+    def record_transaction(
+        self,
+        address: int,
+        command: bytes,
+        *,
+        attempts: int,
+        write_time: float,
+        turnaround: float,
+        read_time: float,
+        error_code: str | None,
+    ):
+        metrics = self.get(address, command)
+        metrics.transactions += 1
+        metrics.retries += attempts - 1
+        metrics.write_time.observe(write_time)
+        metrics.turnaround.observe(turnaround)
+        metrics.read_time.observe(read_time)
+        if error_code is not None:
+            metrics.device_errors[error_code] = (
+                metrics.device_errors.get(error_code, 0) + 1
+            )
+        for hook in self._hooks:
+            hook(address, command.decode("ascii"), metrics)
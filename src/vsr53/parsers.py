@@ -0,0 +1,176 @@
+"""
+Conversion of the data field of the answers into Python values
+
+:func:`decode_answer` turns a checked frame into an immutable :class:`Answer`
+without decoding it to str; its ``value`` is converted on access by the parser
+of the command in :data:`DATA_PARSERS`, which works on the bytes of the data
+field with plain slicing, no regular expressions.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import HEADER_LENGTH, decode_binary_value
+from vsr53.Commands import Commands as CMD
+
+# Commands answering a pressure, they can also be read in binary (BIN_TX)
+MEASUREMENT_COMMANDS = frozenset(
+    (
+        CMD.Measurement_Value,
+        CMD.Measurement_Value_1,
+        CMD.Measurement_Value_2,
+        CMD.Measurement_Value_3_HOT_C,
+        CMD.Measurement_Value_4_COLD_C,
+        CMD.Measurement_Value_6_AMB_P,
+        CMD.Measurement_Value_7_REL_P,
+    )
+)
+
+
+class MeasurementRange(NamedTuple):
+    low: float
+    high: float
+
+
+class RelayStatus(NamedTuple):
+    on: float  # T, switching threshold
+    off: float  # F, release threshold
+
+
+def _as_bytes(data) -> bytes:
+    return data.encode("latin-1") if isinstance(data, str) else data
+
+
+def _parse_measurement_range(data: bytes) -> MeasurementRange:
+    # e.g. L5E-05H1500
+    high = data.index(b"H")
+    return MeasurementRange(float(data[1:high]), float(data[high + 1 :]))
+
+
+def _parse_relay_status(data: bytes) -> RelayStatus:
+    # e.g. T1.00E-2F2.00E-2
+    off = data.index(b"F")
+    return RelayStatus(float(data[1:off]), float(data[off + 1 :]))
+
+
+def _parse_operating_hours(data: bytes) -> float:
+    # quarters of an hour
+    return float(data) / 4.0
+
+
+def parse_measurement_range(data) -> MeasurementRange:
+    """
+    :param data: measurement range answer, e.g. L5E-05H1500
+    :return: measurement_range_lo, measurement_range_hi
+    """
+    return _parse_measurement_range(_as_bytes(data))
+
+
+def parse_relay_status(data) -> RelayStatus:
+    """
+    :param data: relay status answer, e.g. T1.00E-2F2.00E-2
+    :return: t_value, f_value
+    """
+    return _parse_relay_status(_as_bytes(data))
+
+
+def parse_operating_hours(data) -> float:
+    """
+    :param data: operating time in quarters of an hour
+    :return: operating_hours
+    """
+    return _parse_operating_hours(_as_bytes(data))
+
+
+# Parsers of the data field (bytes) of the answers by command, the data of the other
+# commands is returned as str
+DATA_PARSERS = {
+    CMD.Version_Device: float,
+    CMD.Version_Bootloader: float,
+    CMD.Response_Delay: float,
+    CMD.Measurement_Range: _parse_measurement_range,
+    **dict.fromkeys(MEASUREMENT_COMMANDS, float),
+    CMD.Relay_1: _parse_relay_status,
+    CMD.Relay_2: _parse_relay_status,
+    CMD.Relay_3: _parse_relay_status,
+    CMD.Relay_4: _parse_relay_status,
+    CMD.Operating_Hours: _parse_operating_hours,
+    CMD.Controller_Status: int,
+    CMD.Panel_Status: int,
+}
+
+# Command codes as found in frames, so decoding does not build a new str per answer
+_COMMANDS = {
+    cmd.encode("ascii"): cmd
+    for name, cmd in vars(CMD).items()
+    if not name.startswith("_") and isinstance(cmd, str)
+}
+
+
+class Answer(NamedTuple):
+    """
+    Decoded answer frame, the data is converted on access
+    """
+
+    address: int
+    access_code: int
+    cmd: str
+    raw: bytes  # data field
+
+    @property
+    def data(self):
+        """
+        Data as in ThyrCommPackage: str, bytes for binary answers, 0 without data
+        """
+        if not self.raw:
+            return 0
+        if self.access_code == AC.BIN_RX:
+            return self.raw
+        return self.raw.decode("latin-1")
+
+    @property
+    def value(self):
+        """
+        Data converted to its Python value: float for measurements (binary included),
+        MeasurementRange, RelayStatus... the error code for ERR_RX answers
+        :raises ValueError: the data does not match the format of the command
+        :raises VSR53ProtocolError: a binary value is not 4 bytes long
+        """
+        access_code = self.access_code
+        if access_code == AC.BIN_RX:
+            return decode_binary_value(self.raw)
+        if access_code != AC.ERR_RX:
+            parser = DATA_PARSERS.get(self.cmd)
+            if parser is not None:
+                return parser(self.raw)
+        return self.raw.decode("latin-1")
+
+
+def decode_answer(frame) -> Answer:
+    """
+    :param frame: complete and checked frame (see codec.FrameParser), bytes or memoryview
+    :return: answer
+    """
+    if not isinstance(frame, bytes):
+        frame = bytes(frame)
+    command = frame[4:6]
+    cmd = _COMMANDS.get(command)
+    if cmd is None:
+        cmd = command.decode("latin-1")
+    return Answer(
+        (frame[0] - 48) * 100 + (frame[1] - 48) * 10 + frame[2] - 48,
+        frame[3] - 48,
+        cmd,
+        frame[HEADER_LENGTH:-2],
+    )
+
+
+def parse_data(cmd: str, data):
+    """
+    :param data: data field as str or bytes
+    :return: the answer data of ``cmd`` converted to its Python value
+    """
+    parser = DATA_PARSERS.get(cmd)
+    return data if parser is None else parser(_as_bytes(data))
@@ -0,0 +1,66 @@
+"""
+Recovery from lost serial ports
+
+A USB gauge that is unplugged, reset or re-enumerated makes every read and
+write of its port fail. With a :class:`Reconnect` policy attached
+(``gauge.enable_reconnect()``) such an I/O error no longer ends the
+transaction: the port is closed and reopened with exponential backoff, and
+the request is sent again once it is back. If the device serial number is
+known, the gauge is also looked for on the other serial ports, in case the
+operating system gave it a new path. The transaction fails if the gauge is
+not back within ``timeout``; the next one tries again.
+"""
+
+from __future__ import annotations
+
+
+def serial_ports() -> list:
+    """
+    :return: device paths of the serial ports of the system
+    """
+    from serial.tools import list_ports  # noqa: PLC0415
+
+    return [port.device for port in list_ports.comports()]
+
+
+class Reconnect:
+    """
+    How a gauge recovers from a lost port
+    """
+
+    def __init__(
+        self,
+        *,
+        initial_backoff: float = 0.05,
+        max_backoff: float = 2.0,
+        timeout: float = 30.0,
+        serial_number: str | None = None,
+        candidates=serial_ports,
+    ):
+        """
+        :param initial_backoff: wait in seconds before the second attempt to reopen
+        :param max_backoff: longest wait between two attempts, the wait doubles until then
+        :param timeout: seconds after which the pending transaction fails
+        :param serial_number: serial number of the device (get_serial_number_device), when
+            given the gauge is searched on the other ports if its port does not come back
+        :param candidates: ports to search, a list or a callable returning one; the serial
+            ports of the system by default
+        """
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.serial_number = serial_number
+        self.candidates = candidates
+
+    def delays(self):
+        """
+        Generator of the waits between attempts
+        """
+        delay = self.initial_backoff
+        while True:
+            yield delay
+            delay = min(delay * 2, self.max_backoff)
+
+    def ports(self) -> list:
+        candidates = self.candidates
+        return list(candidates() if callable(candidates) else candidates)
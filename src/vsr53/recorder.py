@@ -0,0 +1,346 @@
+"""
+Append-only binary recording of readings
+
+A recording starts with a header (magic, format version, length of the
+metadata, JSON metadata padded to 8 bytes) followed by fixed size records::
+
+    timestamp  float64  seconds since the epoch
+    value      float64  NaN when the reading failed
+    command    2 bytes  ASCII, e.g. b"MV"
+    address    uint8
+    status     uint8    vsr53.stream status
+    padding    4 bytes
+
+all little endian. Records are never rewritten, a crash can at worst leave a
+partial record at the end, which readers ignore and :class:`Recorder` cuts off
+when it appends to the file again. :class:`Recording` maps the file in memory
+and exposes the columns as zero-copy views, ``Recording.array()`` returns a
+NumPy structured array over the same memory.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from vsr53 import ErrorMessages
+from vsr53.stream import STATUS_COMMUNICATION_ERROR, STATUS_DEVICE_ERROR, STATUS_OK
+
+MAGIC = b"VSR53LOG"
+VERSION = 1
+# magic, version, metadata length
+PREAMBLE = struct.Struct("<8sHI")
+RECORD = struct.Struct("<dd2sBB4x")
+# numpy.dtype of a record, see Recording.array
+RECORD_DTYPE = [
+    ("timestamp", "<f8"),
+    ("value", "<f8"),
+    ("command", "S2"),
+    ("address", "u1"),
+    ("status", "u1"),
+    ("padding", "V4"),
+]
+
+
+class Record(NamedTuple):
+    timestamp: float
+    value: float
+    command: str
+    address: int
+    status: int
+
+
+def describe(gauge) -> dict:
+    """
+    Identification of a gauge for the metadata of a recording
+    :return: {"address", "type", "product", "serial_number", "head_serial_number", "firmware"}
+    """
+    return {
+        "address": gauge._address,
+        "type": gauge.get_device_type(),
+        "product": gauge.get_product_name(),
+        "serial_number": gauge.get_serial_number_device(),
+        "head_serial_number": gauge.get_serial_number_head(),
+        "firmware": gauge.get_firmware_version(),
+    }
+
+
+def _encode_header(metadata: dict) -> bytes:
+    text = json.dumps(metadata, sort_keys=True).encode("utf-8")
+    text += b" " * (-(PREAMBLE.size + len(text)) % 8)
+    return PREAMBLE.pack(MAGIC, VERSION, len(text)) + text
+
+
+def _read_header(file):
+    """
+    :return: metadata, offset of the first record
+    """
+    preamble = file.read(PREAMBLE.size)
+    if len(preamble) < PREAMBLE.size:
+        msg = "Truncated recording header"
+        raise ValueError(msg)
+    magic, version, length = PREAMBLE.unpack(preamble)
+    if magic != MAGIC:
+        msg = f"Not a VSR53 recording (magic {magic!r})"
+        raise ValueError(msg)
+    if version != VERSION:
+        msg = f"Unsupported recording version {version}"
+        raise ValueError(msg)
+    text = file.read(length)
+    if len(text) < length:
+        msg = "Truncated recording header"
+        raise ValueError(msg)
+    return json.loads(text.decode("utf-8")), PREAMBLE.size + length
+
+
+class Recorder:
+    """
+    Writes readings to a recording in batches
+
+    Records are buffered in memory and written every ``batch_size`` records or
+    every ``fsync_interval`` seconds, whichever comes first, and the file is
+    synced to disk every ``fsync_interval`` seconds: a crash loses at most the
+    records of the last interval.
+
+    Usage::
+
+        with VSR53DL("/dev/ttyUSB0") as gauge, Recorder("run.vlog", describe(gauge)) as recorder:
+            while True:
+                recorder.write(1, "MV", gauge.get_measurement_value())
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        metadata: dict | None = None,
+        *,
+        batch_size: int = 256,
+        fsync_interval: float = 1.0,
+    ):
+        """
+        :param path: recording file, readings are appended if it exists
+        :param metadata: JSON serializable description of the acquisition, only written
+            when the file is created
+        :param batch_size: records buffered before they are written
+        :param fsync_interval: seconds between syncs to disk, None never syncs
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.fsync_interval = fsync_interval
+        self._batch = bytearray()
+        self._pending = 0
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with self.path.open("rb") as file:
+                self.metadata, offset = _read_header(file)
+            self._file = self.path.open("r+b")
+            # cut off the partial record of a crash
+            size = self.path.stat().st_size
+            self._file.truncate(size - (size - offset) % RECORD.size)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self.metadata = {
+                "created": time.time(),
+                **(metadata or {}),
+            }
+            self._file = self.path.open("wb")
+            self._file.write(_encode_header(self.metadata))
+            self._sync()
+        self._last_sync = time.monotonic()
+
+    def write(
+        self,
+        address: int,
+        command: str,
+        value: float | None,
+        timestamp: float | None = None,
+        status: int | None = None,
+    ):
+        """
+        :param value: reading, None for a failed reading
+        :param timestamp: seconds since the epoch, now by default
+        :param status: STATUS_OK, or STATUS_COMMUNICATION_ERROR when the value is None
+        """
+        if value is None:
+            value = math.nan
+            if status is None:
+                status = STATUS_COMMUNICATION_ERROR
+        self._batch += RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            value,
+            command.encode("ascii"),
+            address,
+            STATUS_OK if status is None else status,
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size or (
+            self.fsync_interval is not None
+            and time.monotonic() - self._last_sync >= self.fsync_interval
+        ):
+            self.flush()
+
+    def write_reading(self, reading):
+        """
+        :param reading: vsr53.bus.Reading
+        """
+        status = None
+        if reading.error is not None:
+            # device errors are reported with their code, anything else with a message
+            status = (
+                STATUS_DEVICE_ERROR
+                if reading.error in ErrorMessages.MSG
+                else STATUS_COMMUNICATION_ERROR
+            )
+        self.write(
+            reading.address,
+            reading.command,
+            reading.value if reading.error is None else None,
+            reading.timestamp,
+            status,
+        )
+
+    def flush(self, fsync: bool = False):
+        """
+        Writes the buffered records
+        :param fsync: sync to disk now instead of after fsync_interval
+        """
+        if self._batch:
+            self._file.write(self._batch)
+            self._batch.clear()
+            self._pending = 0
+        now = time.monotonic()
+        if fsync or (
+            self.fsync_interval is not None
+            and now - self._last_sync >= self.fsync_interval
+        ):
+            self._sync()
+            self._last_sync = now
+        else:
+            self._file.flush()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush(fsync=True)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Recording:
+    """
+    Read-only memory map of a recording, records appended after it was opened are not seen
+
+    The column views (``timestamps``, ``values``...) and ``array()`` share the mapped
+    memory, they must be released before the recording is closed.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = Path(path)
+        with self.path.open("rb") as file:
+            self.metadata, self._offset = _read_header(file)
+            size = os.fstat(file.fileno()).st_size
+            self._length = (size - self._offset) // RECORD.size
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        end = self._offset + self._length * RECORD.size
+        self.buffer = memoryview(self._mmap)[self._offset : end]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index: int) -> Record:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            msg = f"record {index} out of range"
+            raise IndexError(msg)
+        return self._record(RECORD.unpack_from(self.buffer, index * RECORD.size))
+
+    def __iter__(self):
+        for fields in RECORD.iter_unpack(self.buffer):
+            yield self._record(fields)
+
+    @staticmethod
+    def _record(fields) -> Record:
+        timestamp, value, command, address, status = fields
+        return Record(timestamp, value, command.decode("ascii"), address, status)
+
+    def _column(self, fmt: str, offset: int):
+        # strided view of one field, records are a whole number of items long
+        size = struct.calcsize(fmt)
+        step = RECORD.size // size
+        return self.buffer.cast(fmt)[offset // size :: step]
+
+    @property
+    def timestamps(self) -> memoryview:
+        return self._column("d", 0)
+
+    @property
+    def values(self) -> memoryview:
+        return self._column("d", 8)
+
+    @property
+    def addresses(self) -> memoryview:
+        return self._column("B", 18)
+
+    @property
+    def statuses(self) -> memoryview:
+        return self._column("B", 19)
+
+    def array(self):
+        """
+        :return: numpy structured array of the records, sharing the mapped memory
+        """
+        import numpy as np
+
+        return np.frombuffer(self.buffer, dtype=np.dtype(RECORD_DTYPE))
+
+    def close(self):
+        self.buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def export_csv(path: str | os.PathLike, csv_path: str | os.PathLike):
+    """
+    Converts a recording to CSV, one row per record with an ISO 8601 timestamp
+    :return: number of records exported
+    """
+    with Recording(path) as recording, Path(csv_path).open(
+        "w", newline="", encoding="utf-8"
+    ) as file:
+        writer = csv.writer(file)
+        writer.writerow(["timestamp", "address", "command", "value", "status"])
+        for record in recording:
+            writer.writerow(
+                [
+                    datetime.fromtimestamp(record.timestamp).isoformat(
+                        timespec="milliseconds"
+                    ),
+                    record.address,
+                    record.command,
+                    "" if math.isnan(record.value) else repr(record.value),
+                    record.status,
+                ]
+            )
+        return len(recording)
@@ -0,0 +1,476 @@
+"""
+Gauge server sharing serial ports among processes
+
+Only one process can open a serial port. :class:`GaugeServer` owns the ports
+through an :class:`~vsr53.manager.AcquisitionManager`, keeps polling them and
+serves the other processes over a Unix domain or TCP socket; :class:`GaugeClient`
+mirrors the getters and setters of the VSR53 classes.
+
+Measurement getters of the polled command are answered from the latest
+reading, identification and configuration reads from the cache of the gauges
+(see :mod:`vsr53.cache`), so the bus traffic does not grow with the number of
+clients. Everything else is passed through to the gauge between two polls.
+
+Clients can change the settings of the gauges and restart them: the Unix
+domain socket is only open to the user of the server by default (``mode``),
+and TCP has no access control at all.
+
+The protocol is one JSON object per line in each direction. Requests::
+
+    {"op": "call", "port": "/dev/ttyUSB0", "address": 1, "method": "get_product_name", "args": []}
+    {"op": "latest"}
+    {"op": "ports"}
+
+answers are ``{"ok": true, "result": ...}`` or
+``{"ok": false, "error": "message", "type": "VSR53TimeoutError"}``.
+"""
+
+from __future__ import annotations
+
+import errno
+import getpass
+import json
+import os
+import socket
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import TimeoutError as CallTimeoutError
+from pathlib import Path
+
+import serial
+
+from vsr53 import exceptions
+from vsr53.bus import Reading
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+from vsr53.manager import AcquisitionManager
+
+# Methods of the VSR53 classes available to clients
+REMOTE_METHODS = (
+    "get_device_type",
+    "get_product_name",
+    "get_serial_number_device",
+    "get_serial_number_head",
+    "get_device_version",
+    "get_firmware_version",
+    "get_bootloader_version",
+    "get_response_delay",
+    "set_response_delay",
+    "get_display_unit",
+    "set_display_unit",
+    "get_display_orientation",
+    "set_display_orientation",
+    "get_operating_hours",
+    "get_measurement_range",
+    "get_measurement_value",
+    "get_measurement_value_pirani",
+    "get_measurement_value_piezo",
+    "get_relay_1_status",
+    "get_relay_2_status",
+    "set_relay_1_status",
+    "set_relay_2_status",
+    "restart_device",
+)
+
+# Getters answered from the latest reading when their command is the polled one
+_MEASUREMENT_METHODS = {
+    "get_measurement_value": CMD.Measurement_Value,
+    "get_measurement_value_pirani": CMD.Measurement_Value_1,
+    "get_measurement_value_piezo": CMD.Measurement_Value_2,
+}
+
+# Exceptions re-raised by the client, anything else becomes a VSR53Error
+_ERRORS = {
+    "VSR53Error": exceptions.VSR53Error,
+    "VSR53TimeoutError": exceptions.VSR53TimeoutError,
+    "VSR53ProtocolError": exceptions.VSR53ProtocolError,
+    "ValueError": ValueError,
+    "TimeoutError": TimeoutError,
+}
+
+# Failures of a request answered to the client, anything else is a bug of the server
+_REQUEST_ERRORS = (
+    VSR53Error,
+    serial.SerialException,
+    OSError,
+    CallTimeoutError,
+    RuntimeError,
+    ValueError,
+    KeyError,
+    TypeError,
+    AttributeError,
+)
+
+
+def parse_listen_address(address: str):
+    """
+    :param address: "host:port" for TCP, anything else is a Unix domain socket path
+    :return: (host, port) tuple or path
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def default_socket_path() -> str:
+    """
+    :return: vsr53.sock in the runtime directory of the user ($XDG_RUNTIME_DIR), or a
+        name of its own in the temporary directory
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return str(Path(runtime) / "vsr53.sock")
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return str(Path(tempfile.gettempdir()) / f"vsr53-{user}.sock")
+
+
+def _remove_stale_socket(path: str):
+    """
+    Removes a socket left behind by a server that died
+    :raises OSError: a server answers on ``path``
+    """
+    try:
+        if not stat.S_ISSOCK(Path(path).stat().st_mode):
+            # not ours to remove, binding reports it
+            return
+    except FileNotFoundError:
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except (ConnectionRefusedError, FileNotFoundError):
+        Path(path).unlink(missing_ok=True)
+        return
+    finally:
+        probe.close()
+    msg = f"a gauge server already listens on {path}"
+    raise OSError(errno.EADDRINUSE, msg)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server.gauge_server
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                answer = {"ok": True, "result": server.dispatch(request)}
+            except _REQUEST_ERRORS as e:
+                answer = {"ok": False, "error": str(e), "type": type(e).__name__}
+            self.wfile.write(json.dumps(answer).encode("utf-8") + b"\n")
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+else:
+    _UnixServer = None
+
+
+class GaugeServer:
+    """
+    Serves the gauges of an AcquisitionManager
+
+    Usage::
+
+        manager = AcquisitionManager(
+            [GaugeSpec("/dev/ttyUSB0", 1, "VSR53DL", rate=10)], cache=True
+        )
+        server = GaugeServer(manager)
+        try:
+            server.serve_forever()
+        finally:
+            server.close()
+
+    or ``with GaugeServer(...) as server:`` to serve from a background thread.
+    """
+
+    def __init__(
+        self,
+        manager: AcquisitionManager,
+        address=None,
+        *,
+        max_age: float | None = None,
+        call_timeout: float = 10.0,
+        mode: int = 0o600,
+    ):
+        """
+        :param manager: acquisition of the served gauges, created with ``cache=True``
+            and started with the server
+        :param address: Unix domain socket path, or (host, port) for TCP;
+            default_socket_path() by default
+        :param max_age: measurements older than this many seconds are read from the
+            gauge instead of the latest reading; by default twice the polling period
+        :param call_timeout: seconds to wait for a passed through transaction
+        :param mode: permissions of the Unix domain socket, clients can change the
+            settings of the gauges; only the user of the server by default
+        """
+        if not manager.cache:
+            msg = "the manager must enable the read cache of its gauges (cache=True)"
+            raise ValueError(msg)
+        self.manager = manager
+        self.max_age = max_age
+        self.call_timeout = call_timeout
+        self.mode = mode
+        if address is None:
+            address = default_socket_path()
+        if isinstance(address, tuple):
+            self._server = _TCPServer(address, _Handler, bind_and_activate=False)
+        elif _UnixServer is None:
+            msg = (
+                "Unix domain sockets are not supported here, use a (host, port) address"
+            )
+            raise ValueError(msg)
+        else:
+            self._server = _UnixServer(address, _Handler, bind_and_activate=False)
+        self._server.gauge_server = self
+        self._thread = None
+        self._bound = False
+
+    @property
+    def address(self):
+        """
+        Address the server listens on, with the actual port for TCP
+        """
+        return self._server.server_address
+
+    def start(self):
+        """
+        Starts the acquisition and serves requests in a background thread
+        """
+        self._bind()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="vsr53-server", daemon=True
+        )
+        self._thread.start()
+
+    def serve_forever(self):
+        self._bind()
+        self._server.serve_forever()
+
+    def _bind(self):
+        if self._bound:
+            return
+        try:
+            if isinstance(self._server.server_address, str):
+                _remove_stale_socket(self._server.server_address)
+            self._server.server_bind()
+            if isinstance(self._server.server_address, str):
+                # before listening, nobody can connect in between
+                Path(self._server.server_address).chmod(self.mode)
+            self._server.server_activate()
+        except OSError:
+            # like socketserver does when binding in its constructor
+            self._server.server_close()
+            raise
+        self._bound = True
+        if not self.manager.running:
+            self.manager.start()
+        log.info("Serving gauges on %s", self.address)
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self._bound and isinstance(self._server.server_address, str):
+            Path(self._server.server_address).unlink(missing_ok=True)
+        self._bound = False
+        self.manager.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _resolve_port(self, port):
+        ports = self.manager.ports
+        if port is None:
+            if len(ports) != 1:
+                msg = f"the server has {len(ports)} ports, choose one of {list(ports)}"
+                raise ValueError(msg)
+            return next(iter(ports))
+        if port not in ports:
+            msg = f"unknown port {port!r}"
+            raise ValueError(msg)
+        return port
+
+    def dispatch(self, request: dict):
+        op = request.get("op")
+        if op == "latest":
+            return [
+                [port, *reading] for (port, _), reading in self.manager.latest().items()
+            ]
+        if op == "ports":
+            return {
+                port: [list(spec[1:]) for spec in specs]
+                for port, specs in self.manager.ports.items()
+            }
+        if op == "call":
+            return self._call(
+                self._resolve_port(request.get("port")),
+                request.get("address", 1),
+                request["method"],
+                request.get("args", []),
+            )
+        msg = f"unknown operation {op!r}"
+        raise ValueError(msg)
+
+    def _call(self, port, address, method, args):
+        if method not in REMOTE_METHODS:
+            msg = f"{method!r} is not available remotely"
+            raise ValueError(msg)
+        cmd = _MEASUREMENT_METHODS.get(method)
+        if cmd is not None and cmd == self.manager.cmd:
+            reading = self.manager.latest().get((port, address))
+            if reading is not None and time.time() - reading.timestamp <= self._max_age(
+                port, address
+            ):
+                if reading.error is not None:
+                    raise VSR53Error(reading.error)
+                return reading.value
+        return self.manager.call(
+            port, address, method, *args, timeout=self.call_timeout
+        )
+
+    def _max_age(self, port, address):
+        if self.max_age is not None:
+            return self.max_age
+        for spec in self.manager.ports[port]:
+            if spec.address == address:
+                return 2.0 / spec.rate
+        return 0.0
+
+
+class GaugeClient:
+    """
+    Connection to a GaugeServer with the getters and setters of a VSR53 gauge
+
+    Usage::
+
+        with GaugeClient(port="/dev/ttyUSB0", address=1) as gauge:
+            print(gauge.get_measurement_value())
+    """
+
+    def __init__(
+        self,
+        server=None,
+        port: str | None = None,
+        *,
+        address: int = 1,
+        timeout: float | None = 15.0,
+    ):
+        """
+        :param server: Unix domain socket path, or (host, port) for TCP;
+            default_socket_path() by default
+        :param port: serial port of the gauge on the server, may be omitted if there is one
+        :param address: address of the gauge on that port
+        :param timeout: seconds to wait for an answer of the server
+        """
+        self.server = default_socket_path() if server is None else server
+        self.port = port
+        self.address = address
+        self.timeout = timeout
+        self._socket = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        if self._socket is not None:
+            return
+        if isinstance(self.server, tuple):
+            self._socket = socket.create_connection(self.server, self.timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(self.server)
+        self._file = self._socket.makefile("rwb")
+
+    def close(self):
+        if self._socket is None:
+            return
+        self._file.close()
+        self._socket.close()
+        self._socket = None
+        self._file = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _request(self, request: dict):
+        with self._lock:
+            self.connect()
+            try:
+                self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+                self._file.flush()
+                line = self._file.readline()
+            except OSError:
+                # a late answer would be read as the answer of the next request
+                self.close()
+                raise
+        if not line:
+            self.close()
+            msg = "The gauge server closed the connection"
+            raise VSR53Error(msg)
+        answer = json.loads(line)
+        if not answer["ok"]:
+            raise _ERRORS.get(answer["type"], VSR53Error)(answer["error"])
+        return answer["result"]
+
+    def call(self, method: str, *args):
+        result = self._request(
+            {
+                "op": "call",
+                "port": self.port,
+                "address": self.address,
+                "method": method,
+                "args": list(args),
+            }
+        )
+        return tuple(result) if isinstance(result, list) else result
+
+    def latest(self) -> dict:
+        """
+        :return: {(port, address): vsr53.bus.Reading} of every gauge on the server
+        """
+        return {
+            (port, fields[0]): Reading(*fields)
+            for port, *fields in self._request({"op": "latest"})
+        }
+
+    def ports(self) -> dict:
+        """
+        :return: {port: [[address, model, rate]]} of the gauges on the server
+        """
+        return self._request({"op": "ports"})
+
+
+def _remote_method(name):
+    def method(self, *args):
+        return self.call(name, *args)
+
+    method.__name__ = name
+    method.__qualname__ = f"GaugeClient.{name}"
+    return method
+
+
+for _name in REMOTE_METHODS:
+    setattr(GaugeClient, _name, _remote_method(_name))
@@ -0,0 +1,138 @@
+"""
+Gauge handle shared by several threads
+
+A VSR53 instance is not thread-safe: two threads calling it at once interleave
+their frames on the serial port. :class:`SharedGauge` wraps one and can be
+used from any number of threads:
+
+* transactions are serialized by a lock (the bus lock for a gauge on a
+  :class:`~vsr53.bus.VSR53Bus`)
+* concurrent calls of the same getter with the same arguments are coalesced:
+  one thread runs the transaction and every waiting caller gets its answer
+  (or its exception)
+* getters accept a ``max_age`` in seconds: an answer of the same call younger
+  than that is returned without a transaction
+
+Getters (``get_*``) are coalesced, every other method (setters, restart...)
+runs on its own and forgets the answers kept for ``max_age``::
+
+    with VSR53DL("/dev/ttyUSB0") as gauge:
+        shared = SharedGauge(gauge)
+        # from any thread
+        pressure = shared.get_measurement_value(max_age=0.5)
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import Future
+
+from vsr53.bus import BusGauge
+
+
+class SharedGauge:
+    """
+    Thread-safe handle of a gauge, with request coalescing and a freshness window
+    """
+
+    def __init__(self, gauge, *, max_age: float | None = None):
+        """
+        :param gauge: VSR53 instance, only used through this handle from now on
+        :param max_age: default max_age of the getters in seconds, None to always read
+        """
+        self.gauge = gauge
+        self.max_age = max_age
+        if isinstance(gauge, BusGauge):
+            self._lock = gauge._bus._lock
+        else:
+            self._lock = threading.RLock()
+        self._state = threading.Lock()
+        self._flights = {}  # (method, args) -> Future of the running transaction
+        self._answers = {}  # (method, args) -> (value, monotonic time)
+        self._generation = 0  # incremented by every call of another method
+        self.transactions = 0
+        self.coalesced = 0
+        self.fresh = 0
+
+    def __repr__(self):
+        return f"SharedGauge({self.gauge!r})"
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self.gauge, name)
+        if not callable(method):
+            return method
+        if name.startswith("get_"):
+
+            def getter(*args, max_age=None):
+                return self.read(name, *args, max_age=max_age)
+
+            wrapper = getter
+        else:
+
+            def call(*args, **kwargs):
+                return self.call(name, *args, **kwargs)
+
+            wrapper = call
+        wrapper.__name__ = name
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    def read(self, method: str, *args, max_age: float | None = None):
+        """
+        Calls a getter of the gauge, coalesced with the same call of other threads
+        :param method: name of the getter, e.g. "get_measurement_value"
+        :param max_age: seconds, an answer younger than that is returned without a
+            transaction; the max_age of the handle by default
+        :return: value returned by the getter
+        """
+        if max_age is None:
+            max_age = self.max_age
+        key = (method, args)
+        generation = None
+        with self._state:
+            if max_age is not None:
+                answer = self._answers.get(key)
+                if answer is not None and time.monotonic() - answer[1] <= max_age:
+                    self.fresh += 1
+                    return answer[0]
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = self._flights[key] = Future()
+                generation = self._generation
+        if generation is None:
+            # another thread runs the transaction
+            return future.result()
+        try:
+            with self._lock:
+                self.transactions += 1
+                value = getattr(self.gauge, method)(*args)
+        except BaseException as e:
+            with self._state:
+                del self._flights[key]
+            future.set_exception(e)
+            raise
+        with self._state:
+            del self._flights[key]
+            # an answer read before another method ran may be stale already
+            if generation == self._generation:
+                self._answers[key] = (value, time.monotonic())
+        future.set_result(value)
+        return value
+
+    def call(self, method: str, *args, **kwargs):
+        """
+        Calls any other method of the gauge, alone on the port
+        :return: value returned by the method
+        """
+        try:
+            with self._lock:
+                return getattr(self.gauge, method)(*args, **kwargs)
+        finally:
+            with self._state:
+                self._generation += 1
+                self._answers.clear()
@@ -0,0 +1,654 @@
+"""
+Thyracont VSR53 device simulator
+
+The simulator speaks the same ASCII protocol as the real gauges and can be
+reached in two ways:
+
+* in-process, through the ``vsr53sim://`` pyserial URL handler, which is what
+  ``VSR53DL("vsr53sim://...")`` and ``VSR53USB("vsr53sim://...")`` use
+* out-of-process, through a pseudo-terminal served by :class:`PtySimulator`
+  (POSIX only), whose ``port`` can be handed to any serial client
+
+URL format::
+
+    vsr53sim://[name][?option=value[&option=value...]]
+
+``name`` refers to a simulator registered with :meth:`VSR53Simulator.register`
+(see :attr:`VSR53Simulator.url`). Without a name a fresh simulator is built
+from the options: ``address`` (repeatable), ``product``, ``pressure``,
+``timing`` (0/1), ``seed`` and the fault rates ``garbage``, ``checksum``,
+``error`` and ``drop``.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import select
+import threading
+import time
+import urllib.parse
+import weakref
+
+from serial.serialutil import (
+    PortNotOpenError,
+    SerialBase,
+    SerialException,
+    Timeout,
+    to_bytes,
+)
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import (
+    BAUD_RATES,
+    checksum,
+    encode_binary_value,
+    encode_frame,
+    transmission_time,
+)
+from vsr53.Commands import Commands as CMD
+
+PRODUCTS = {
+    "VSR53DL": {
+        CMD.Type_Device: "VSR205",
+        CMD.Product_Name: "VSR53DL",
+        CMD.Serial_Number_Device: "20002583",
+        CMD.Serial_Number_Head: "20002583",
+        CMD.Version_Device: "2.0",
+        CMD.Version_Firmware: "0215",
+        CMD.Version_Bootloader: "2.0",
+    },
+    "VSR53USB": {
+        CMD.Type_Device: "VSR213",
+        CMD.Product_Name: "VSR53USB",
+        CMD.Serial_Number_Device: "22002816",
+        CMD.Serial_Number_Head: "22002816",
+        CMD.Version_Device: "2.0",
+        CMD.Version_Firmware: "0003",
+        CMD.Version_Bootloader: "2.0",
+    },
+}
+
+# Configuration registers and their factory defaults
+DEFAULTS = {
+    CMD.Baud_Rate: "9600",
+    CMD.Response_Delay: "5500",
+    CMD.Measurement_Range: "L5E-05H1500",
+    CMD.Display_Unit: "mbar",
+    CMD.Display_Orientation: "0",
+    CMD.Relay_1: "T1.00E-2F2.00E-2",
+    CMD.Relay_2: "T1.00E+2F2.00E+2",
+    CMD.Sensor_Transition: "1",
+    CMD.Gas_Correction_Factor_1: "1.00",
+    CMD.Analog_Output_Characteristic: "0",
+    CMD.Operating_Hours: "12345",
+    CMD.Display_Data_Source: "MV",
+    CMD.Panel_Status: "0",
+    CMD.Controller_Status: "0",
+}
+
+READ_ONLY = {
+    *PRODUCTS["VSR53DL"],
+    CMD.Measurement_Range,
+    CMD.Measurement_Value,
+    CMD.Measurement_Value_1,
+    CMD.Measurement_Value_2,
+    CMD.Operating_Hours,
+    CMD.Panel_Status,
+    CMD.Controller_Status,
+}
+
+WRITE_ONLY = {CMD.Device_Restart, CMD.Adjust_High, CMD.Adjust_Low}
+
+MEASUREMENTS = {
+    CMD.Measurement_Value,
+    CMD.Measurement_Value_1,
+    CMD.Measurement_Value_2,
+}
+
+DISPLAY_UNITS = ("mbar", "Torr", "hPa")
+
+
+def frame(address: int, access_code: int, cmd: str, data: str = "") -> bytes:
+    return encode_frame(address, access_code, cmd, data.encode("latin-1"))
+
+
+class Faults:
+    """
+    Fault injection rates, each the probability (0 ... 1) that a reply is affected
+    """
+
+    def __init__(
+        self,
+        *,
+        garbage: float = 0.0,
+        checksum: float = 0.0,
+        error: float = 0.0,
+        drop: float = 0.0,
+        error_code: str = "ERROR1",
+    ):
+        """
+        :param garbage: random bytes are sent before the reply
+        :param checksum: the reply carries a wrong checksum
+        :param error: the device answers with ERR_RX and ``error_code``
+        :param drop: the device does not answer at all
+        :param error_code: one of the keys of ErrorMessages.MSG
+        """
+        self.garbage = garbage
+        self.checksum = checksum
+        self.error = error
+        self.drop = drop
+        self.error_code = error_code
+
+
+class SimulatedDevice:
+    """
+    State of a single gauge on the simulated bus
+    """
+
+    def __init__(self, address: int, *, product: str = "VSR53DL", pressure=1013.0):
+        """
+        :param address: device address from 1 to 16
+        :param product: "VSR53DL" or "VSR53USB", selects the identification strings
+        :param pressure: pressure in mbar, either a number or a callable taking the
+            elapsed time in seconds and returning a number
+        """
+        self.address = address
+        self.product = product
+        self.pressure = pressure
+        self.registers = {**DEFAULTS, **PRODUCTS[product]}
+        self.requests = 0
+        self.restarts = 0
+        # answer binary measurement requests, older firmware refuses them
+        self.binary = True
+        # Link limits of the installation, beyond them ``unstable_loss`` of the answers are lost
+        self.max_stable_baudrate = None
+        self.min_stable_response_delay = None  # μs
+        self.unstable_loss = 0.5
+        self._started = time.monotonic()
+
+    @property
+    def baudrate(self) -> int:
+        return int(self.registers[CMD.Baud_Rate])
+
+    @property
+    def response_delay(self) -> float:
+        """Response delay in seconds"""
+        return int(self.registers[CMD.Response_Delay]) * 1e-6
+
+    @property
+    def link_unstable(self) -> bool:
+        """True when the configured baud rate or response delay exceeds the link limits"""
+        if (
+            self.max_stable_baudrate is not None
+            and self.baudrate > self.max_stable_baudrate
+        ):
+            return True
+        return (
+            self.min_stable_response_delay is not None
+            and int(self.registers[CMD.Response_Delay]) < self.min_stable_response_delay
+        )
+
+    def read_pressure(self) -> float:
+        if callable(self.pressure):
+            return float(self.pressure(time.monotonic() - self._started))
+        return float(self.pressure)
+
+    def read(self, cmd: str) -> str:
+        if cmd in MEASUREMENTS:
+            return f"{self.read_pressure():.4E}"
+        return self.registers[cmd]
+
+    def write(self, cmd: str, data: str) -> str | None:
+        """
+        Applies a write request, returns an error code or None on success
+        """
+        if cmd == CMD.Device_Restart:
+            self.restarts += 1
+            return None
+        if cmd == CMD.Baud_Rate:
+            if not data.isdigit() or int(data) not in BAUD_RATES:
+                return "_RANGE"
+        elif cmd == CMD.Response_Delay:
+            if not data.isdigit() or not 1 <= int(data) <= 99999:
+                return "_RANGE"
+        elif cmd == CMD.Display_Unit:
+            if data not in DISPLAY_UNITS:
+                return "SYNTAX"
+        elif cmd == CMD.Display_Orientation:
+            if data not in ("0", "1"):
+                return "SYNTAX"
+        elif not data:
+            return "LENGTH"
+        if cmd in self.registers:
+            self.registers[cmd] = data
+        return None
+
+
+class VSR53Simulator:
+    """
+    Protocol engine answering requests for one or many addressed devices
+    """
+
+    _registry = weakref.WeakValueDictionary()
+
+    def __init__(
+        self,
+        addresses=(1,),
+        *,
+        product: str = "VSR53DL",
+        pressure=1013.0,
+        faults: Faults | None = None,
+        seed: int | None = None,
+        timing: bool = True,
+    ):
+        """
+        :param addresses: addresses of the simulated devices
+        :param product: product of the simulated devices, "VSR53DL" or "VSR53USB"
+        :param pressure: initial pressure of every device, see SimulatedDevice
+        :param faults: fault injection rates, no faults by default
+        :param seed: seed of the random generator used for fault injection
+        :param timing: model response delay and transmission time
+        """
+        self.devices = {
+            address: SimulatedDevice(address, product=product, pressure=pressure)
+            for address in addresses
+        }
+        self.faults = faults or Faults()
+        self.timing = timing
+        self._random = random.Random(seed)
+        self._buffer = b""
+        self._name = None
+        # False simulates an unplugged device: its ports fail to open, read and write
+        self.connected = True
+
+    def __getitem__(self, address: int) -> SimulatedDevice:
+        return self.devices[address]
+
+    def register(self, name: str | None = None) -> str:
+        """
+        Makes this simulator reachable by name through the vsr53sim:// URL handler
+        :return: url
+        """
+        self._name = name or f"sim{id(self):x}"
+        self._registry[self._name] = self
+        return self.url
+
+    @property
+    def url(self) -> str:
+        if self._name is None:
+            self.register()
+        return f"vsr53sim://{self._name}"
+
+    @classmethod
+    def from_url(cls, url: str) -> VSR53Simulator:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != "vsr53sim":
+            msg = f"expected a vsr53sim:// URL, got {url!r}"
+            raise SerialException(msg)
+        if parts.netloc:
+            try:
+                return cls._registry[parts.netloc]
+            except KeyError:
+                msg = f"no simulator registered as {parts.netloc!r}"
+                raise SerialException(msg) from None
+        options = urllib.parse.parse_qs(parts.query)
+        try:
+            faults = Faults(
+                **{
+                    name: float(options[name][0])
+                    for name in ("garbage", "checksum", "error", "drop")
+                    if name in options
+                }
+            )
+            return cls(
+                [int(address) for address in options.get("address", ["1"])],
+                product=options.get("product", ["VSR53DL"])[0],
+                pressure=float(options.get("pressure", ["1013"])[0]),
+                faults=faults,
+                seed=int(options["seed"][0]) if "seed" in options else None,
+                timing=options.get("timing", ["1"])[0] not in ("0", "false"),
+            )
+        except (KeyError, ValueError) as e:
+            msg = f"invalid vsr53sim:// URL {url!r}: {e}"
+            raise SerialException(msg) from e
+
+    def feed(self, data: bytes, baudrate: int | None = None) -> list:
+        """
+        Feeds raw bytes coming from the host
+        :param data: bytes written by the host
+        :param baudrate: host baud rate, requests are lost if it does not match the device's
+        :return: list of (request, reply) tuples for every complete request
+        """
+        self._buffer += data
+        exchanges = []
+        while b"\r" in self._buffer:
+            request, self._buffer = self._buffer.split(b"\r", 1)
+            request += b"\r"
+            exchanges.append((request, self.handle(request, baudrate)))
+        return exchanges
+
+    def handle(self, request: bytes, baudrate: int | None = None) -> bytes:
+        """
+        Answers a single request frame
+        :return: reply bytes, empty if the device stays silent
+        """
+        if len(request) < 10 or not request[:3].isdigit():
+            return b""
+        address = int(request[:3])
+        device = self.devices.get(address)
+        if device is None:
+            return b""
+        if baudrate is not None and baudrate != device.baudrate:
+            return b""
+        body = request[:-2]
+        if request[-2] != checksum(body):
+            return b""
+        device.requests += 1
+        # evaluated before the request is applied: a new baud rate or delay only affects later answers
+        lost = device.link_unstable and self._random.random() < device.unstable_loss
+
+        text = body.decode("latin-1")
+        access_code = int(text[3]) if text[3].isdigit() else None
+        cmd = text[4:6]
+        data = text[8:]
+        if not text[6:8].isdigit() or int(text[6:8]) != len(data):
+            reply = frame(address, AC.ERR_RX, cmd, "LENGTH")
+        else:
+            reply = self._answer(device, access_code, cmd, data)
+        if lost:
+            return b""
+        return self._inject_faults(reply)
+
+    def _answer(self, device, access_code, cmd, data):
+        address = device.address
+        supported = cmd in device.registers or cmd in MEASUREMENTS or cmd in WRITE_ONLY
+        if not supported:
+            return frame(address, AC.ERR_RX, cmd, "NO_DEF")
+        if access_code == AC.RD_TX:
+            if cmd in WRITE_ONLY:
+                return frame(address, AC.ERR_RX, cmd, "_LOGIC")
+            return frame(address, AC.RD_RX, cmd, device.read(cmd))
+        if access_code == AC.BIN_TX and device.binary and cmd in MEASUREMENTS:
+            value = encode_binary_value(device.read_pressure())
+            return encode_frame(address, AC.BIN_RX, cmd, value)
+        if access_code == AC.WR_TX:
+            if cmd in READ_ONLY:
+                return frame(address, AC.ERR_RX, cmd, "_LOGIC")
+            error = device.write(cmd, data)
+            if error is not None:
+                return frame(address, AC.ERR_RX, cmd, error)
+            return frame(address, AC.WR_RX, cmd, data)
+        if access_code == AC.DEF_TX:
+            if cmd not in DEFAULTS or cmd in READ_ONLY:
+                return frame(address, AC.ERR_RX, cmd, "_LOGIC")
+            device.registers[cmd] = DEFAULTS[cmd]
+            return frame(address, AC.DEF_RX, cmd, DEFAULTS[cmd])
+        return frame(address, AC.ERR_RX, cmd, "_LOGIC")
+
+    def _inject_faults(self, reply):
+        faults = self.faults
+        rand = self._random.random
+        if faults.drop and rand() < faults.drop:
+            return b""
+        if faults.error and rand() < faults.error:
+            reply = frame(
+                int(reply[:3]), AC.ERR_RX, reply[4:6].decode(), faults.error_code
+            )
+        if faults.checksum and rand() < faults.checksum:
+            reply = reply[:-2] + bytes(((reply[-2] - 63) % 64 + 64, 13))
+        if faults.garbage and rand() < faults.garbage:
+            size = self._random.randint(1, 8)
+            reply = bytes(self._random.randrange(256) for _ in range(size)) + reply
+        return reply
+
+
+class SimulatedSerial(SerialBase):
+    """
+    pyserial port connected in-process to a VSR53Simulator
+    """
+
+    def __init__(self, *args, simulator: VSR53Simulator | None = None, **kwargs):
+        self.simulator = simulator
+        self._url = None  # URL the simulator was found with
+        self._pending = []  # (reply, arrival time of first byte, time per byte)
+        self._line_free = 0.0
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            msg = "Port is already open."
+            raise SerialException(msg)
+        if self.simulator is None or self._port != self._url:
+            if self._port is None:
+                msg = "Port must be configured before it can be used."
+                raise SerialException(msg)
+            self.simulator = VSR53Simulator.from_url(self._port)
+            self._url = self._port
+        if not self.simulator.connected:
+            msg = f"could not open port {self._port!r}: device disconnected"
+            raise SerialException(msg)
+        self.is_open = True
+        self.reset_input_buffer()
+
+    def close(self):
+        self.is_open = False
+        self._pending = []
+
+    def _check_connected(self):
+        if self.simulator is not None and not self.simulator.connected:
+            msg = "device disconnected"
+            raise SerialException(msg)
+
+    def _reconfigure_port(self):
+        pass
+
+    def _update_rts_state(self):
+        pass
+
+    def _update_dtr_state(self):
+        pass
+
+    def _update_break_state(self):
+        pass
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self._available(time.monotonic())
+
+    @property
+    def out_waiting(self):
+        return 0
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._check_connected()
+        data = to_bytes(data)
+        now = time.monotonic()
+        simulator = self.simulator
+        for request, reply in simulator.feed(data, self._baudrate):
+            if not reply:
+                continue
+            # the reply may start with injected garbage, the request is the reference
+            device = simulator.devices.get(int(request[:3]))
+            if simulator.timing and device is not None:
+                byte_time = transmission_time(1, device.baudrate)
+                start = (
+                    max(now, self._line_free)
+                    + len(request) * byte_time
+                    + device.response_delay
+                )
+            else:
+                byte_time = 0.0
+                start = now
+            self._pending.append([reply, start, byte_time])
+            self._line_free = start + len(reply) * byte_time
+        return len(data)
+
+    def read(self, size=1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._check_connected()
+        timeout = Timeout(self._timeout)
+        data = bytearray()
+        while len(data) < size:
+            now = time.monotonic()
+            data += self._take(size - len(data), now)
+            if len(data) >= size or timeout.expired():
+                break
+            wait = self._next_arrival(now)
+            if wait is None:
+                remaining = timeout.time_left()
+                if remaining is None:
+                    # nothing will ever arrive, do not block forever
+                    break
+                time.sleep(remaining)
+                break
+            remaining = timeout.time_left()
+            time.sleep(wait if remaining is None else max(0.0, min(wait, remaining)))
+        return bytes(data)
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self._check_connected()
+        now = time.monotonic()
+        # discard what has arrived, bytes still on the wire keep coming
+        self._take(self._available(now), now)
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def _available(self, now):
+        count = 0
+        for reply, start, byte_time in self._pending:
+            if now < start:
+                break
+            if byte_time:
+                arrived = min(len(reply), int((now - start) / byte_time) + 1)
+            else:
+                arrived = len(reply)
+            count += arrived
+            if arrived < len(reply):
+                break
+        return count
+
+    def _take(self, size, now):
+        data = bytearray()
+        while self._pending and len(data) < size:
+            entry = self._pending[0]
+            reply, start, byte_time = entry
+            if now < start:
+                break
+            if byte_time:
+                arrived = min(len(reply), int((now - start) / byte_time) + 1)
+            else:
+                arrived = len(reply)
+            n = min(arrived, size - len(data))
+            data += reply[:n]
+            if n == len(reply):
+                self._pending.pop(0)
+                continue
+            entry[0] = reply[n:]
+            entry[1] = start + n * byte_time
+            break
+        return bytes(data)
+
+    def _next_arrival(self, now):
+        if not self._pending:
+            return None
+        _, start, byte_time = self._pending[0]
+        if now < start:
+            return start - now
+        return byte_time or 0.0
+
+
+class PtySimulator:
+    """
+    Serves a VSR53Simulator on a pseudo-terminal (POSIX only)
+
+    Usage::
+
+        with PtySimulator(VSR53Simulator(product="VSR53USB")) as sim:
+            with VSR53USB(sim.port) as gauge:
+                gauge.get_measurement_value()
+    """
+
+    def __init__(self, simulator: VSR53Simulator | None = None):
+        self.simulator = simulator or VSR53Simulator()
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        import tty  # noqa: PLC0415
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _serve(self):
+        simulator = self.simulator
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                return
+            received = time.monotonic()
+            for request, reply in simulator.feed(data):
+                if not reply:
+                    continue
+                # the reply may start with injected garbage, the request is the reference
+                device = simulator.devices.get(int(request[:3]))
+                if simulator.timing and device is not None:
+                    self._write_paced(reply, received, device)
+                else:
+                    os.write(self._master, reply)
+
+    def _write_paced(self, reply, received, device):
+        byte_time = transmission_time(1, device.baudrate)
+        # the request was fully on the wire when it was read
+        start = received + device.response_delay
+        sent = 0
+        while sent < len(reply):
+            now = time.monotonic()
+            if now < start:
+                time.sleep(start - now)
+                continue
+            due = min(len(reply), int((now - start) / byte_time) + 1)
+            if due > sent:
+                os.write(self._master, reply[sent:due])
+                sent = due
+            time.sleep(byte_time)
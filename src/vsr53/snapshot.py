@@ -0,0 +1,53 @@
+"""
+Consistent readings of several channels taken in one burst
+"""
+
+from __future__ import annotations
+
+# Error status of a snapshot field that is not an ERR_RX code from the device
+TIMEOUT = "TIMEOUT"
+PROTOCOL = "PROTOCOL"
+INVALID = "INVALID"  # the answer could not be converted to a value
+
+
+class Snapshot:
+    """
+    Values of several commands read back to back, with a single acquisition timestamp
+
+    ``values`` and ``errors`` follow the order of ``commands``; a field with an error has
+    the value None and its error is an ERR_RX code (e.g. "NO_DEF") or one of TIMEOUT,
+    PROTOCOL and INVALID.
+    """
+
+    __slots__ = ("commands", "duration", "errors", "timestamp", "values")
+
+    def __init__(self, commands, values, errors, timestamp, duration):
+        """
+        :param timestamp: time.time() when the burst started
+        :param duration: time in seconds from the first request to the last answer
+        """
+        self.commands = commands
+        self.values = values
+        self.errors = errors
+        self.timestamp = timestamp
+        self.duration = duration
+
+    def __getitem__(self, cmd):
+        return self.values[self.commands.index(cmd)]
+
+    def error(self, cmd):
+        return self.errors[self.commands.index(cmd)]
+
+    @property
+    def ok(self) -> bool:
+        return not any(self.errors)
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.commands, self.values))
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{cmd}={value!r}" if error is None else f"{cmd}<{error}>"
+            for cmd, value, error in zip(self.commands, self.values, self.errors)
+        )
+        return f"Snapshot({fields}, timestamp={self.timestamp:.3f}, duration={self.duration:.4f})"
@@ -0,0 +1,144 @@
+"""
+Preallocated ring buffer for continuous acquisition
+
+Samples are stored unboxed in ``array.array`` columns (monotonic timestamp,
+pressure, status), so a buffer holding months of data costs a fixed 17 bytes
+per sample and no Python object per sample. The columns support the buffer
+protocol and can be wrapped with ``numpy.frombuffer`` without copying.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+
+STATUS_OK = 0
+STATUS_DEVICE_ERROR = 1  # the device answered with ERR_RX
+STATUS_COMMUNICATION_ERROR = 2  # no valid answer from the device
+STATUS_DISCONNECTED = 3  # the port was lost, samples are missing until the next one
+
+# How often followers check their stop event
+_STOP_POLL = 0.1
+
+
+class RingBuffer:
+    """
+    Fixed capacity buffer of (timestamp, pressure, status) samples, the oldest are overwritten
+
+    There is a single writer (the acquisition thread), readers take snapshots or follow
+    the buffer with a generator.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        :param capacity: number of samples kept
+        """
+        if capacity < 1:
+            msg = f"capacity must be positive, got {capacity}"
+            raise ValueError(msg)
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(8 * capacity))
+        self.pressures = array("d", bytes(8 * capacity))
+        self.status = array("b", bytes(capacity))
+        self._written = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def written(self) -> int:
+        """
+        Total number of samples appended since creation, overwritten ones included
+        """
+        return self._written
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    def append(self, timestamp: float, pressure: float, status: int = STATUS_OK):
+        with self._condition:
+            index = self._written % self.capacity
+            self.timestamps[index] = timestamp
+            self.pressures[index] = pressure
+            self.status[index] = status
+            self._written += 1
+            self._condition.notify_all()
+
+    def _range(self, start, stop):
+        # columns for the absolute sample positions [start, stop), oldest first
+        capacity = self.capacity
+        first, last = start % capacity, stop % capacity
+        if stop - start == 0:
+            return array("d"), array("d"), array("b")
+        if first < last:
+            return (
+                self.timestamps[first:last],
+                self.pressures[first:last],
+                self.status[first:last],
+            )
+        return (
+            self.timestamps[first:] + self.timestamps[:last],
+            self.pressures[first:] + self.pressures[:last],
+            self.status[first:] + self.status[:last],
+        )
+
+    def snapshot(self, last: int | None = None):
+        """
+        Copies the buffered samples in chronological order
+        :param last: only copy the most recent ``last`` samples
+        :return: timestamps, pressures, status arrays
+        """
+        with self._condition:
+            size = len(self) if last is None else min(last, len(self))
+            return self._range(self._written - size, self._written)
+
+    def since(self, position: int):
+        """
+        Copies the samples appended after ``position`` (a previous value of ``written``)
+        :return: new_position, (timestamps, pressures, status)
+        """
+        with self._condition:
+            start = max(position, self._written - self.capacity)
+            return self._written, self._range(start, self._written)
+
+    def close(self):
+        """
+        Marks the end of the acquisition, followers return once they have caught up
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+    def follow(
+        self, *, timeout: float | None = None, stop: threading.Event | None = None
+    ):
+        """
+        Generator of the samples appended from now on, as (timestamp, pressure, status)
+
+        A consumer slower than the producer skips the samples that were overwritten.
+        :param timeout: stop when no sample arrives within ``timeout`` seconds
+        :param stop: stop when this event is set
+        """
+        with self._condition:
+            position = self._written
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while stop is None or not stop.is_set():
+            with self._condition:
+                if position == self._written:
+                    if self.closed:
+                        return
+                    wait = None if deadline is None else deadline - time.monotonic()
+                    if wait is not None and wait <= 0:
+                        return
+                    if stop is not None:
+                        wait = _STOP_POLL if wait is None else min(wait, _STOP_POLL)
+                    self._condition.wait(wait)
+                    continue
+                position = max(position, self._written - self.capacity)
+                stop_position = self._written
+                # copied under the lock, the writer may wrap around while we yield
+                samples = zip(*self._range(position, stop_position))
+            yield from samples
+            position = stop_position
+            if timeout is not None:
+                deadline = time.monotonic() + timeout
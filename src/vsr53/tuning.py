@@ -0,0 +1,211 @@
+"""
+Automatic link tuning
+
+:func:`auto_tune` raises the baud rate of a gauge and of the host port together,
+one supported rate at a time, then shortens the response delay, measuring the
+error rate of a burst of measurement reads after every step. A step whose error
+rate exceeds the tolerance is rolled back and ends the search. The resulting
+:class:`LinkProfile` is saved in a :class:`ProfileStore` so later connections
+can open at the tuned settings directly with ``VSR53DL.from_profile(port)``.
+
+Tuning a gauge on a shared bus changes the host rate for every gauge on it,
+tune single-gauge ports only.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import BAUD_RATES, read_request
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53Error
+from vsr53.logger import log
+
+# Response delays tried, in μs, from the device default down
+RESPONSE_DELAYS = (5500, 2000, 1000, 500, 200, 100)
+
+# Attempts of the transactions that roll back a failed step
+_ROLLBACK_RETRIES = 10
+
+
+class LinkProfile(NamedTuple):
+    baudrate: int
+    response_delay: int  # μs
+    error_rate: float = 0.0  # measured with the final settings
+
+
+class ProfileStore:
+    """
+    JSON file of the tuned LinkProfile of every (port, address)
+    """
+
+    def __init__(self, path: str | os.PathLike | None = None):
+        """
+        :param path: file holding the profiles, by default $VSR53_PROFILES or
+            ~/.config/vsr53/profiles.json
+        """
+        if path is None:
+            path = os.environ.get("VSR53_PROFILES") or (
+                Path.home() / ".config" / "vsr53" / "profiles.json"
+            )
+        self.path = Path(path)
+
+    @staticmethod
+    def _key(port: str, address: int) -> str:
+        return f"{port}#{address}"
+
+    def _load(self) -> dict:
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def get(self, port: str, address: int = 1) -> LinkProfile | None:
+        entry = self._load().get(self._key(port, address))
+        if entry is None:
+            return None
+        return LinkProfile(**entry)
+
+    def _dump(self, profiles: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # write and rename, a crash never leaves a truncated file behind
+        temporary = self.path.with_suffix(".tmp")
+        with temporary.open("w", encoding="utf-8") as file:
+            json.dump(profiles, file, indent=2, sort_keys=True)
+        temporary.replace(self.path)
+
+    def save(self, port: str, address: int, profile: LinkProfile):
+        profiles = self._load()
+        profiles[self._key(port, address)] = profile._asdict()
+        self._dump(profiles)
+
+    def remove(self, port: str, address: int = 1):
+        profiles = self._load()
+        if profiles.pop(self._key(port, address), None) is not None:
+            self._dump(profiles)
+
+
+def measure_error_rate(gauge, probes: int = 20) -> float:
+    """
+    Fraction of failed measurement reads, each read is attempted once
+    :param probes: number of reads
+    :return: error_rate
+    """
+    request = read_request(gauge._address, CMD.Measurement_Value)
+    failures = 0
+    retries = gauge._max_retries
+    gauge._max_retries = 0
+    try:
+        for _ in range(probes):
+            try:
+                pack = gauge._instruction_exchange(request)
+            except VSR53Error:
+                failures += 1
+                continue
+            if pack.access_code == AC.ERR_RX:
+                failures += 1
+    finally:
+        gauge._max_retries = retries
+    return failures / probes
+
+
+def _with_rollback_retries(gauge, setter, value):
+    retries = gauge._max_retries
+    gauge._max_retries = _ROLLBACK_RETRIES
+    try:
+        setter(value)
+    finally:
+        gauge._max_retries = retries
+
+
+def _restore_baudrate(gauge, baudrate, tried):
+    # the host talks at ``tried``, the device hopefully too
+    try:
+        _with_rollback_retries(gauge, gauge.set_baud_rate, baudrate)
+    except VSR53Error:
+        # the device may not have switched in the first place
+        log.warning("Could not switch the device back to %s Bd", baudrate)
+        gauge._set_host_baudrate(baudrate)
+        if measure_error_rate(gauge, 3) == 1.0:
+            gauge._set_host_baudrate(tried)
+            msg = f"Lost the device while falling back from {tried} to {baudrate} Bd"
+            raise VSR53Error(msg) from None
+
+
+def auto_tune(
+    gauge,
+    *,
+    baud_rates=BAUD_RATES,
+    response_delays=RESPONSE_DELAYS,
+    probes: int = 20,
+    max_error_rate: float = 0.0,
+    store: ProfileStore | None = None,
+    save: bool = True,
+) -> LinkProfile:
+    """
+    Finds the highest stable baud rate and then the shortest stable response delay
+    :param gauge: open gauge, talking at its current settings
+    :param baud_rates: candidate rates, only those above the current one are tried
+    :param response_delays: candidate delays in μs, only those below the current one are tried
+    :param probes: reads per step to measure the error rate
+    :param max_error_rate: highest error rate accepted for a step
+    :param store: where to save the profile, the default ProfileStore unless given
+    :param save: save the profile so that from_profile opens at the tuned settings
+    :return: profile
+    """
+    error_rate = measure_error_rate(gauge, probes)
+    if error_rate > max_error_rate:
+        msg = f"The link is already unstable at the current settings ({error_rate:.0%} errors)"
+        raise VSR53Error(msg)
+
+    baudrate = gauge._serial.baudrate
+    for candidate in sorted(rate for rate in baud_rates if rate > baudrate):
+        log.info("Trying %s Bd", candidate)
+        try:
+            gauge.set_baud_rate(candidate)
+        except VSR53Error:
+            # the answer may have been lost after the device switched
+            gauge._set_host_baudrate(candidate)
+            _restore_baudrate(gauge, baudrate, candidate)
+            break
+        if gauge._serial.baudrate != candidate:
+            # the host only follows a WR_RX answer, anything else is a refusal
+            log.info("The device refused %s Bd", candidate)
+            break
+        rate = measure_error_rate(gauge, probes)
+        if rate > max_error_rate:
+            log.info("%s Bd is unstable (%.0f%% errors)", candidate, rate * 100)
+            _restore_baudrate(gauge, baudrate, candidate)
+            break
+        baudrate, error_rate = candidate, rate
+
+    response_delay = int(gauge.get_response_delay())
+    for candidate in sorted(
+        (delay for delay in response_delays if delay < response_delay), reverse=True
+    ):
+        log.info("Trying a response delay of %s μs", candidate)
+        try:
+            gauge.set_response_delay(candidate)
+            if gauge._response_delay != candidate:
+                # only a WR_RX answer is applied, anything else is a refusal
+                log.info("The device refused a response delay of %s μs", candidate)
+                break
+            rate = measure_error_rate(gauge, probes)
+        except VSR53Error:
+            rate = 1.0
+        if rate > max_error_rate:
+            log.info("%s μs is unstable (%.0f%% errors)", candidate, rate * 100)
+            _with_rollback_retries(gauge, gauge.set_response_delay, response_delay)
+            break
+        response_delay, error_rate = candidate, rate
+
+    profile = LinkProfile(baudrate, response_delay, error_rate)
+    log.info("Tuned link: %s", profile)
+    if save:
+        (store or ProfileStore()).save(gauge._serial.port, gauge._address, profile)
+    return profile
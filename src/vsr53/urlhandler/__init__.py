@@ -0,0 +1,5 @@
+"""
+pyserial URL handlers provided by this package, see serial.serial_for_url
+"""
+
+from __future__ import annotations
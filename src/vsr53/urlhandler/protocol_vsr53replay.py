@@ -0,0 +1,9 @@
+"""
+URL handler for the replay of captured traffic, ``vsr53replay://``
+"""
+
+from __future__ import annotations
+
+from vsr53.capture import ReplaySerial as Serial
+
+__all__ = ["Serial"]
@@ -0,0 +1,9 @@
+"""
+URL handler for the in-process device simulator, ``vsr53sim://``
+"""
+
+from __future__ import annotations
+
+from vsr53.simulator import SimulatedSerial as Serial
+
+__all__ = ["Serial"]
@@ -1,36 +1,185 @@
 from __future__ import annotations
 
-import re
+import contextlib
+import math
+import threading
+import time
 from abc import ABC, abstractmethod
+from time import perf_counter
 
 import serial
 import serial.rs485
 
-from vsr53 import ErrorMessages
+from vsr53 import ErrorMessages, snapshot
 from vsr53.AccessCodes import AccessCode as AC
+from vsr53.cache import ResponseCache
+from vsr53.codec import (
+    FrameParser,
+    answer_timeout,
+    decode_binary_value,
+    read_request,
+    write_request,
+)
 from vsr53.Commands import Commands as CMD
 from vsr53.DisplayModes import Orientation as Orientation
 from vsr53.DisplayModes import Units as Units
+from vsr53.exceptions import (
+    VSR53ChecksumError,
+    VSR53Error,
+    VSR53FramingError,
+    VSR53ProtocolError,
+    VSR53TimeoutError,
+)
 from vsr53.logger import log
-from vsr53.ThyrCommPackage import ThyrCommPackage
+from vsr53.metrics import Metrics
+from vsr53.parsers import (
+    DATA_PARSERS,
+    MEASUREMENT_COMMANDS,
+    decode_answer,
+)
+from vsr53.reconnect import Reconnect
+from vsr53.stream import (
+    STATUS_COMMUNICATION_ERROR,
+    STATUS_DEVICE_ERROR,
+    STATUS_DISCONNECTED,
+    STATUS_OK,
+    RingBuffer,
+)
+from vsr53.tuning import ProfileStore
+
+# Default channels of read_snapshot
+SNAPSHOT_COMMANDS = (
+    CMD.Measurement_Value,
+    CMD.Measurement_Value_1,
+    CMD.Measurement_Value_2,
+)
+
+# Error codes of devices that do not support binary access
+_BINARY_REFUSALS = ("NO_DEF", "_LOGIC", "SYNTAX")
+
+# Longest wait between two attempts of a transaction, in seconds
+_MAX_BACKOFF = 0.1
+
+if "vsr53.urlhandler" not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append("vsr53.urlhandler")
+
+
+def rs485_serial(port: str, baudrate: int = 9600):
+    """
+    Creates, without opening it, the serial port of an RS485 bus
+    :param port: device label assigned by the operating system, or a pyserial URL
+    :param baudrate: Baud rate for data transmission
+    :return: serial_port
+    """
+    if "://" in port:
+        serial_port = serial.serial_for_url(port, do_not_open=True)
+    else:
+        serial_port = serial.rs485.RS485()
+        serial_port.port = port
+    serial_port.baudrate = baudrate
+    serial_port.parity = serial.PARITY_NONE
+    serial_port.stopbits = serial.STOPBITS_ONE
+    serial_port.bytesize = serial.EIGHTBITS
+    if isinstance(serial_port, serial.rs485.RS485):
+        serial_port.rs485_mode = serial.rs485.RS485Settings()
+    return serial_port
+
+
+# Commands read or written by the plain getters and setters, the asyncio clients
+# (vsr53.aio) are built from these tables
+READ_METHODS = {
+    "get_device_type": CMD.Type_Device,
+    "get_product_name": CMD.Product_Name,
+    "get_serial_number_device": CMD.Serial_Number_Device,
+    "get_serial_number_head": CMD.Serial_Number_Head,
+    "get_device_version": CMD.Version_Device,
+    "get_firmware_version": CMD.Version_Firmware,
+    "get_bootloader_version": CMD.Version_Bootloader,
+    "get_response_delay": CMD.Response_Delay,
+    "get_display_unit": CMD.Display_Unit,
+    "get_display_orientation": CMD.Display_Orientation,
+    "get_operating_hours": CMD.Operating_Hours,
+    "get_measurement_range": CMD.Measurement_Range,
+    "get_measurement_value": CMD.Measurement_Value,
+    "get_measurement_value_pirani": CMD.Measurement_Value_1,
+    "get_measurement_value_piezo": CMD.Measurement_Value_2,
+    "get_relay_1_status": CMD.Relay_1,
+    "get_relay_2_status": CMD.Relay_2,
+}
+WRITE_METHODS = {
+    "set_display_unit": CMD.Display_Unit,
+    "set_display_orientation": CMD.Display_Orientation,
+    "set_relay_1_status": CMD.Relay_1,
+    "set_relay_2_status": CMD.Relay_2,
+}
 
 
 class VSR53(ABC):
+    # Attempts per transaction after the first one, None retries forever
+    _max_retries = 3
+    # Wait before the first retry in seconds, doubled on every further retry
+    _retry_backoff = 0.005
+    # Response delay configured in the device in μs, the device default until changed
+    _response_delay = 5500
+    _stream = None
+    # Transaction instrumentation, see enable_metrics
+    metrics = None
+    # Cache of identification and configuration reads, see enable_cache
+    cache = None
+    # Recovery from lost ports, see enable_reconnect
+    reconnect = None
+    # Number of times the port was lost and reopened
+    reconnects = 0
+    # Attempts to open the port in open_communication
+    _open_attempts = 5
+    # Measurements are read with binary access, see enable_binary
+    _binary = False
+    _stream_thread = None
+    _stream_stop = None
+
     @abstractmethod
     def __init__(self):
         self._serial = None
         self._address = None
 
+    @classmethod
+    def from_profile(cls, port: str, *, address: int = 1, store=None):
+        """
+        Creates a gauge with the link settings saved by vsr53.tuning.auto_tune for this port
+        and address, or with the device defaults when none were saved
+        :param store: vsr53.tuning.ProfileStore, the default store unless given
+        :return: gauge
+        """
+        profile = (store or ProfileStore()).get(port, address)
+        if profile is None:
+            return cls(port, address=address)
+        return cls(
+            port,
+            address=address,
+            baudrate=profile.baudrate,
+            response_delay=profile.response_delay,
+        )
+
     def open_communication(self):
-        opening_port_trials = 0
-        if self._serial.isOpen():
+        """
+        Opens the port, with up to _open_attempts attempts
+        :return: None
+        """
+        if self._serial.is_open:
             self._serial.flush()
             log.info("Port is Open!")
-        elif not self._serial.isOpen() and opening_port_trials < 5:
+            return
+        for attempt in range(1, self._open_attempts + 1):
             log.info("Port closed, trying to open...")
-            self._serial.open()
-            opening_port_trials += 1
-            self.open_communication()
+            try:
+                self._serial.open()
+            except serial.SerialException:
+                if attempt == self._open_attempts:
+                    raise
+                time.sleep(self._retry_backoff * 2 ** (attempt - 1))
+            else:
+                log.info("Port is Open!")
+                return
 
     def close_communication(self):
         """
@@ -53,10 +202,8 @@ class VSR53(ABC):
         Query of device type, e.g. VSR205
         :return: device_type
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Type_Device
-        device_type = self._read_data_transaction(pack)
-        log.info(f"Device type: {device_type}")
+        device_type = self._read_data_transaction(CMD.Type_Device)
+        log.info("Device type: %s", device_type)
         return device_type
 
     def get_product_name(self):
@@ -64,10 +211,8 @@ class VSR53(ABC):
         Query of product name (article number)
         :return: product_name
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Product_Name
-        product_name = self._read_data_transaction(pack)
-        log.info(f"Product name: {product_name}")
+        product_name = self._read_data_transaction(CMD.Product_Name)
+        log.info("Product name: %s", product_name)
         return product_name
 
     def get_serial_number_device(self):
@@ -75,10 +220,8 @@ class VSR53(ABC):
         Query of device serial number
         :return: device_serial_number
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Serial_Number_Device
-        device_serial_number = self._read_data_transaction(pack)
-        log.info(f"Device serial number: {device_serial_number}")
+        device_serial_number = self._read_data_transaction(CMD.Serial_Number_Device)
+        log.info("Device serial number: %s", device_serial_number)
         return device_serial_number
 
     def get_serial_number_head(self):
@@ -86,10 +229,8 @@ class VSR53(ABC):
         Query of sensor head serial number
         :return: sensor_head_serial_number
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Serial_Number_Head
-        sensor_head_serial_number = self._read_data_transaction(pack)
-        log.info(f"Head serial number: {sensor_head_serial_number}")
+        sensor_head_serial_number = self._read_data_transaction(CMD.Serial_Number_Head)
+        log.info("Head serial number: %s", sensor_head_serial_number)
         return sensor_head_serial_number
 
     def get_device_version(self):
@@ -97,10 +238,8 @@ class VSR53(ABC):
         Query of the device’s hardware version
         :return: device_version
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Version_Device
-        device_version = float(self._read_data_transaction(pack))
-        log.info(f"Device version: {device_version}")
+        device_version = self._read_value(CMD.Version_Device)
+        log.info("Device version: %s", device_version)
         return device_version
 
     def get_firmware_version(self):
@@ -108,10 +247,8 @@ class VSR53(ABC):
         Query of the device’s firmware version
         :return: firmware_version
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Version_Firmware
-        firmware_version = self._read_data_transaction(pack)
-        log.info(f"Firmware version: {firmware_version}")
+        firmware_version = self._read_data_transaction(CMD.Version_Firmware)
+        log.info("Firmware version: %s", firmware_version)
         return firmware_version
 
     def get_bootloader_version(self):
@@ -119,23 +256,21 @@ class VSR53(ABC):
         Query of the device’s bootloader version
         :return: bootloader_version
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Version_Bootloader
-        bootloader_version = float(self._read_data_transaction(pack))
-        log.info(f"Bootloader version: {bootloader_version}")
+        bootloader_version = self._read_value(CMD.Version_Bootloader)
+        log.info("Bootloader version: %s", bootloader_version)
         return bootloader_version
 
     def set_baud_rate(self, baud_rate):
         """
-        Set the baud rate for data transmission
+        Set the baud rate for data transmission, the host port follows once the device accepts it
         :param baud_rate: Value possibilities: 9600, 14400, 19200, 28800, 38400, 57600, 115200 Bd
         :return:None
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Baud_Rate
-        pack.data = baud_rate
-        log.info(f"Setting baud rate to {baud_rate}")
-        self._write_data_transaction(pack)
+        log.info("Setting baud rate to %s", baud_rate)
+        pack = self._write_data_transaction(CMD.Baud_Rate, baud_rate)
+        if pack.access_code == AC.WR_RX:
+            # the device answers at the old rate and switches afterwards
+            self._set_host_baudrate(int(baud_rate))
 
     def get_response_delay(self):
         """
@@ -143,10 +278,8 @@ class VSR53(ABC):
         Value range: 1 ... 99999 μs (default 5500 μs)
         :return: response_delay
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Response_Delay
-        response_delay = float(self._read_data_transaction(pack))
-        log.info(f"Response delay: {response_delay}")
+        response_delay = self._read_value(CMD.Response_Delay)
+        log.info("Response delay: %s", response_delay)
         return response_delay
 
     def set_response_delay(self, response_delay):
@@ -155,21 +288,19 @@ class VSR53(ABC):
         :param response_delay: Value range: 1 ... 99999 μs (default 5500 μs)
         :return:
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Response_Delay
-        pack.data = response_delay
-        log.info(f"Setting response delay to: {response_delay}")
-        self._write_data_transaction(pack)
+        log.info("Setting response delay to: %s", response_delay)
+        pack = self._write_data_transaction(CMD.Response_Delay, response_delay)
+        if pack.access_code == AC.WR_RX:
+            self._response_delay = float(response_delay)
+            self._update_timeout()
 
     def get_display_unit(self):
         """
         Query the display unit in the device's display
         :return: display_unit
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Display_Unit
-        display_unit = self._read_data_transaction(pack)
-        log.info(f"Display units: {display_unit}")
+        display_unit = self._read_data_transaction(CMD.Display_Unit)
+        log.info("Display units: %s", display_unit)
         return display_unit
 
     def set_display_unit(self, display_unit):
@@ -178,24 +309,19 @@ class VSR53(ABC):
         :param display_unit: Selectable amongst :Units.MBAR, Units.TORR and Units.HPA
         :return:
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Display_Unit
-        pack.data = display_unit
-        log.info(f"Setting display units to: {display_unit}")
-        self._write_data_transaction(pack)
+        log.info("Setting display units to: %s", display_unit)
+        self._write_data_transaction(CMD.Display_Unit, display_unit)
 
     def get_display_orientation(self):
         """
         Get the display orientation of the device NORMAL or ROTATED
         :return: display_orientation
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Display_Orientation
-        display_orientation = self._read_data_transaction(pack)
+        display_orientation = self._read_data_transaction(CMD.Display_Orientation)
         display_orientation_name = "NORMAL"
         if int(display_orientation) != int(Orientation.NORMAL):
             display_orientation_name = "ROTATED"
-        log.info(f"Display orientation: {display_orientation_name}")
+        log.info("Display orientation: %s", display_orientation_name)
         return display_orientation
 
     def set_display_orientation(self, display_orientation):
@@ -204,21 +330,16 @@ class VSR53(ABC):
         :param display_orientation: Selectable amongst Orientation.NORMAL and Orientation.ROTATED
         :return:
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Display_Orientation
-        pack.data = display_orientation
-        log.info(f"Setting display orientation to {display_orientation}")
-        self._write_data_transaction(pack)
+        log.info("Setting display orientation to %s", display_orientation)
+        self._write_data_transaction(CMD.Display_Orientation, display_orientation)
 
     def get_operating_hours(self):
         """
         Query the device's operating hours
         :return: operating_hours
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Operating_Hours
-        operating_hours = float(self._read_data_transaction(pack)) / 4.0
-        log.info(f"Device's been operating for {operating_hours}h")
+        operating_hours = self._read_value(CMD.Operating_Hours)
+        log.info("Device's been operating for %sh", operating_hours)
         return operating_hours
 
     def get_measurement_range(self):
@@ -226,25 +347,17 @@ class VSR53(ABC):
         Query measurement range of the gauge
         :return: measurement_range_lo, measurement_range_hi
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Measurement_Range
-        data = self._read_data_transaction(pack)
-        measurement_range_lo = float(data[1:6])
-        measurement_range_hi = float(data[7:11])
-        log.info(
-            f"Measurement range is: {measurement_range_lo, measurement_range_hi} {Units.MBAR}"
-        )
-        return measurement_range_lo, measurement_range_hi
+        measurement_range = self._read_value(CMD.Measurement_Range)
+        log.info("Measurement range is: %s %s", measurement_range, Units.MBAR)
+        return measurement_range
 
     def get_measurement_value(self):
         """
         Query current pressure measurement
         :return: pressure_measurement
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Measurement_Value
-        pressure_measurement = float(self._read_data_transaction(pack))
-        log.info(f"Measurement is: {pressure_measurement} {Units.MBAR}")
+        pressure_measurement = self._read_measurement(CMD.Measurement_Value)
+        log.info("Measurement is: %s %s", pressure_measurement, Units.MBAR)
         return pressure_measurement
 
     def get_measurement_value_pirani(self):
@@ -252,10 +365,8 @@ class VSR53(ABC):
         Query current pressure measurement of the Pirani sensor
         :return: pressure_measurement
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Measurement_Value_1
-        pressure_measurement = float(self._read_data_transaction(pack))
-        log.info(f"Measurement with pirani is: {pressure_measurement} {Units.MBAR}")
+        pressure_measurement = self._read_measurement(CMD.Measurement_Value_1)
+        log.info("Measurement with pirani is: %s %s", pressure_measurement, Units.MBAR)
         return pressure_measurement
 
     def get_measurement_value_piezo(self):
@@ -263,10 +374,8 @@ class VSR53(ABC):
         Query current pressure measurement of the Piezo sensor
         :return: pressure_measurement
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Measurement_Value_2
-        pressure_measurement = float(self._read_data_transaction(pack))
-        log.info(f"Measurement with piezo is: {pressure_measurement} {Units.MBAR}")
+        pressure_measurement = self._read_measurement(CMD.Measurement_Value_2)
+        log.info("Measurement with piezo is: %s %s", pressure_measurement, Units.MBAR)
         return pressure_measurement
 
     def get_relay_1_status(self):
@@ -274,28 +383,18 @@ class VSR53(ABC):
         Get Relay 1 Status
         :return: relay_1_status
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Relay_1
-        relay_1_status = self._read_data_transaction(pack)
-        pattern1 = "T(.*?)F"
-        t_value = float(re.search(pattern1, relay_1_status).group(1))
-        f_value = float(str(relay_1_status).split("F", 1)[1])
-        log.info(f"Relay 1 status: T{t_value} and F{f_value}")
-        return t_value, f_value
+        relay_1_status = self._read_value(CMD.Relay_1)
+        log.info("Relay 1 status: T%s and F%s", *relay_1_status)
+        return relay_1_status
 
     def get_relay_2_status(self):
         """
         Get Relay 2 Status
         :return: relay_2_status
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Relay_2
-        relay_2_status = self._read_data_transaction(pack)
-        pattern1 = "T(.*?)F"
-        t_value = float(re.search(pattern1, relay_2_status).group(1))
-        f_value = float(str(relay_2_status).split("F", 1)[1])
-        log.info(f"Relay 2 status: T{t_value} and F{f_value}")
-        return t_value, f_value
+        relay_2_status = self._read_value(CMD.Relay_2)
+        log.info("Relay 2 status: T%s and F%s", *relay_2_status)
+        return relay_2_status
 
     def set_relay_1_status(self, relay_status):
         """
@@ -303,11 +402,8 @@ class VSR53(ABC):
         :return: relay_1_status
         :param relay_status: Not defined in discrete values yet, a string with the appropriate format has to used
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Relay_1
-        pack.relay_status = relay_status
-        log.info(f"Setting Relay 1 status: {relay_status}")
-        self._write_data_transaction(pack)
+        log.info("Setting Relay 1 status: %s", relay_status)
+        self._write_data_transaction(CMD.Relay_1, relay_status)
 
     def set_relay_2_status(self, relay_status):
         """
@@ -315,58 +411,413 @@ class VSR53(ABC):
         :return: relay_2_status
         :param relay_status: Not defined in discrete values yet, a string with the appropriate format has to used
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Relay_2
-        pack.relay_status = relay_status
-        log.info(f"Setting Relay 2 status: {relay_status}")
-        self._write_data_transaction(pack)
+        log.info("Setting Relay 2 status: %s", relay_status)
+        self._write_data_transaction(CMD.Relay_2, relay_status)
 
     def restart_device(self):
         """
-        Makes device restart
+        Makes device restart, the read cache is cleared
         :return: None
         """
-        pack = ThyrCommPackage(self._address)
-        pack.cmd = CMD.Device_Restart
-        pack.data = 0
         log.info("Restarting device")
-        self._write_data_transaction(pack)
-
-    def _read_data_transaction(self, pack):
-        pack.data = 0
-        pack.access_code = AC.RD_TX
-        self._instruction_exchange(pack)
-        return pack.data
-
-    def _write_data_transaction(self, pack):
-        pack.access_code = AC.WR_TX
-        return self._instruction_exchange(pack)
-
-    def _instruction_exchange(self, pack):
-        fine_transaction = False
-        message = b""
-        while not fine_transaction:
-            self._send_message(pack)
-            message = self._receive_message()
-            if message != b"" and message[-1] == 13 and len(message) < 30:
-                fine_transaction = True
+        self._write_data_transaction(CMD.Device_Restart)
+
+    def read_snapshot(self, commands=SNAPSHOT_COMMANDS):
+        """
+        Reads several commands back to back, answers are only converted once the burst is over
+        :param commands: commands to read, by default MV, M1 (Pirani) and M2 (Piezo)
+        :return: snapshot
+        """
+        commands = tuple(commands)
+        requests = [self._read_request(cmd) for cmd in commands]
+        answers = []
+        timestamp = time.time()
+        started = perf_counter()
+        for request in requests:
+            try:
+                answers.append(self._instruction_exchange(request))
+            except VSR53TimeoutError:
+                answers.append(snapshot.TIMEOUT)
+            except VSR53Error:
+                answers.append(snapshot.PROTOCOL)
+        duration = perf_counter() - started
+
+        values = []
+        errors = []
+        for answer in answers:
+            value = error = None
+            if isinstance(answer, str):
+                error = answer
+            elif answer.access_code == AC.ERR_RX:
+                error = answer.data
             else:
-                log.error("BAD TRANSACTION")
-                fine_transaction = False
-                self._serial.flush()
-        pack.parse_answer(message)
+                try:
+                    value = answer.value
+                except (ValueError, AttributeError, VSR53ProtocolError):
+                    error = snapshot.INVALID
+            values.append(value)
+            errors.append(error)
+        return snapshot.Snapshot(
+            commands, tuple(values), tuple(errors), timestamp, duration
+        )
+
+    @property
+    def stream(self):
+        """
+        Ring buffer of the current (or last) streaming acquisition, None if never started
+        """
+        return self._stream
+
+    def start_streaming(
+        self, period: float = 0.1, *, capacity: int = 36000, cmd=CMD.Measurement_Value
+    ):
+        """
+        Starts a background thread that reads a measurement every ``period`` seconds into a
+        preallocated ring buffer. The gauge must not be used from other threads meanwhile.
+        :param period: time between samples in seconds
+        :param capacity: number of samples kept in the ring buffer
+        :param cmd: measurement command, e.g. CMD.Measurement_Value_1 for the Pirani sensor
+        :return: ring_buffer
+        """
+        if self._stream_thread is not None:
+            msg = "Streaming is already running"
+            raise RuntimeError(msg)
+        self._stream = RingBuffer(capacity)
+        self._stream_stop = threading.Event()
+        self._stream_thread = threading.Thread(
+            target=self._stream_loop,
+            args=(cmd, period, self._stream, self._stream_stop),
+            name=f"vsr53-stream-{self._address}",
+            daemon=True,
+        )
+        log.info("Streaming every %ss", period)
+        self._stream_thread.start()
+        return self._stream
+
+    def stop_streaming(self):
+        """
+        Stops the streaming acquisition, the ring buffer stays available in ``stream``
+        :return: None
+        """
+        if self._stream_thread is None:
+            return
+        self._stream_stop.set()
+        self._stream_thread.join()
+        self._stream_thread = None
+        self._stream.close()
+        log.info("Streaming stopped")
+
+    def _stream_loop(self, cmd, period, buffer, stop):
+        request = self._read_request(cmd)
+        append = buffer.append
+        next_time = time.monotonic()
+        while not stop.is_set():
+            timestamp = time.monotonic()
+            reconnects = self.reconnects
+            try:
+                pack = self._instruction_exchange(request)
+                if self.reconnects != reconnects:
+                    # the port was lost meanwhile, mark the gap
+                    append(timestamp, math.nan, STATUS_DISCONNECTED)
+                    timestamp = time.monotonic()
+                if pack.access_code != AC.ERR_RX:
+                    value = self._measurement_value(pack)
+            except (VSR53Error, serial.SerialException, ValueError) as e:
+                log.error("Streaming transaction failed: %s", e)
+                append(timestamp, math.nan, STATUS_COMMUNICATION_ERROR)
+            else:
+                if pack.access_code == AC.ERR_RX:
+                    append(timestamp, math.nan, STATUS_DEVICE_ERROR)
+                else:
+                    append(timestamp, value, STATUS_OK)
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                # late, restart the schedule instead of bursting to catch up
+                next_time = time.monotonic()
+
+    def enable_binary(self) -> bool:
+        """
+        Switches measurement reads to binary access (BIN_TX), 4 data bytes instead of a
+        formatted number, if the device answers a binary read; otherwise they stay in ASCII
+        :return: True when measurements are read in binary
+        """
+        request = read_request(self._address, CMD.Measurement_Value, AC.BIN_TX)
+        try:
+            pack = self._instruction_exchange(request)
+            self._binary = pack.access_code == AC.BIN_RX
+            if self._binary:
+                decode_binary_value(pack.data)
+        except VSR53Error:
+            self._binary = False
+        log.info("Binary measurement reads: %s", self._binary)
+        return self._binary
+
+    def disable_binary(self):
+        self._binary = False
+
+    def _read_request(self, cmd):
+        if self._binary and cmd in MEASUREMENT_COMMANDS:
+            return read_request(self._address, cmd, AC.BIN_TX)
+        return read_request(self._address, cmd)
+
+    @staticmethod
+    def _measurement_value(pack) -> float:
+        if pack.access_code == AC.BIN_RX:
+            return decode_binary_value(pack.raw)
+        return float(pack.raw)
+
+    def _read_measurement(self, cmd):
+        if not self._binary:
+            return self._read_value(cmd)
+        pack = self._instruction_exchange(self._read_request(cmd))
+        if pack.access_code == AC.ERR_RX and pack.data in _BINARY_REFUSALS:
+            log.warning("Binary access refused (%s), back to ASCII", pack.data)
+            self._binary = False
+            return self._read_value(cmd)
+        return self._measurement_value(pack)
+
+    def _read_answer(self, cmd):
+        cache = self.cache
+        if cache is not None:
+            pack = cache.get(cmd)
+            if pack is not None:
+                return pack
+        request = read_request(self._address, cmd)
+        pack = self._instruction_exchange(request)
+        if cache is not None and pack.access_code == AC.RD_RX:
+            cache.put(cmd, pack)
+        return pack
+
+    def _read_data_transaction(self, cmd):
+        return self._read_answer(cmd).data
+
+    def _read_value(self, cmd):
+        """
+        Reads ``cmd`` and converts its data with the parser of the command
+        :raises ValueError: the device answered an error
+        """
+        return DATA_PARSERS[cmd](self._read_answer(cmd).raw)
+
+    def _write_data_transaction(self, cmd, data=None):
+        cache = self.cache
+        if cache is not None:
+            if cmd == CMD.Device_Restart:
+                cache.invalidate()
+            else:
+                cache.invalidate(cmd)
+        request = write_request(self._address, cmd, data)
+        return self._instruction_exchange(request)
+
+    def _instruction_exchange(self, request):
+        reconnect = self.reconnect
+        if reconnect is None:
+            return self._exchange(request)
+        deadline = None
+        while True:
+            try:
+                return self._exchange(request)
+            except (serial.SerialException, OSError) as e:
+                if deadline is None:
+                    log.error("Lost port %s: %s", self._serial.port, e)
+                    deadline = time.monotonic() + reconnect.timeout
+                self._reopen(reconnect, deadline, e)
+
+    def _exchange(self, request):
+        metrics = self.metrics
+        attempts = 0
+        while True:
+            attempts += 1
+            if metrics is not None:
+                started = perf_counter()
+            self._send_message(request)
+            if metrics is not None:
+                written = perf_counter()
+            try:
+                message = self._receive_message()
+                break
+            except VSR53Error as e:
+                if metrics is not None:
+                    metrics.record_failure(self._address, request[4:6], e)
+                if self._max_retries is not None and attempts > self._max_retries:
+                    raise
+                log.warning("BAD TRANSACTION (attempt %d): %s", attempts, e)
+                # let a late or garbled answer finish before discarding it
+                time.sleep(min(self._retry_backoff * 2 ** (attempts - 1), _MAX_BACKOFF))
+                self._serial.reset_input_buffer()
+        pack = decode_answer(message)
         if pack.access_code == AC.ERR_RX:
-            log.error(f"{ErrorMessages.MSG[pack.data]}")
-        return message
+            log.error("%s", ErrorMessages.MSG.get(pack.data, pack.data))
+        if metrics is not None:
+            metrics.record_transaction(
+                self._address,
+                request[4:6],
+                attempts=attempts,
+                write_time=written - started,
+                turnaround=self._header_received - written,
+                read_time=perf_counter() - self._header_received,
+                error_code=pack.data if pack.access_code == AC.ERR_RX else None,
+            )
+        return pack
+
+    def enable_reconnect(self, reconnect: Reconnect | None = None) -> Reconnect:
+        """
+        Starts recovering from lost ports (unplugged or re-enumerated USB devices): a
+        transaction failing with an I/O error waits for the port to be reopened and is sent
+        again, see vsr53.reconnect
+        :param reconnect: recovery policy, Reconnect() by default
+        :return: reconnect
+        """
+        self.reconnect = Reconnect() if reconnect is None else reconnect
+        return self.reconnect
+
+    def disable_reconnect(self):
+        self.reconnect = None
+
+    def _reopen(self, reconnect: Reconnect, deadline: float, error: Exception):
+        """
+        Reopens the port, or the port where the device moved to, before ``deadline``
+        :raises serial.SerialException: the device is not back in time
+        """
+        serial_port = self._serial
+        port = serial_port.port
+        for delay in reconnect.delays():
+            with contextlib.suppress(serial.SerialException, OSError):
+                serial_port.close()
+            try:
+                serial_port.open()
+            except (serial.SerialException, OSError) as e:
+                log.debug("Port %s is not back: %s", port, e)
+                if reconnect.serial_number is not None and self._find_device(reconnect):
+                    break
+            else:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                msg = f"Port {port} is not back after {reconnect.timeout}s"
+                raise serial.SerialException(msg) from error
+            time.sleep(min(delay, remaining))
+        self.reconnects += 1
+        log.warning("Reconnected to %s", serial_port.port)
+
+    def _find_device(self, reconnect: Reconnect) -> bool:
+        """
+        Looks for the device on the other ports, by serial number
+        :return: True with the port of the device open, False if it was not found
+        """
+        serial_port = self._serial
+        port = serial_port.port
+        for candidate in reconnect.ports():
+            if candidate == port:
+                continue
+            serial_port.port = candidate
+            try:
+                serial_port.open()
+                if self._probe_serial_number() == reconnect.serial_number:
+                    log.warning("Device found on %s", candidate)
+                    return True
+            except (serial.SerialException, OSError, VSR53Error):
+                pass
+            with contextlib.suppress(serial.SerialException, OSError):
+                serial_port.close()
+        serial_port.port = port
+        return False
+
+    def _probe_serial_number(self):
+        # a single attempt, without cache, reconnection or metrics
+        self._send_message(read_request(self._address, CMD.Serial_Number_Device))
+        return decode_answer(self._receive_message()).data
+
+    def enable_metrics(self, metrics: Metrics | None = None) -> Metrics:
+        """
+        Starts recording transaction counters and latencies
+        :param metrics: registry to record into, it can be shared among gauges; a new one by default
+        :return: metrics
+        """
+        self.metrics = Metrics() if metrics is None else metrics
+        return self.metrics
+
+    def disable_metrics(self):
+        self.metrics = None
+
+    def enable_cache(self, cache: ResponseCache | None = None) -> ResponseCache:
+        """
+        Starts answering identification and configuration reads from a cache, writes
+        invalidate the written command and restart_device clears it
+        :param cache: cache to use, its TTL table selects the cached commands; a new one
+            with vsr53.cache.default_ttls() by default
+        :return: cache
+        """
+        self.cache = ResponseCache() if cache is None else cache
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def refresh(self, *commands):
+        """
+        Forces the next reads of the given commands, or of every command without arguments,
+        to go to the device
+        :return: None
+        """
+        if self.cache is not None:
+            self.cache.invalidate(*commands)
 
-    def _send_message(self, pack):
-        log.debug(f"TXin' this: {pack.get_string()}")
-        self._serial.write(pack.get_package_ascii_list())
+    def _send_message(self, request):
+        log.debug("TXin' this: %r", request)
+        self._serial.write(request)
 
     def _receive_message(self):
-        message = self._serial.readline()
-        log.debug(f"RXin' this: {message}")
-        return message
+        """
+        Reads exactly one frame of this device, by header and announced length. Noise is
+        skipped and frames of other devices dropped, a frame failing its checksum raises
+        VSR53ChecksumError. Each read is bounded by the port timeout (see _update_timeout)
+        and the whole answer by twice that.
+        :return: message
+        """
+        parser = FrameParser(self._address)
+        serial_port = self._serial
+        deadline = None
+        while True:
+            try:
+                message = parser.next_frame()
+            except VSR53ChecksumError:
+                raise
+            except VSR53FramingError as e:
+                log.warning("%s", e)
+                continue
+            if message is not None:
+                log.debug("RXin' this: %r", message)
+                return message
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + 2 * serial_port.timeout
+            elif now > deadline:
+                msg = f"Timeout waiting for a valid answer of device {self._address}"
+                raise VSR53TimeoutError(msg)
+            chunk = serial_port.read(parser.needed)
+            if not chunk:
+                part = "end of the answer" if len(parser) else "answer"
+                msg = f"Timeout waiting for the {part} of device {self._address}"
+                raise VSR53TimeoutError(msg)
+            if self.metrics is not None and not len(parser):
+                self._header_received = perf_counter()
+            parser.feed(chunk)
+
+    def _set_host_baudrate(self, baudrate):
+        self._serial.baudrate = baudrate
+        self._update_timeout()
+
+    def _update_timeout(self):
+        """
+        Sets the port timeout to the bound of the answer time for the current baud rate
+        and response delay
+        """
+        self._serial.timeout = answer_timeout(
+            self._serial.baudrate, self._response_delay
+        )
 
 
 class VSR53DL(VSR53):
@@ -374,33 +825,44 @@ class VSR53DL(VSR53):
     Thyracont's VSR53DL vacuum sensor RS458 interface
     """
 
-    def __init__(self, port: str, *, address: int = 1, baudrate: int = 9600):
+    def __init__(
+        self,
+        port: str,
+        *,
+        address: int = 1,
+        baudrate: int = 9600,
+        response_delay: int = 5500,
+    ):
         """
         Constructor will initiate serial port communication in rs485 mode and define address for device.
-        :param port: device label assigned by the operating system when the device is connected
+        :param port: device label assigned by the operating system when the device is connected,
+            or a pyserial URL such as vsr53sim:// (see vsr53.simulator)
         :param address: Defined by the address switch mounted in the device from 1 to 16
         :param baudrate: Baud rate for data transmission
+        :param response_delay: Response delay configured in the device in μs, bounds the answer timeout
         """
-        self._serial = serial.rs485.RS485()
-        self._serial.port = port
-        self._serial.baudrate = baudrate
-        self._serial.parity = serial.PARITY_NONE
-        self._serial.stopbits = serial.STOPBITS_ONE
-        self._serial.bytesize = serial.EIGHTBITS
-        self._serial.timeout = 0.02
-        self._serial.rs485_mode = serial.rs485.RS485Settings()
+        self._serial = rs485_serial(port, baudrate)
 
         self._address = address
+        self._response_delay = response_delay
+        self._update_timeout()
 
 
 class VSR53USB(VSR53):
-    def __init__(self, port: str, *, address: int = 1, baudrate: int = 9600):
-        self._serial = serial.Serial()
-        self._serial.port = port
+    def __init__(
+        self,
+        port: str,
+        *,
+        address: int = 1,
+        baudrate: int = 9600,
+        response_delay: int = 5500,
+    ):
+        self._serial = serial.serial_for_url(port, do_not_open=True)
         self._serial.baudrate = baudrate
         self._serial.parity = serial.PARITY_NONE
         self._serial.stopbits = serial.STOPBITS_ONE
         self._serial.bytesize = serial.EIGHTBITS
-        self._serial.timeout = 0.02
 
         self._address = address
+        self._response_delay = response_delay
+        self._update_timeout()
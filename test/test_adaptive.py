@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53.adaptive import AdaptivePoller, AdaptiveRate, Deadband
+from vsr53.bus import Reading, VSR53Bus
+from vsr53.simulator import VSR53Simulator
+
+
+def test_rate_follows_the_derivative():
+    rate = AdaptiveRate(0.01, 1.0, target_change=0.01, backoff=2)
+    # a decade per second: one poll per hundredth of a decade
+    assert rate.next_period(1.0, 1.0) == pytest.approx(0.01)
+    assert rate.next_period(0.5, 0.1) == pytest.approx(0.1)
+    # stable pressure: the period grows by the backoff factor up to max_period
+    assert rate.next_period(0.1, 0.0) == pytest.approx(0.2)
+    assert rate.next_period(0.8, 0.0) == 1.0
+    assert rate.next_period(0.8, None) == 0.01
+    with pytest.raises(ValueError, match="min_period"):
+        AdaptiveRate(1.0, 0.5)
+
+
+def test_deadband():
+    deadband = Deadband(relative=0.1, absolute=1e-3, max_interval=10)
+    last = Reading(1, "MV", 1.0, 0.0)
+    assert deadband.passes(last, None)
+    assert not deadband.passes(Reading(1, "MV", 1.05, 1.0), last)
+    assert deadband.passes(Reading(1, "MV", 1.2, 1.0), last)
+    # the absolute band applies at low pressure
+    low = Reading(1, "MV", 1e-4, 0.0)
+    assert not deadband.passes(Reading(1, "MV", 5e-4, 1.0), low)
+    # heartbeat
+    assert deadband.passes(Reading(1, "MV", 1.0, 10.0), last)
+    error = Reading(1, "MV", None, 2.0, "ERROR1")
+    assert deadband.passes(error, last)
+    assert not deadband.passes(Reading(1, "MV", None, 3.0, "ERROR1"), error)
+    assert deadband.passes(Reading(1, "MV", 1.0, 4.0), error)
+    # no band
+    assert Deadband(0).passes(Reading(1, "MV", 1.0, 1.0), last)
+    assert Deadband(0).passes(Reading(1, "MV", None, 3.0, "ERROR1"), error)
+
+
+def test_bandwidth_goes_to_the_changing_gauge():
+    simulator = VSR53Simulator([1, 2], timing=False)
+    # gauge 1 pumps down by a decade per second, gauge 2 sits at base pressure
+    simulator[1].pressure = lambda t: 1000 * 10 ** (-t)
+    simulator[2].pressure = 1e-6
+    with VSR53Bus(simulator.url) as bus:
+        poller = AdaptivePoller(
+            [bus.gauge(1), bus.gauge(2)],
+            rate=AdaptiveRate(0.005, 0.2, target_change=0.01),
+            deadband=Deadband(relative=0.05),
+        )
+        updates = list(poller.updates(duration=0.6))
+    assert simulator[1].requests > 3 * simulator[2].requests
+    periods = poller.periods()
+    assert periods[1] < 0.02
+    assert periods[2] > 0.1
+    # the stable gauge is only reported once
+    assert [reading.address for reading in updates].count(2) == 1
+    assert len(updates) < poller.polls
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+
+import pytest
+
+from vsr53.aio import AsyncVSR53, AsyncVSR53DL, AsyncVSR53USB
+from vsr53.codec import answer_timeout
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53ChecksumError, VSR53TimeoutError
+from vsr53.simulator import PtySimulator, VSR53Simulator
+from vsr53.vsr53 import READ_METHODS, VSR53, WRITE_METHODS
+
+posix_only = pytest.mark.skipif(
+    sys.platform == "win32", reason="pseudo-terminals are POSIX only"
+)
+
+
+def test_device_query():
+    async def query():
+        async with AsyncVSR53DL("vsr53sim://?timing=0") as gauge:
+            assert await gauge.get_product_name() == "VSR53DL"
+            assert await gauge.get_measurement_value() == 1013.0
+            assert await gauge.get_measurement_range() == (5e-05, 1500.0)
+            assert await gauge.get_relay_2_status() == (1e2, 2e2)
+            await gauge.set_display_unit("Torr")
+            assert await gauge.get_display_unit() == "Torr"
+
+    asyncio.run(query())
+
+
+@posix_only
+def test_many_gauges_one_loop():
+    simulators = [VSR53Simulator(product="VSR53USB") for _ in range(4)]
+    for i, simulator in enumerate(simulators):
+        simulator[1].pressure = float(i)
+
+    async def query(ports):
+        gauges = [AsyncVSR53USB(port) for port in ports]
+        for gauge in gauges:
+            await gauge.open_communication()
+        try:
+            return await asyncio.gather(*(g.get_measurement_value() for g in gauges))
+        finally:
+            for gauge in gauges:
+                await gauge.close_communication()
+
+    ptys = [PtySimulator(simulator).start() for simulator in simulators]
+    try:
+        values = asyncio.run(query([pty.port for pty in ptys]))
+    finally:
+        for pty in ptys:
+            pty.stop()
+    assert values == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_timeout():
+    async def query():
+        async with AsyncVSR53DL(
+            "vsr53sim://?timing=0&drop=1", timeout=0.01, retries=1
+        ) as gauge:
+            with pytest.raises(VSR53TimeoutError):
+                await gauge.get_measurement_value()
+
+    asyncio.run(query())
+
+
+@posix_only
+def test_cancellation_leaves_port_clean():
+    simulator = VSR53Simulator(product="VSR53USB")
+    # a slow device: the answer arrives after the caller gave up
+    simulator[1].registers[CMD.Response_Delay] = "100000"
+
+    async def query(port):
+        async with AsyncVSR53USB(port) as gauge:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(gauge.get_measurement_value(), 0.02)
+            simulator[1].registers[CMD.Response_Delay] = "1000"
+            # the late measurement answer must not be taken as the product name
+            assert await gauge.get_product_name() == "VSR53USB"
+            assert await gauge.get_measurement_value() == 1013.0
+
+    with PtySimulator(simulator) as pty:
+        asyncio.run(query(pty.port))
+
+
+def test_api_mirrors_sync_class():
+    for name in (*READ_METHODS, *WRITE_METHODS):
+        assert asyncio.iscoroutinefunction(getattr(AsyncVSR53, name))
+        assert getattr(AsyncVSR53, name).__doc__ == getattr(VSR53, name).__doc__
+    for name in ("set_baud_rate", "set_response_delay", "restart_device"):
+        assert asyncio.iscoroutinefunction(getattr(AsyncVSR53, name))
+
+
+def test_timeout_follows_link_settings():
+    simulator = VSR53Simulator(timing=False)
+
+    async def query():
+        async with AsyncVSR53DL(simulator.url, response_delay=90000) as gauge:
+            assert gauge.timeout == 2 * answer_timeout(9600, 90000)
+            await gauge.set_response_delay(1000)
+            await gauge.set_baud_rate(115200)
+            assert gauge._serial.baudrate == 115200
+            assert gauge.timeout == 2 * answer_timeout(115200, 1000)
+            assert await gauge.get_measurement_value() == 1013.0
+            # refused: the host port stays where it is
+            await gauge.set_baud_rate(1234)
+            assert gauge._serial.baudrate == 115200
+
+    asyncio.run(query())
+    assert simulator[1].baudrate == 115200
+
+
+def test_checksum_errors_are_reported():
+    async def query():
+        async with AsyncVSR53DL("vsr53sim://?timing=0&checksum=1", retries=1) as gauge:
+            with pytest.raises(VSR53ChecksumError):
+                await gauge.get_measurement_value()
+
+    asyncio.run(query())
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import decode_binary_value, encode_binary_value, read_request
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53ProtocolError
+from vsr53.simulator import VSR53Simulator
+from vsr53.stream import STATUS_OK
+
+
+def test_binary_value_roundtrip():
+    data = encode_binary_value(3.2e-2)
+    assert len(data) == 4
+    assert decode_binary_value(data) == pytest.approx(3.2e-2, rel=1e-6)
+    with pytest.raises(VSR53ProtocolError):
+        decode_binary_value(b"1.0E-2")
+
+
+def test_binary_answer_is_shorter():
+    simulator = VSR53Simulator(timing=False)
+    ascii_reply = simulator.handle(read_request(1, CMD.Measurement_Value))
+    binary_reply = simulator.handle(read_request(1, CMD.Measurement_Value, AC.BIN_TX))
+    assert binary_reply[3] - 48 == AC.BIN_RX
+    assert len(binary_reply) < len(ascii_reply)
+
+
+def test_binary_measurements():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 1.5e-3
+    with VSR53DL(simulator.url) as gauge:
+        assert gauge.enable_binary()
+        assert gauge.get_measurement_value() == pytest.approx(1.5e-3, rel=1e-6)
+        assert gauge.get_measurement_value_pirani() == pytest.approx(1.5e-3, rel=1e-6)
+        snapshot = gauge.read_snapshot([CMD.Measurement_Value, CMD.Display_Unit])
+        assert snapshot.ok
+        assert snapshot[CMD.Display_Unit] == "mbar"
+        buffer = gauge.start_streaming(0.001)
+        for _, pressure, status in buffer.follow(timeout=1):
+            assert status == STATUS_OK
+            assert not math.isnan(pressure)
+            break
+        gauge.stop_streaming()
+
+
+def test_ascii_fallback():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].binary = False
+    with VSR53DL(simulator.url) as gauge:
+        assert not gauge.enable_binary()
+        assert gauge.get_measurement_value() == 1013.0
+        # the device firmware was downgraded after enable_binary
+        gauge._binary = True
+        assert gauge.get_measurement_value() == 1013.0
+        assert not gauge._binary
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from vsr53.bus import VSR53Bus
+from vsr53.simulator import Faults, VSR53Simulator
+
+
+@pytest.fixture()
+def simulator():
+    simulator = VSR53Simulator(range(1, 9), timing=False)
+    for address, device in simulator.devices.items():
+        device.pressure = address * 1e-3
+    return simulator
+
+
+def test_shared_port(simulator):
+    with VSR53Bus(simulator.url) as bus:
+        gauges = [bus.gauge(address) for address in range(1, 9)]
+        for address, gauge in enumerate(gauges, start=1):
+            assert gauge.get_measurement_value() == address * 1e-3
+            assert gauge.get_product_name() == "VSR53DL"
+        assert bus.gauge(1) is gauges[0]
+        with pytest.raises(ValueError, match="between 1 and 16"):
+            bus.gauge(17)
+
+
+def test_round_robin(simulator):
+    with VSR53Bus(simulator.url) as bus:
+        for address in range(1, 9):
+            bus.gauge(address)
+        readings = list(bus.poll(cycles=16))
+    assert [reading.address for reading in readings] == [*range(1, 9)] * 2
+    assert all(reading.value == reading.address * 1e-3 for reading in readings)
+    statistics = bus.statistics()
+    assert all(statistics[address].transactions == 2 for address in range(1, 9))
+    assert all(statistics[address].errors == 0 for address in range(1, 9))
+
+
+def test_priority(simulator):
+    bus = VSR53Bus(simulator.url)
+    bus.gauge(1, priority=3)
+    bus.gauge(2)
+    addresses = list(itertools.islice(bus.schedule("priority"), 8))
+    assert addresses.count(1) == 6
+    assert addresses.count(2) == 2
+    # the low priority gauge is not starved by a burst of the high priority one
+    assert addresses[:4].count(2) == 1
+
+
+def test_silent_gauge_does_not_stall_the_bus(simulator):
+    simulator.faults = Faults(drop=1.0)
+    with VSR53Bus(simulator.url, retries=1) as bus:
+        bus.gauge(1)
+        (reading,) = bus.poll(cycles=1)
+    assert reading.value is None
+    assert reading.error is not None
+    assert bus.statistics()[1].errors == 1
+    assert simulator[1].requests == 2
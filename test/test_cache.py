@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.cache import ResponseCache, default_ttls
+from vsr53.Commands import Commands as CMD
+from vsr53.simulator import VSR53Simulator
+
+
+@pytest.fixture()
+def simulator():
+    return VSR53Simulator(timing=False)
+
+
+def test_cache_is_opt_in(simulator):
+    with VSR53DL(simulator.url) as gauge:
+        gauge.get_device_type()
+        gauge.get_device_type()
+    assert simulator[1].requests == 2
+
+
+def test_static_reads_are_cached(simulator):
+    with VSR53DL(simulator.url) as gauge:
+        cache = gauge.enable_cache()
+        for _ in range(3):
+            assert gauge.get_device_type() == "VSR205"
+            assert gauge.get_measurement_range() == (5e-5, 1500.0)
+            gauge.get_measurement_value()
+        # measurements always go to the device
+        assert simulator[1].requests == 2 + 3
+        assert cache.hits == 4
+
+
+def test_writes_invalidate(simulator):
+    with VSR53DL(simulator.url) as gauge:
+        gauge.enable_cache()
+        assert gauge.get_display_unit() == "mbar"
+        gauge.set_display_unit("Torr")
+        assert gauge.get_display_unit() == "Torr"
+        gauge.get_device_type()
+        gauge.restart_device()
+        assert len(gauge.cache) == 0
+
+
+def test_refresh(simulator):
+    with VSR53DL(simulator.url) as gauge:
+        gauge.enable_cache()
+        gauge.get_display_orientation()
+        # changed from the keypad
+        simulator[1].registers[CMD.Display_Orientation] = "1"
+        assert gauge.get_display_orientation() == "0"
+        gauge.refresh(CMD.Display_Orientation)
+        assert gauge.get_display_orientation() == "1"
+
+
+def test_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("vsr53.cache.time.monotonic", lambda: now[0])
+    cache = ResponseCache(default_ttls(config_ttl=10))
+    cache.put(CMD.Display_Unit, "mbar")
+    cache.put(CMD.Type_Device, "VSR205")
+    cache.put(CMD.Measurement_Value, "1.0")
+    assert CMD.Measurement_Value not in cache
+    now[0] += 11
+    assert cache.get(CMD.Display_Unit) is None
+    assert cache.get(CMD.Type_Device) == "VSR205"
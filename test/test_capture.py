@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from vsr53 import VSR53DL, VSR53USB
+from vsr53.capture import RX, TX, capture, read_capture, rx_bytes
+from vsr53.decoder import decode
+from vsr53.exceptions import VSR53TimeoutError
+from vsr53.simulator import VSR53Simulator
+
+
+def session(gauge):
+    return (
+        gauge.get_measurement_value(),
+        gauge.get_product_name(),
+        gauge.get_relay_1_status(),
+    )
+
+
+@pytest.fixture()
+def recorded(tmp_path):
+    path = tmp_path / "session.cap"
+    simulator = VSR53Simulator(pressure=2.5e-4)
+    with VSR53DL(simulator.url) as gauge:
+        with capture(gauge, path):
+            expected = session(gauge)
+        # not captured anymore
+        gauge.get_measurement_value()
+    return path, expected
+
+
+def test_capture_file(recorded):
+    path, _ = recorded
+    started, records = read_capture(path)
+    assert started <= time.time()
+    assert [record.direction for record in records[:3]] == [TX, RX, RX]
+    assert records[0].data == b"0010MV00D\r"
+    timestamps = [record.timestamp for record in records]
+    assert timestamps == sorted(timestamps)
+    frames = decode(rx_bytes(path), use_numpy=False)
+    assert len(frames) == 3
+    assert all(frames.valid)
+
+
+def test_replay(recorded):
+    path, expected = recorded
+    # the capture was made with a VSR53DL, it can be replayed to any client
+    with VSR53USB(f"vsr53replay://{path}") as gauge:
+        assert session(gauge) == expected
+        # nothing left to answer
+        with pytest.raises(VSR53TimeoutError):
+            gauge.get_measurement_value()
+
+
+def test_replay_loop_and_timing(recorded):
+    path, expected = recorded
+    with VSR53DL(f"vsr53replay://{path}?loop=1") as gauge:
+        start = time.monotonic()
+        for _ in range(100):
+            assert session(gauge) == expected
+        fast = time.monotonic() - start
+    with VSR53DL(f"vsr53replay://{path}?timing=1") as gauge:
+        start = time.monotonic()
+        assert session(gauge) == expected
+        timed = time.monotonic() - start
+    # three exchanges at 9600 baud with the default response delay
+    assert timed > 0.03
+    assert fast < 100 * timed
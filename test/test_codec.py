@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import (
+    FrameParser,
+    encode_binary_value,
+    encode_frame,
+    read_request,
+    write_request,
+)
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import (
+    VSR53AddressError,
+    VSR53ChecksumError,
+    VSR53FramingError,
+)
+from vsr53.parsers import (
+    MeasurementRange,
+    RelayStatus,
+    decode_answer,
+    parse_relay_status,
+)
+from vsr53.ThyrCommPackage import ThyrCommPackage
+
+
+def test_read_request():
+    request = read_request(1, CMD.Measurement_Value)
+    assert request == b"0010MV00D\r"
+    assert read_request(1, CMD.Measurement_Value) is request
+
+
+def test_write_request():
+    assert write_request(1, CMD.Display_Unit, "mbar") == b"0012DU04mbarb\r"
+    assert write_request(1, CMD.Display_Orientation, 0) == b"0012DO010g\r"
+    assert write_request(1, CMD.Device_Restart) == b"0012DR00y\r"
+
+
+def test_matches_package():
+    pack = ThyrCommPackage(12)
+    pack.cmd = CMD.Response_Delay
+    pack.access_code = AC.WR_TX
+    pack.data = 5500
+    expected = pack.get_string().encode()
+    assert pack.get_bytes() == expected
+    assert encode_frame(12, AC.WR_TX, CMD.Response_Delay, b"5500") == expected
+
+
+def parse_all(parser):
+    results = []
+    while True:
+        try:
+            frame = parser.next_frame()
+        except VSR53FramingError as e:
+            results.append(type(e))
+            continue
+        if frame is None:
+            return results
+        results.append(frame)
+
+
+def test_frame_parser_chunks():
+    first = encode_frame(1, AC.RD_RX, CMD.Measurement_Value, b"2.50e-04")
+    # binary data holding a carriage return
+    second = encode_frame(1, AC.BIN_RX, CMD.Measurement_Value, b"\r\x00\x00\x00")
+    stream = first + second
+    parser = FrameParser(1)
+    frames = []
+    for byte in range(len(stream)):
+        assert parser.needed >= 1
+        parser.feed(stream[byte : byte + 1])
+        frames += parse_all(parser)
+    assert frames == [first, second]
+    assert len(parser) == 0
+
+
+def test_frame_parser_resynchronizes():
+    good = encode_frame(1, AC.RD_RX, CMD.Measurement_Value, b"2.50e-04")
+    corrupted = good[:-2] + bytes(((good[-2] - 63) % 64 + 64, 13))
+    other = encode_frame(2, AC.RD_RX, CMD.Measurement_Value, b"1.00e+03")
+    binary = encode_frame(1, AC.BIN_RX, CMD.Measurement_Value, encode_binary_value(1.0))
+    parser = FrameParser(1)
+    parser.feed(b"\x00\xff12" + good + corrupted + other + good[:5] + binary + good)
+    assert parse_all(parser) == [
+        VSR53FramingError,
+        good,
+        VSR53ChecksumError,
+        VSR53AddressError,
+        # a truncated frame is skipped up to the next header
+        VSR53FramingError,
+        binary,
+        good,
+    ]
+    # frames of every device without an address
+    parser = FrameParser()
+    parser.feed(other)
+    assert parser.next_frame() == other
+
+
+def test_frame_parser_errors_carry_data():
+    parser = FrameParser(1)
+    parser.feed(b"noise" + read_request(1, CMD.Measurement_Value))
+    with pytest.raises(VSR53FramingError) as error:
+        parser.next_frame()
+    assert error.value.data == b"noise"
+    assert parser.next_frame() == read_request(1, CMD.Measurement_Value)
+
+
+@pytest.mark.parametrize(
+    ("cmd", "data", "value"),
+    [
+        (CMD.Measurement_Value, b"2.50e-04", 2.5e-4),
+        (CMD.Measurement_Value_7_REL_P, b"-1.00e+01", -10.0),
+        (CMD.Measurement_Range, b"L5E-05H1500", MeasurementRange(5e-5, 1500.0)),
+        (CMD.Relay_3, b"T1.00E-2F2.00E-2", RelayStatus(1e-2, 2e-2)),
+        (CMD.Operating_Hours, b"12345", 3086.25),
+        (CMD.Controller_Status, b"3", 3),
+        (CMD.Product_Name, b"VSR53DL", "VSR53DL"),
+    ],
+)
+def test_decode_answer(cmd, data, value):
+    frame = encode_frame(12, AC.RD_RX, cmd, data)
+    answer = decode_answer(memoryview(frame))
+    assert answer == (12, AC.RD_RX, cmd, data)
+    assert answer.value == value
+    assert answer.data == data.decode()
+    pack = ThyrCommPackage(12)
+    pack.parse_answer(frame)
+    assert (pack.address, pack.access_code, pack.cmd) == answer[:3]
+    assert pack.data == answer.data
+
+
+def test_decode_special_answers():
+    binary = decode_answer(
+        encode_frame(1, AC.BIN_RX, CMD.Measurement_Value, encode_binary_value(0.5))
+    )
+    assert binary.value == 0.5
+    assert binary.data == encode_binary_value(0.5)
+    error = decode_answer(encode_frame(1, AC.ERR_RX, CMD.Measurement_Value, b"NO_DEF"))
+    assert error.value == error.data == "NO_DEF"
+    empty = decode_answer(encode_frame(1, AC.WR_RX, CMD.Device_Restart))
+    assert empty.data == 0
+    with pytest.raises(AttributeError):
+        empty.raw = b"1"
+    # the str interface is kept and gives the same typed results
+    assert parse_relay_status("T1.00E-2F2.00E-2") == (1e-2, 2e-2)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+import vsr53
+
+CORE_ONLY = """
+import sys
+sys.modules["serial"] = None  # importing pyserial fails from here on
+
+import vsr53
+from vsr53 import AccessCodes, Commands, ErrorMessages, parsers
+from vsr53.codec import encode_frame, parse_header
+from vsr53.decoder import decode
+from vsr53.logger import log
+from vsr53.ThyrCommPackage import ThyrCommPackage
+
+assert "vsr53.vsr53" not in sys.modules
+assert not log.handlers
+AC = AccessCodes.AccessCode
+frame = encode_frame(1, AC.RD_RX, Commands.Commands.Measurement_Value, b"2.50e-04")
+assert parse_header(frame) == (1, AC.RD_RX, "MV", 8)
+package = ThyrCommPackage(1)
+package.parse_answer(frame)
+assert parsers.parse_data("MV", package.data) == 2.5e-4
+assert len(decode(frame, use_numpy=False)) == 1
+try:
+    vsr53.VSR53DL
+except ImportError:
+    pass
+else:
+    raise AssertionError("the gauge classes need pyserial")
+"""
+
+
+def test_core_without_pyserial():
+    subprocess.run([sys.executable, "-c", CORE_ONLY], check=True)
+
+
+def test_lazy_gauge_classes():
+    from vsr53.vsr53 import VSR53DL, VSR53USB
+
+    assert vsr53.VSR53DL is VSR53DL
+    assert vsr53.VSR53USB is VSR53USB
+    assert "VSR53DL" in dir(vsr53)
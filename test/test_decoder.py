@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import math
+
+import pytest
+
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.codec import encode_binary_value, encode_frame
+from vsr53.decoder import decode, decode_file
+
+try:
+    import numpy as np  # noqa: F401
+
+    BACKENDS = [False, True]
+except ImportError:
+    BACKENDS = [False]
+
+CAPTURE = b"".join(
+    [
+        encode_frame(1, AC.RD_RX, "MV", b"1.0130E+03"),
+        encode_frame(2, AC.RD_RX, "DU", b"mbar"),
+        encode_frame(3, AC.BIN_RX, "MV", encode_binary_value(2.5e-3)),
+        b"0011MV04abc\x40\r",  # declared length does not match
+        encode_frame(1, AC.RD_RX, "M1", b"5.0E-2")[:-2] + b"?\r",  # bad checksum
+        b"garbage\r",
+        encode_frame(1, AC.WR_RX, "DR"),
+        b"0011MV",  # partial frame at the end
+    ]
+)
+
+
+@pytest.fixture(params=BACKENDS, ids=["python", "numpy"][: len(BACKENDS)])
+def use_numpy(request):
+    return request.param
+
+
+def test_decode(use_numpy):
+    frames = decode(CAPTURE, use_numpy=use_numpy)
+    assert len(frames) == 7
+    assert list(frames.valid) == [1, 1, 1, 0, 0, 0, 1]
+    assert list(frames.checksum_ok) == [1, 1, 1, 0, 0, 0, 1]
+    assert list(frames.address) == [1, 2, 3, 1, 1, -1, 1]
+    assert list(frames.access_code) == [1, 1, 9, 1, 1, -1, 3]
+    assert list(frames.length) == [10, 4, 4, 4, 6, -1, 0]
+    commands = [
+        command.decode() if isinstance(command, bytes) else command
+        for command in frames.command
+    ]
+    assert commands == ["MV", "DU", "MV", "MV", "M1", "", "DR"]
+    values = list(frames.value)
+    assert values[0] == 1013.0
+    assert math.isnan(values[1])
+    assert values[2] == pytest.approx(2.5e-3)
+    # the value is parsed although the checksum is wrong
+    assert values[4] == 5e-2
+    assert all(math.isnan(value) for value in values[5:])
+    assert frames.frame(1) == encode_frame(2, AC.RD_RX, "DU", b"mbar")[:-1]
+    assert frames.data(0) == b"1.0130E+03"
+    assert frames.frame(6) == encode_frame(1, AC.WR_RX, "DR")[:-1]
+
+
+def test_backends_agree(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "capture.bin"
+    path.write_bytes(CAPTURE * 100)
+    python = decode_file(path, use_numpy=False)
+    vectorized = decode_file(path, use_numpy=True)
+    assert list(python.offset) == list(vectorized.offset)
+    assert list(python.valid) == list(vectorized.valid.astype(int))
+    assert list(python.address) == list(vectorized.address)
+    assert [value if not math.isnan(value) else None for value in python.value] == [
+        value if not math.isnan(value) else None for value in vectorized.value
+    ]
+
+
+def test_empty(use_numpy, tmp_path):
+    assert len(decode(b"", use_numpy=use_numpy)) == 0
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    assert len(decode_file(path, use_numpy=use_numpy)) == 0
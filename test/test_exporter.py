@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from vsr53.exporter import OPENMETRICS_TYPE, PROMETHEUS_TYPE, Exporter
+from vsr53.manager import AcquisitionManager, GaugeSpec
+from vsr53.simulator import VSR53Simulator
+
+
+@pytest.fixture()
+def simulator():
+    return VSR53Simulator([1, 2], timing=False, pressure=5e-3)
+
+
+@pytest.fixture()
+def exporter(simulator):
+    manager = AcquisitionManager(
+        [
+            GaugeSpec(simulator.url, 1, "VSR53DL", 50),
+            GaugeSpec(simulator.url, 2, "VSR53DL", 50),
+        ],
+        metrics=True,
+    )
+    return Exporter(manager, ("127.0.0.1", 0), refresh=0.01, info_interval=60.0)
+
+
+def scrape(exporter, accept=None):
+    host, port = exporter.address
+    request = urllib.request.Request(f"http://{host}:{port}/metrics")
+    if accept is not None:
+        request.add_header("Accept", accept)
+    with urllib.request.urlopen(request, timeout=5.0) as response:
+        return response.headers["Content-Type"], response.read().decode("utf-8")
+
+
+def wait_for(exporter, text):
+    deadline = time.monotonic() + 5.0
+    while text not in exporter.body().decode("utf-8"):
+        assert time.monotonic() < deadline, f"{text} is not exported"
+        time.sleep(0.01)
+
+
+def test_exporter(simulator, exporter):
+    with exporter:
+        url = simulator.url
+        wait_for(exporter, f'vsr53_pressure{{port="{url}",address="2"}} 0.005')
+        wait_for(exporter, f'vsr53_operating_hours{{port="{url}",address="1"}}')
+
+        content_type, text = scrape(exporter)
+        assert content_type == PROMETHEUS_TYPE
+        assert f'vsr53_up{{port="{url}",address="1"}} 1' in text
+        assert f'vsr53_operating_hours{{port="{url}",address="1"}} 3086.25' in text
+        assert (
+            f'vsr53_relay_threshold{{port="{url}",address="2",relay="1",threshold="on"}}'
+            " 0.01" in text
+        )
+        assert "# TYPE vsr53_transactions_total counter" in text
+        assert (
+            f'vsr53_transactions_total{{port="{url}",address="1",command="MV"}}' in text
+        )
+        assert (
+            f'vsr53_transaction_seconds_bucket{{port="{url}",address="1",command="MV",'
+            'phase="turnaround",le="+Inf"}' in text
+        )
+        assert "# EOF" not in text
+
+        content_type, text = scrape(exporter, "application/openmetrics-text")
+        assert content_type == OPENMETRICS_TYPE
+        assert "# TYPE vsr53_transactions counter" in text
+        assert text.endswith("# EOF\n")
+
+
+def test_scrapes_do_not_touch_the_bus(simulator):
+    manager = AcquisitionManager(
+        [GaugeSpec(simulator.url, 1, "VSR53DL", 0.1)], metrics=True
+    )
+    with Exporter(manager, ("127.0.0.1", 0), refresh=0.01) as exporter:
+        wait_for(exporter, 'relay="2"')
+        requests = simulator[1].requests
+        for _ in range(20):
+            assert scrape(exporter)[1]
+        assert simulator[1].requests == requests
+
+
+def test_failures(simulator, exporter):
+    with exporter:
+        wait_for(exporter, "vsr53_up{")
+        simulator.faults.drop = 1.0
+        wait_for(exporter, f'vsr53_up{{port="{simulator.url}",address="1"}} 0')
+        wait_for(exporter, "vsr53_timeouts_total{")
+
+
+def test_the_manager_must_record_metrics(simulator):
+    manager = AcquisitionManager([GaugeSpec(simulator.url, 1, "VSR53DL")])
+    with pytest.raises(ValueError, match="metrics=True"):
+        Exporter(manager, ("127.0.0.1", 0))
+    assert not manager.metrics
+
+
+def test_rendering_survives_errors(simulator, exporter, monkeypatch):
+    families = exporter.families
+    failures = []
+
+    def failing():
+        if not failures:
+            failures.append(None)
+            msg = "rendering bug"
+            raise RuntimeError(msg)
+        return families()
+
+    monkeypatch.setattr(exporter, "families", failing)
+    with exporter:
+        wait_for(exporter, f'vsr53_pressure{{port="{simulator.url}",address="1"}}')
+    assert failures
+
+
+def test_info_reads_do_not_hold_back_rendering():
+    slow = VSR53Simulator(timing=False)
+    fast = VSR53Simulator(timing=False, pressure=5e-3)
+    read = slow[1].read
+    release = threading.Event()
+
+    def slow_read(cmd):
+        if cmd == "OH":
+            release.wait(10.0)
+        return read(cmd)
+
+    slow[1].read = slow_read
+    manager = AcquisitionManager(
+        [GaugeSpec(slow.url, 1, "VSR53DL", 50), GaugeSpec(fast.url, 1, "VSR53DL", 50)],
+        metrics=True,
+    )
+    with Exporter(manager, ("127.0.0.1", 0), refresh=0.01) as exporter:
+        try:
+            wait_for(exporter, f'vsr53_pressure{{port="{fast.url}",address="1"}} 0.005')
+            fast[1].pressure = 2e-3
+            wait_for(exporter, f'vsr53_pressure{{port="{fast.url}",address="1"}} 0.002')
+        finally:
+            release.set()
+
+
+def test_not_found(exporter):
+    with exporter:
+        host, port = exporter.address
+        with pytest.raises(urllib.error.HTTPError, match="404"):
+            urllib.request.urlopen(f"http://{host}:{port}/other", timeout=5.0)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vsr53.manager import AcquisitionManager, GaugeSpec
+from vsr53.simulator import Faults, VSR53Simulator
+
+
+@pytest.fixture()
+def simulators():
+    usb = VSR53Simulator(product="VSR53USB", timing=False, pressure=1.0)
+    bus = VSR53Simulator([1, 2], timing=False, pressure=2.0)
+    return usb, bus
+
+
+def test_invalid_specs():
+    with pytest.raises(ValueError, match="mixes"):
+        AcquisitionManager([("a", 1, "VSR53DL"), ("a", 2, "VSR53USB")])
+    with pytest.raises(ValueError, match="one VSR53USB"):
+        AcquisitionManager([("a", 1), ("a", 2)])
+    with pytest.raises(ValueError, match="unknown model"):
+        AcquisitionManager([("a", 1, "VSR54")])
+
+
+def test_merged_stream(simulators):
+    usb, bus = simulators
+    gauges = [
+        GaugeSpec(usb.url, rate=50),
+        GaugeSpec(bus.url, 1, "VSR53DL", rate=50),
+        GaugeSpec(bus.url, 2, "VSR53DL", rate=20),
+    ]
+    readings = []
+    with AcquisitionManager(gauges) as manager:
+        for item in manager.readings():
+            readings.append(item)
+            if len(readings) == 60:
+                break
+        latest = manager.latest()
+    timestamps = [item.reading.timestamp for item in readings]
+    assert timestamps == sorted(timestamps)
+    assert {(item.port, item.reading.address) for item in readings} == set(latest)
+    assert all(item.reading.error is None for item in readings)
+    assert latest[usb.url, 1].value == 1.0
+    assert latest[bus.url, 2].value == 2.0
+
+
+def test_rows(simulators):
+    usb, bus = simulators
+    gauges = [GaugeSpec(usb.url, rate=100), GaugeSpec(bus.url, 2, "VSR53DL")]
+    with AcquisitionManager(gauges) as manager:
+        rows = list(manager.rows(0.05, cycles=3, max_age=10))
+    assert len(rows) == 3
+    _, row = rows[-1]
+    assert row == {(usb.url, 1): 1.0, (bus.url, 2): 2.0}
+
+
+def test_failed_port_does_not_stall_others(simulators):
+    usb, _ = simulators
+    missing = "vsr53sim://missing"
+    gauges = [GaugeSpec(usb.url, rate=100), GaugeSpec(missing)]
+    with AcquisitionManager(gauges, reconnect_delay=0.05) as manager:
+        time.sleep(0.3)
+        latest = manager.latest()
+        errors = manager.port_errors()
+    assert errors[missing] >= 2
+    assert errors[usb.url] == 0
+    assert latest[missing, 1].error is not None
+    assert latest[usb.url, 1].value == 1.0
+    assert usb[1].requests > 10
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5.0
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_stop_fails_queued_calls(simulators):
+    usb, _ = simulators
+    device = usb[1]
+    write = device.write
+    writing = threading.Event()
+    release = threading.Event()
+
+    def blocking_write(cmd, data):
+        writing.set()
+        release.wait(5.0)
+        return write(cmd, data)
+
+    device.write = blocking_write
+    manager = AcquisitionManager([GaugeSpec(usb.url)])
+    manager.start()
+    with ThreadPoolExecutor(2) as executor:
+        running = executor.submit(
+            manager.call, usb.url, 1, "set_display_unit", "Torr", timeout=5.0
+        )
+        assert writing.wait(5.0)
+        queued = executor.submit(
+            manager.call, usb.url, 1, "get_product_name", timeout=5.0
+        )
+        wait_for(lambda: manager._commands[usb.url].qsize() == 1)
+        stopper = threading.Thread(target=manager.stop)
+        stopper.start()
+        wait_for(manager._stop.is_set)
+        release.set()
+        stopper.join()
+        assert running.result() is None
+        with pytest.raises(RuntimeError, match="stopped"):
+            queued.result()
+
+
+def test_unknown_device_errors(simulators):
+    usb, _ = simulators
+    usb.faults = Faults(error=1.0, error_code="_NEW__")
+    with AcquisitionManager([GaugeSpec(usb.url, rate=100)]) as manager:
+        assert manager.call(usb.url, 1, "get_product_name", timeout=5.0) == "_NEW__"
+        wait_for(lambda: (usb.url, 1) in manager.latest())
+        assert manager.latest()[usb.url, 1].error == "_NEW__"
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.Commands import Commands as CMD
+from vsr53.exceptions import VSR53ChecksumError
+from vsr53.metrics import Histogram, Metrics
+from vsr53.simulator import Faults, VSR53Simulator
+
+
+def test_histogram():
+    histogram = Histogram()
+    for value in (1e-4, 1e-3, 1e-3, 1e-2):
+        histogram.observe(value)
+    assert histogram.count == 4
+    assert histogram.quantile(0.5) == 1e-3
+    assert histogram.quantile(1.0) == 1e-2
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_disabled_by_default():
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        assert gauge.metrics is None
+        gauge.get_measurement_value()
+
+
+def test_transaction_metrics():
+    simulator = VSR53Simulator(timing=False, seed=3)
+    exported = []
+    with VSR53DL(simulator.url) as gauge:
+        metrics = gauge.enable_metrics()
+        metrics.add_hook(lambda *args: exported.append(args))
+        for _ in range(5):
+            gauge.get_measurement_value()
+        simulator.faults = Faults(error=1.0)
+        assert gauge._read_data_transaction(CMD.Measurement_Value) == "ERROR1"
+        simulator.faults = Faults(checksum=1.0)
+        with pytest.raises(VSR53ChecksumError):
+            gauge.get_measurement_value()
+        # with this seed the first two attempts are dropped
+        simulator.faults = Faults(drop=0.5)
+        gauge.get_product_name()
+
+    measurement = metrics.get(1, CMD.Measurement_Value)
+    assert measurement.transactions == 6
+    assert measurement.device_errors == {"ERROR1": 1}
+    # every attempt failed
+    assert measurement.checksum_failures == 4
+    assert measurement.turnaround.count == 6
+    assert measurement.write_time.count == 6
+    product_name = metrics.get(1, CMD.Product_Name)
+    assert product_name.transactions == 1
+    assert product_name.retries == product_name.timeouts == 2
+    assert len(exported) == 7
+    assert exported[0][:2] == (1, "MV")
+
+    snapshot = metrics.snapshot()
+    assert snapshot[(1, "MV")]["transactions"] == 6
+
+
+def test_shared_registry():
+    simulator = VSR53Simulator([1, 2], timing=False)
+    metrics = Metrics()
+    for address in (1, 2):
+        with VSR53DL(simulator.url, address=address) as gauge:
+            gauge.enable_metrics(metrics)
+            gauge.get_measurement_value()
+    assert set(metrics.snapshot()) == {(1, "MV"), (2, "MV")}
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+import threading
+
+import pytest
+import serial
+
+from vsr53 import VSR53DL
+from vsr53.Commands import Commands as CMD
+from vsr53.reconnect import Reconnect
+from vsr53.simulator import VSR53Simulator
+from vsr53.stream import STATUS_DISCONNECTED, STATUS_OK
+
+
+def replug(simulator, after: float) -> threading.Timer:
+    timer = threading.Timer(after, setattr, (simulator, "connected", True))
+    timer.start()
+    return timer
+
+
+def test_reconnect_delays():
+    policy = Reconnect(initial_backoff=0.1, max_backoff=0.5, candidates=lambda: ["a"])
+    delays = policy.delays()
+    assert [next(delays) for _ in range(5)] == [0.1, 0.2, 0.4, 0.5, 0.5]
+    assert policy.ports() == ["a"]
+    assert Reconnect(candidates=("a", "b")).ports() == ["a", "b"]
+
+
+def test_transaction_survives_unplug():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 2.5e-3
+    with VSR53DL(simulator.url) as gauge:
+        gauge.enable_reconnect(Reconnect(initial_backoff=0.01, timeout=5.0))
+        simulator.connected = False
+        timer = replug(simulator, 0.1)
+        assert gauge.get_measurement_value() == 2.5e-3
+        timer.join()
+        assert gauge.reconnects == 1
+        assert gauge._serial.is_open
+
+
+def test_reconnect_timeout():
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        gauge.enable_reconnect(Reconnect(initial_backoff=0.01, timeout=0.1))
+        simulator.connected = False
+        with pytest.raises(serial.SerialException, match="not back"):
+            gauge.get_measurement_value()
+        assert gauge.reconnects == 0
+        # the next transaction tries again
+        simulator.connected = True
+        assert gauge.get_measurement_value() == 1013.0
+        assert gauge.reconnects == 1
+
+
+def test_without_reconnect():
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        simulator.connected = False
+        with pytest.raises(serial.SerialException):
+            gauge.get_measurement_value()
+        gauge.disable_reconnect()
+        assert gauge.reconnect is None
+
+
+def test_device_found_on_another_port():
+    old = VSR53Simulator(timing=False)
+    other = VSR53Simulator(product="VSR53USB", timing=False)
+    new = VSR53Simulator(timing=False)
+    new[1].pressure = 5e-2
+    with VSR53DL(old.url) as gauge:
+        serial_number = gauge.get_serial_number_device()
+        assert serial_number != other[1].registers[CMD.Serial_Number_Device]
+        gauge.enable_reconnect(
+            Reconnect(
+                initial_backoff=0.01,
+                timeout=5.0,
+                serial_number=serial_number,
+                candidates=[old.url, other.url, new.url],
+            )
+        )
+        # the device comes back under another name
+        old.connected = False
+        assert gauge.get_measurement_value() == 5e-2
+        assert gauge._serial.port == new.url
+        assert gauge.reconnects == 1
+        assert gauge._max_retries > 0
+        assert gauge.reconnect is not None
+
+
+def test_streaming_marks_gap():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 2.5e-3
+    with VSR53DL(simulator.url) as gauge:
+        gauge.enable_reconnect(Reconnect(initial_backoff=0.01, timeout=5.0))
+        buffer = gauge.start_streaming(0.001, capacity=1000)
+        samples = buffer.follow(timeout=1.0)
+        next(samples)
+        simulator.connected = False
+        timer = replug(simulator, 0.1)
+        gap = next(sample for sample in samples if sample[2] != STATUS_OK)
+        after = next(samples)
+        gauge.stop_streaming()
+        timer.join()
+
+    assert gap[2] == STATUS_DISCONNECTED
+    assert math.isnan(gap[1])
+    assert after[1:] == (2.5e-3, STATUS_OK)
+    assert after[0] - gap[0] >= 0.05
+
+
+def test_open_communication_is_bounded(monkeypatch):
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        gauge._serial.close()
+        simulator.connected = False
+        attempts = []
+        original = gauge._serial.open
+
+        def open_port():
+            attempts.append(None)
+            original()
+
+        monkeypatch.setattr(gauge._serial, "open", open_port)
+        with pytest.raises(serial.SerialException):
+            gauge.open_communication()
+        assert len(attempts) == gauge._open_attempts
+        simulator.connected = True
+        gauge.open_communication()
+        assert gauge._serial.is_open
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import csv
+import math
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.__main__ import main
+from vsr53.bus import Reading
+from vsr53.Commands import Commands as CMD
+from vsr53.recorder import RECORD, Recorder, Recording, describe, export_csv
+from vsr53.simulator import VSR53Simulator
+from vsr53.stream import STATUS_COMMUNICATION_ERROR, STATUS_DEVICE_ERROR, STATUS_OK
+
+
+@pytest.fixture()
+def path(tmp_path):
+    return tmp_path / "run.vlog"
+
+
+def test_record_layout():
+    # float64 columns stay aligned in a memory map
+    assert RECORD.size % 8 == 0
+
+
+def test_roundtrip(path):
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        metadata = describe(gauge)
+        with Recorder(path, metadata, batch_size=7) as recorder:
+            for i in range(100):
+                recorder.write(1, CMD.Measurement_Value, i * 0.5, 1000.0 + i)
+            recorder.write(2, CMD.Measurement_Value_1, None, 2000.0)
+
+    with Recording(path) as recording:
+        assert recording.metadata["serial_number"] == "20002583"
+        assert len(recording) == 101
+        assert recording[0] == (1000.0, 0.0, "MV", 1, STATUS_OK)
+        last = recording[-1]
+        assert (last.address, last.command, last.status) == (2, "M1", 2)
+        assert math.isnan(last.value)
+        values = recording.values
+        timestamps = recording.timestamps
+        addresses = recording.addresses
+        assert values[99] == 49.5
+        assert timestamps[10] == 1010.0
+        assert addresses[100] == 2
+        assert len(values) == 101
+        values.release()
+        timestamps.release()
+        addresses.release()
+
+
+def test_crash_leaves_readable_file(path):
+    recorder = Recorder(path)
+    for i in range(10):
+        recorder.write(1, CMD.Measurement_Value, float(i))
+    recorder.flush()
+    # the process dies while writing a record
+    recorder._file.close()
+    with path.open("ab") as file:
+        file.write(b"\x01\x02\x03")
+    with Recording(path) as recording:
+        assert len(recording) == 10
+
+    with Recorder(path) as recorder:
+        recorder.write(1, CMD.Measurement_Value, 10.0)
+    with Recording(path) as recording:
+        assert [record.value for record in recording] == [float(i) for i in range(11)]
+
+
+def test_write_reading(path):
+    with Recorder(path) as recorder:
+        recorder.write_reading(Reading(1, "MV", 1.0, 0.0))
+        recorder.write_reading(Reading(1, "MV", None, 0.0, "ERROR1"))
+        recorder.write_reading(Reading(1, "MV", None, 0.0, "Timeout"))
+    with Recording(path) as recording:
+        assert [record.status for record in recording] == [
+            STATUS_OK,
+            STATUS_DEVICE_ERROR,
+            STATUS_COMMUNICATION_ERROR,
+        ]
+
+
+def test_not_a_recording(path):
+    path.write_bytes(b"Run,Measurement,Time Stamp\n")
+    with pytest.raises(ValueError, match="Not a VSR53 recording"):
+        Recording(path)
+
+
+def test_numpy_view(path):
+    np = pytest.importorskip("numpy")
+    with Recorder(path) as recorder:
+        recorder.write(3, CMD.Measurement_Value, 1.5, 10.0)
+    with Recording(path) as recording:
+        array = recording.array()
+        assert array["value"][0] == 1.5
+        assert array["address"].dtype == np.uint8
+        del array
+
+
+def test_export_csv(path, tmp_path):
+    simulator = VSR53Simulator(timing=False)
+    with Recorder(path) as recorder, VSR53DL(simulator.url) as gauge:
+        for _ in range(3):
+            recorder.write(1, CMD.Measurement_Value, gauge.get_measurement_value())
+        recorder.write(1, CMD.Measurement_Value, None)
+    csv_path = tmp_path / "run.csv"
+    assert export_csv(path, csv_path) == 4
+    with csv_path.open(newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["timestamp", "address", "command", "value", "status"]
+    assert rows[1][1:] == ["1", "MV", "1013.0", "0"]
+    assert rows[4][3:] == ["", "2"]
+
+    assert main(["export", str(path), str(tmp_path / "cli.csv")]) == 0
+    assert (tmp_path / "cli.csv").read_text() == csv_path.read_text()
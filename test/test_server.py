@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import socket
+import stat
+import sys
+import threading
+import time
+
+import pytest
+
+from vsr53.__main__ import _gauge_spec
+from vsr53.exceptions import VSR53Error
+from vsr53.manager import AcquisitionManager, GaugeSpec
+from vsr53.server import (
+    GaugeClient,
+    GaugeServer,
+    default_socket_path,
+    parse_listen_address,
+)
+from vsr53.simulator import VSR53Simulator
+
+
+@pytest.fixture()
+def simulator():
+    return VSR53Simulator([1, 2], timing=False, pressure=5e-3)
+
+
+@pytest.fixture()
+def manager(simulator):
+    return AcquisitionManager(
+        [
+            GaugeSpec(simulator.url, 1, "VSR53DL", 50),
+            GaugeSpec(simulator.url, 2, "VSR53DL", 50),
+        ],
+        cache=True,
+    )
+
+
+def test_parse_addresses():
+    assert parse_listen_address("localhost:8053") == ("localhost", 8053)
+    assert parse_listen_address("/run/vsr53.sock") == "/run/vsr53.sock"
+    assert _gauge_spec("/dev/ttyUSB0,2,VSR53DL,10") == GaugeSpec(
+        "/dev/ttyUSB0", 2, "VSR53DL", 10.0
+    )
+    assert _gauge_spec("COM3") == GaugeSpec("COM3")
+
+
+def test_tcp_clients_share_the_bus(simulator, manager):
+    with GaugeServer(manager, ("127.0.0.1", 0)) as server:
+        clients = [
+            GaugeClient(server.address, simulator.url, address=2) for _ in range(5)
+        ]
+        # wait for the first poll
+        while (simulator.url, 2) not in manager.latest():
+            time.sleep(0.001)
+        requests = simulator[2].requests
+        for client in clients:
+            assert client.get_measurement_value() == 5e-3
+            assert client.get_product_name() == "VSR53DL"
+            assert client.get_measurement_range() == (5e-5, 1500.0)
+        # metadata is read once, measurements come from the polling
+        polls = simulator[2].requests - requests
+        assert polls < 5 + 2 * len(clients)
+
+        client = clients[0]
+        client.set_display_unit("Torr")
+        assert clients[1].get_display_unit() == "Torr"
+        assert set(client.latest()) == {(simulator.url, 1), (simulator.url, 2)}
+        assert client.ports() == {
+            simulator.url: [[1, "VSR53DL", 50.0], [2, "VSR53DL", 50.0]]
+        }
+        with pytest.raises(ValueError, match="not available"):
+            client.call("_instruction_exchange", "x")
+        with GaugeClient(server.address, "COM1") as other, pytest.raises(
+            ValueError, match="unknown port"
+        ):
+            other.get_product_name()
+        for client in clients:
+            client.close()
+
+
+def test_the_manager_must_cache(simulator):
+    manager = AcquisitionManager([GaugeSpec(simulator.url, 1, "VSR53DL")])
+    with pytest.raises(ValueError, match="cache=True"):
+        GaugeServer(manager, ("127.0.0.1", 0))
+    assert not manager.cache
+
+
+def test_late_answers_are_dropped(simulator, manager):
+    device = simulator[1]
+    write = device.write
+    release = threading.Event()
+
+    def slow_write(cmd, data):
+        release.wait(5.0)
+        return write(cmd, data)
+
+    device.write = slow_write
+    with GaugeServer(manager, ("127.0.0.1", 0)) as server, GaugeClient(
+        server.address, simulator.url, timeout=0.2
+    ) as client:
+        with pytest.raises(OSError, match="timed out"):
+            client.set_display_unit("Torr")
+        release.set()
+        # the answer to set_display_unit must not be taken for this one
+        assert client.get_product_name() == "VSR53DL"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain sockets")
+def test_unix_socket(tmp_path, simulator):
+    manager = AcquisitionManager(
+        [GaugeSpec(simulator.url, 1, "VSR53DL", 20)], cache=True
+    )
+    path = str(tmp_path / "vsr53.sock")
+    with GaugeServer(manager, path), GaugeClient(path) as client:
+        assert client.get_serial_number_device() == "20002583"
+        simulator.faults.drop = 1.0
+        with pytest.raises(VSR53Error):
+            client.get_device_type()
+    assert not (tmp_path / "vsr53.sock").exists()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain sockets")
+def test_unix_socket_defaults(tmp_path, monkeypatch, manager):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket_path() == str(tmp_path / "vsr53.sock")
+    with GaugeServer(manager) as server, GaugeClient() as client:
+        assert server.address == str(tmp_path / "vsr53.sock")
+        assert stat.S_IMODE((tmp_path / "vsr53.sock").stat().st_mode) == 0o600
+        assert client.get_product_name() == "VSR53DL"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain sockets")
+def test_unix_socket_in_use(tmp_path, simulator, manager):
+    path = str(tmp_path / "vsr53.sock")
+    # left behind by a server that died
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    with GaugeServer(manager, path):
+        other = AcquisitionManager(
+            [GaugeSpec(simulator.url, 1, "VSR53DL", 20)], cache=True
+        )
+        with pytest.raises(OSError, match="already listens"):
+            GaugeServer(other, path).start()
+        assert not other.running
+        with GaugeClient(path) as client:
+            assert client.ports() == {
+                simulator.url: [[1, "VSR53DL", 50.0], [2, "VSR53DL", 50.0]]
+            }
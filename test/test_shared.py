@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.bus import VSR53Bus
+from vsr53.shared import SharedGauge
+from vsr53.simulator import VSR53Simulator
+
+
+class SlowGauge:
+    """
+    Stand-in gauge whose reads block until released
+    """
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.reads = 0
+        self.value = 1.0
+        self.error = None
+
+    def get_measurement_value(self):
+        self.reads += 1
+        self.release.wait(5.0)
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def set_display_unit(self, unit):
+        self.unit = unit
+        self.value = 2.0
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5.0
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_reads_are_coalesced():
+    gauge = SlowGauge()
+    shared = SharedGauge(gauge)
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(shared.get_measurement_value) for _ in range(8)]
+        wait_for(lambda: shared.coalesced == 7)
+        gauge.release.set()
+        assert [future.result() for future in futures] == [1.0] * 8
+    assert gauge.reads == 1
+    assert shared.transactions == 1
+
+
+def test_errors_reach_every_caller():
+    gauge = SlowGauge()
+    gauge.error = ValueError("no answer")
+    shared = SharedGauge(gauge)
+    with ThreadPoolExecutor(4) as executor:
+        futures = [executor.submit(shared.get_measurement_value) for _ in range(4)]
+        wait_for(lambda: shared.coalesced == 3)
+        gauge.release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="no answer"):
+                future.result()
+    # failed reads are not kept
+    gauge.error = None
+    assert shared.get_measurement_value(max_age=10.0) == 1.0
+    assert gauge.reads == 2
+
+
+def test_max_age():
+    gauge = SlowGauge()
+    gauge.release.set()
+    shared = SharedGauge(gauge, max_age=10.0)
+    assert shared.get_measurement_value() == 1.0
+    assert shared.get_measurement_value() == 1.0
+    assert shared.fresh == 1
+    assert shared.get_measurement_value(max_age=0.0) == 1.0
+    assert gauge.reads == 2
+    # writes forget the answers
+    shared.set_display_unit("Torr")
+    assert shared.get_measurement_value() == 2.0
+    assert gauge.reads == 3
+
+
+def test_threads_share_a_gauge():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 2.5e-3
+    with VSR53DL(simulator.url) as gauge:
+        shared = SharedGauge(gauge)
+
+        def work(index):
+            if index % 2:
+                return shared.get_product_name()
+            return shared.get_measurement_value()
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(work, range(200)))
+    assert results[::2] == [2.5e-3] * 100
+    assert results[1::2] == ["VSR53DL"] * 100
+    assert shared.transactions + shared.coalesced == 200
+
+
+def test_bus_gauges_share_the_bus_lock():
+    simulator = VSR53Simulator([1, 2], timing=False)
+    with VSR53Bus(simulator.url) as bus:
+        first = SharedGauge(bus.gauge(1))
+        second = SharedGauge(bus.gauge(2))
+        assert first._lock is second._lock is bus._lock
+        assert second.address == 2
+        assert first.get_measurement_value() == 1013.0
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import sys
+import time
+
+import pytest
+
+from vsr53 import VSR53DL, VSR53USB
+from vsr53.AccessCodes import AccessCode as AC
+from vsr53.Commands import Commands as CMD
+from vsr53.DisplayModes import Units
+from vsr53.simulator import Faults, PtySimulator, VSR53Simulator, frame
+
+
+def test_device_query_dl():
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        assert gauge.get_device_type() == "VSR205"
+        assert gauge.get_product_name() == "VSR53DL"
+        assert gauge.get_serial_number_device() == "20002583"
+        assert gauge.get_serial_number_head() == "20002583"
+        assert gauge.get_device_version() == 2.0
+        assert gauge.get_firmware_version() == "0215"
+        assert gauge.get_bootloader_version() == 2.0
+        assert gauge.get_response_delay() == 5500
+        assert gauge.get_measurement_range() == (5e-05, 1500.0)
+        assert gauge.get_measurement_value() == 1013.0
+        assert gauge.get_relay_1_status() == (1e-2, 2e-2)
+        assert gauge.get_operating_hours() == 12345 / 4
+
+        gauge.set_display_unit(Units.TORR)
+        assert gauge.get_display_unit() == Units.TORR
+
+
+def test_device_query_usb_with_timing():
+    simulator = VSR53Simulator(product="VSR53USB")
+    with VSR53USB(simulator.url) as gauge:
+        start = time.monotonic()
+        assert gauge.get_product_name() == "VSR53USB"
+        # request and reply at 9600 baud plus the default response delay
+        assert time.monotonic() - start > 0.02
+
+
+def test_garbage_keeps_the_timing():
+    simulator = VSR53Simulator(product="VSR53USB", faults=Faults(garbage=1.0), seed=1)
+    with VSR53USB(simulator.url) as gauge:
+        start = time.monotonic()
+        assert gauge.get_product_name() == "VSR53USB"
+        # the garbage before the reply does not skip the response delay
+        assert time.monotonic() - start > 0.02
+
+
+def test_multiple_addresses():
+    simulator = VSR53Simulator([1, 2], timing=False)
+    simulator[2].pressure = 1e-3
+    with VSR53DL(simulator.url, address=1) as first:
+        assert first.get_measurement_value() == 1013.0
+    with VSR53DL(simulator.url, address=2) as second:
+        assert second.get_measurement_value() == 1e-3
+    assert simulator[1].requests == simulator[2].requests == 1
+
+
+def test_protocol_errors():
+    simulator = VSR53Simulator(timing=False)
+    assert simulator.handle(frame(1, AC.RD_TX, "XX")) == frame(
+        1, AC.ERR_RX, "XX", "NO_DEF"
+    )
+    assert simulator.handle(frame(1, AC.WR_TX, CMD.Product_Name, "X")) == frame(
+        1, AC.ERR_RX, CMD.Product_Name, "_LOGIC"
+    )
+    assert simulator.handle(frame(1, AC.WR_TX, CMD.Baud_Rate, "1234")) == frame(
+        1, AC.ERR_RX, CMD.Baud_Rate, "_RANGE"
+    )
+    # unknown address and corrupted request: the device stays silent
+    assert simulator.handle(frame(3, AC.RD_TX, CMD.Measurement_Value)) == b""
+    request = frame(1, AC.RD_TX, CMD.Measurement_Value)
+    assert simulator.handle(request[:-2] + b"!\r") == b""
+    # baud rate mismatch between host and device
+    assert simulator.handle(request, baudrate=115200) == b""
+
+
+def test_faults():
+    request = frame(1, AC.RD_TX, CMD.Measurement_Value)
+    expected = frame(1, AC.RD_RX, CMD.Measurement_Value, "1.0130E+03")
+
+    simulator = VSR53Simulator(faults=Faults(drop=1.0))
+    assert simulator.handle(request) == b""
+
+    simulator = VSR53Simulator(faults=Faults(error=1.0))
+    assert simulator.handle(request) == frame(
+        1, AC.ERR_RX, CMD.Measurement_Value, "ERROR1"
+    )
+
+    simulator = VSR53Simulator(faults=Faults(checksum=1.0))
+    reply = simulator.handle(request)
+    assert reply[:-2] == expected[:-2]
+    assert reply[-2] != expected[-2]
+
+    simulator = VSR53Simulator(faults=Faults(garbage=1.0), seed=1)
+    assert simulator.handle(request).endswith(expected)
+
+
+def test_dropped_replies_are_retried():
+    with VSR53DL("vsr53sim://?timing=0&drop=0.5&seed=3") as gauge:
+        for _ in range(10):
+            assert gauge.get_measurement_value() == 1013.0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="pseudo-terminals are POSIX only")
+def test_pty():
+    with PtySimulator(VSR53Simulator(product="VSR53USB")) as simulator, VSR53USB(
+        simulator.port
+    ) as gauge:
+        assert gauge.get_product_name() == "VSR53USB"
+        assert gauge.get_measurement_value() == 1013.0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="pseudo-terminals are POSIX only")
+def test_pty_garbage():
+    simulator = VSR53Simulator(product="VSR53USB", faults=Faults(garbage=1.0), seed=1)
+    with PtySimulator(simulator) as pty, VSR53USB(pty.port) as gauge:
+        for _ in range(5):
+            assert gauge.get_measurement_value() == 1013.0
+        # the serve thread survived the garbage
+        assert pty._thread.is_alive()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.Commands import Commands as CMD
+from vsr53.simulator import Faults, VSR53Simulator
+from vsr53.snapshot import TIMEOUT
+
+
+def test_default_snapshot():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 3.2e-2
+    with VSR53DL(simulator.url) as gauge:
+        snapshot = gauge.read_snapshot()
+    assert snapshot.ok
+    assert snapshot.commands == (
+        CMD.Measurement_Value,
+        CMD.Measurement_Value_1,
+        CMD.Measurement_Value_2,
+    )
+    assert snapshot.values == (3.2e-2, 3.2e-2, 3.2e-2)
+    assert snapshot[CMD.Measurement_Value_1] == 3.2e-2
+    assert snapshot.duration >= 0
+
+
+def test_typed_values_and_errors():
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        snapshot = gauge.read_snapshot(
+            [
+                CMD.Relay_1,
+                CMD.Measurement_Range,
+                CMD.Operating_Hours,
+                CMD.Relay_3,
+                CMD.Product_Name,
+            ]
+        )
+    assert snapshot[CMD.Relay_1] == (1e-2, 2e-2)
+    assert snapshot[CMD.Measurement_Range] == (5e-05, 1500.0)
+    assert snapshot[CMD.Operating_Hours] == 12345 / 4
+    assert snapshot[CMD.Product_Name] == "VSR53DL"
+    # the VSR53 has only two relays
+    assert snapshot[CMD.Relay_3] is None
+    assert snapshot.error(CMD.Relay_3) == "NO_DEF"
+    assert not snapshot.ok
+
+
+def test_timeout_does_not_abort_the_burst():
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        simulator.faults = Faults(drop=1.0)
+        snapshot = gauge.read_snapshot([CMD.Measurement_Value])
+    assert snapshot.errors == (TIMEOUT,)
+    with pytest.raises(ValueError, match="not in tuple"):
+        snapshot[CMD.Relay_1]
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import math
+import threading
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.simulator import Faults, VSR53Simulator
+from vsr53.stream import (
+    STATUS_DEVICE_ERROR,
+    STATUS_OK,
+    RingBuffer,
+)
+
+
+def test_ring_buffer_wraps():
+    buffer = RingBuffer(4)
+    assert [len(column) for column in buffer.snapshot()] == [0, 0, 0]
+    for i in range(6):
+        buffer.append(float(i), i * 10.0)
+    timestamps, pressures, status = buffer.snapshot()
+    assert list(timestamps) == [2.0, 3.0, 4.0, 5.0]
+    assert list(pressures) == [20.0, 30.0, 40.0, 50.0]
+    assert list(status) == [STATUS_OK] * 4
+    assert list(buffer.snapshot(last=2)[0]) == [4.0, 5.0]
+    assert len(buffer) == 4
+    assert buffer.written == 6
+
+    position, (timestamps, _, _) = buffer.since(4)
+    assert position == 6
+    assert list(timestamps) == [4.0, 5.0]
+    # samples already overwritten are skipped
+    assert list(buffer.since(0)[1][0]) == [2.0, 3.0, 4.0, 5.0]
+
+    with pytest.raises(ValueError, match="positive"):
+        RingBuffer(0)
+
+
+def test_follow():
+    buffer = RingBuffer(8)
+    samples = []
+    started = threading.Event()
+
+    def consume():
+        started.set()
+        samples.extend(buffer.follow(timeout=1.0))
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    started.wait()
+    # give the consumer the chance to start waiting before producing
+    consumer.join(0.05)
+    for i in range(5):
+        buffer.append(float(i), 1.0)
+    buffer.close()
+    consumer.join()
+    assert [sample[0] for sample in samples] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_follow_copies_under_the_lock():
+    buffer = RingBuffer(4)
+    samples = buffer.follow(timeout=1.0)
+    # the generator starts following on its first next()
+    threading.Timer(0.05, buffer.append, (0.0, 0.0)).start()
+    assert next(samples) == (0.0, 0.0, STATUS_OK)
+    for i in range(1, 4):
+        buffer.append(float(i), float(i))
+    assert next(samples) == (1.0, 1.0, STATUS_OK)
+    # the writer wraps around while the consumer holds the batch
+    for i in range(4, 12):
+        buffer.append(float(i), float(i))
+    assert [next(samples)[0] for _ in range(2)] == [2.0, 3.0]
+    assert next(samples)[0] == 8.0
+
+
+def test_streaming():
+    simulator = VSR53Simulator(timing=False)
+    simulator[1].pressure = 2.5e-3
+    with VSR53DL(simulator.url) as gauge:
+        buffer = gauge.start_streaming(0.001, capacity=1000)
+        samples = [sample for _, sample in zip(range(20), buffer.follow(timeout=1.0))]
+        simulator.faults = Faults(error=1.0)
+        next(buffer.follow(timeout=1.0))
+        next(buffer.follow(timeout=1.0))
+        gauge.stop_streaming()
+        assert gauge.stream is buffer
+        # the gauge is usable again once streaming stopped
+        simulator.faults = Faults()
+        assert gauge.get_measurement_value() == 2.5e-3
+
+    assert len(samples) == 20
+    assert all(sample[1:] == (2.5e-3, STATUS_OK) for sample in samples)
+    timestamps, pressures, status = buffer.snapshot()
+    assert list(timestamps) == sorted(timestamps)
+    assert status[-1] == STATUS_DEVICE_ERROR
+    assert math.isnan(pressures[-1])
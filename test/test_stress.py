@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import csv
 import logging
 from datetime import datetime
 
 from vsr53 import VSR53DL
+from vsr53.Commands import Commands as CMD
 from vsr53.logger import log
+from vsr53.recorder import Recorder, describe
 
 log.setLevel(logging.ERROR)
 
@@ -15,18 +16,15 @@ def get_now_timestamp_str() -> str:
     return now.strftime("%m%d%Y%H%M%S")
 
 
-def open_file(filename: str) -> csv.writer:
-    with open(filename, "w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Run", "Measurement", "Time Stamp"])
-        return writer
+def open_file(filename: str, gauge: VSR53DL) -> Recorder:
+    return Recorder(filename, describe(gauge))
 
 
-def perform_measurement(vacuum_sense: VSR53DL, writer: csv.writer):
+def perform_measurement(vacuum_sense: VSR53DL, recorder: Recorder):
     for run in range(100000000):
         measurement = vacuum_sense.get_measurement_value()
         print(f"RUN #{run} measurement: {measurement}mbar")
-        writer.writerow([run, measurement, get_now_timestamp_str()])
+        recorder.write(vacuum_sense._address, CMD.Measurement_Value, measurement)
 
 
 def stress_test():
@@ -34,9 +32,10 @@ def stress_test():
 
     sensor_address = 1
     with VSR53DL(dev_tty, address=sensor_address) as gauge:
-        filename = f"./results/Stress_test_results_{get_now_timestamp_str()}.csv"
-        writer = open_file(filename)
-        perform_measurement(gauge, writer)
+        filename = f"./results/Stress_test_results_{get_now_timestamp_str()}.vlog"
+        # the recording can be converted with: vsr53 export <recording> <csv>
+        with open_file(filename, gauge) as recorder:
+            perform_measurement(gauge, recorder)
 
 
 if __name__ == "__main__":
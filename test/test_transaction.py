@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.codec import answer_timeout, parse_header
+from vsr53.exceptions import (
+    VSR53ChecksumError,
+    VSR53ProtocolError,
+    VSR53TimeoutError,
+)
+from vsr53.simulator import Faults, VSR53Simulator
+
+
+def test_answer_timeout():
+    # a full 109 bytes frame takes more than 0.1 s at 9600 baud
+    assert 0.1 < answer_timeout(9600, 5500) < 0.2
+    assert answer_timeout(115200, 100) < answer_timeout(9600, 100)
+
+
+def test_parse_header():
+    assert parse_header(b"0011MV10") == (1, 1, "MV", 10)
+    with pytest.raises(VSR53ProtocolError):
+        parse_header(b"\x00011MV10")
+
+
+def test_no_timeout_wait_on_valid_answers():
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        start = time.monotonic()
+        for _ in range(100):
+            gauge.get_measurement_value()
+        # frames are read by length, never by waiting for a timeout
+        assert time.monotonic() - start < 1.0
+
+
+def test_silent_device_raises():
+    simulator = VSR53Simulator(timing=False, faults=Faults(drop=1.0))
+    with VSR53DL(simulator.url) as gauge:
+        start = time.monotonic()
+        with pytest.raises(VSR53TimeoutError):
+            gauge.get_measurement_value()
+        assert time.monotonic() - start < 1.0
+    assert simulator[1].requests == 4
+
+
+def test_recovers_from_garbage():
+    simulator = VSR53Simulator(timing=False, faults=Faults(garbage=0.3), seed=2)
+    with VSR53DL(simulator.url) as gauge:
+        for _ in range(20):
+            assert gauge.get_measurement_value() == 1013.0
+
+
+def test_response_delay_updates_timeout():
+    with VSR53DL("vsr53sim://?timing=0") as gauge:
+        timeout = gauge._serial.timeout
+        gauge.set_response_delay(99999)
+        assert gauge._serial.timeout == pytest.approx(timeout + (99999 - 5500) * 1e-6)
+
+
+def test_noise_does_not_cost_a_retry():
+    simulator = VSR53Simulator(timing=False, faults=Faults(garbage=1.0), seed=4)
+    with VSR53DL(simulator.url) as gauge:
+        for _ in range(20):
+            assert gauge.get_measurement_value() == 1013.0
+    # the parser resynchronizes on the answer that follows the noise
+    assert simulator[1].requests == 20
+
+
+def test_corrupted_answers_are_rejected():
+    simulator = VSR53Simulator(timing=False, faults=Faults(checksum=1.0))
+    with VSR53DL(simulator.url) as gauge, pytest.raises(VSR53ChecksumError):
+        gauge.get_measurement_value()
+    assert simulator[1].requests == 4
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import pytest
+
+from vsr53 import VSR53DL
+from vsr53.simulator import VSR53Simulator
+from vsr53.tuning import LinkProfile, ProfileStore, auto_tune
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return ProfileStore(tmp_path / "profiles.json")
+
+
+def test_set_baud_rate_switches_host():
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        gauge.set_baud_rate(57600)
+        assert gauge._serial.baudrate == 57600
+        assert simulator[1].baudrate == 57600
+        assert gauge.get_measurement_value() == 1013.0
+
+
+def test_auto_tune_reaches_fastest_settings(store):
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        profile = auto_tune(gauge, probes=5, store=store)
+    assert profile == LinkProfile(115200, 100, 0.0)
+    assert simulator[1].baudrate == 115200
+    assert simulator[1].registers["RD"] == "100"
+
+
+def test_auto_tune_falls_back(store):
+    simulator = VSR53Simulator(timing=False, seed=1)
+    simulator[1].max_stable_baudrate = 38400
+    simulator[1].min_stable_response_delay = 500
+    with VSR53DL(simulator.url) as gauge:
+        profile = auto_tune(gauge, probes=10, store=store)
+        assert gauge._serial.baudrate == 38400
+        assert gauge.get_measurement_value() == 1013.0
+    assert (profile.baudrate, profile.response_delay) == (38400, 500)
+    assert simulator[1].baudrate == 38400
+    assert simulator[1].registers["RD"] == "500"
+
+
+def test_auto_tune_stops_at_refused_settings(store):
+    simulator = VSR53Simulator(timing=False)
+    device = simulator[1]
+    write = device.write
+
+    def refuse(cmd, data):
+        if (cmd, data) in (("BR", "38400"), ("RD", "1000")):
+            return "_RANGE"
+        return write(cmd, data)
+
+    device.write = refuse
+    with VSR53DL(simulator.url) as gauge:
+        profile = auto_tune(gauge, probes=5, store=store)
+        assert gauge._serial.baudrate == 28800
+        assert gauge.get_measurement_value() == 1013.0
+    assert profile == LinkProfile(28800, 2000, 0.0)
+    assert device.baudrate == 28800
+    assert device.registers["RD"] == "2000"
+
+
+def test_profile_store(store):
+    assert store.get("/dev/ttyUSB0") is None
+    store.save("/dev/ttyUSB0", 1, LinkProfile(57600, 1000))
+    store.save("/dev/ttyUSB0", 2, LinkProfile(19200, 2000))
+    assert ProfileStore(store.path).get("/dev/ttyUSB0") == LinkProfile(57600, 1000)
+    store.remove("/dev/ttyUSB0", 2)
+    assert store.get("/dev/ttyUSB0", 2) is None
+
+
+def test_from_profile(store):
+    simulator = VSR53Simulator(timing=False)
+    with VSR53DL(simulator.url) as gauge:
+        auto_tune(gauge, probes=5, store=store)
+    with VSR53DL.from_profile(simulator.url, store=store) as gauge:
+        assert gauge._serial.baudrate == 115200
+        assert gauge._response_delay == 100
+        assert gauge.get_measurement_value() == 1013.0